@@ -7,7 +7,16 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from alembic import context
 
 from app.core.database import Base
-from app.models import Debtor, Conversation, ConversationMessage
+from app.models import (
+    Debtor,
+    Conversation,
+    ConversationMessage,
+    KnowledgeChunk,
+    NegotiationPlan,
+    ConversationCounter,
+    ConversationRollup,
+    AnalyticsWatermark,
+)
 
 config = context.config
 if config.config_file_name is not None:
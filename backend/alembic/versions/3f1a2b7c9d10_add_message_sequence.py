@@ -0,0 +1,28 @@
+"""add conversation_messages.sequence
+
+Messages are now written in batches by the write-behind queue, so the
+server-side timestamp no longer orders them reliably within a turn.
+
+Revision ID: 3f1a2b7c9d10
+Revises:
+Create Date: 2026-10-18 10:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3f1a2b7c9d10"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversation_messages", sa.Column("sequence", sa.Integer(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("conversation_messages", "sequence")
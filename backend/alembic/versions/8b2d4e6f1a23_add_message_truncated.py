@@ -0,0 +1,30 @@
+"""add conversation_messages.truncated
+
+Marks agent replies that were cut short by a caller barge-in.
+
+Revision ID: 8b2d4e6f1a23
+Revises: 3f1a2b7c9d10
+Create Date: 2026-10-18 11:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "8b2d4e6f1a23"
+down_revision: Union[str, None] = "3f1a2b7c9d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversation_messages",
+        sa.Column(
+            "truncated", sa.Boolean(), nullable=False, server_default=sa.false()
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("conversation_messages", "truncated")
@@ -0,0 +1,57 @@
+"""add conversation_rollups
+
+Hourly and daily conversation rollups for the trends endpoint, the
+watermark table of the incremental refresh, and conversations.updated_at
+(with indexes on it and on started_at) to find the buckets to refresh.
+
+Revision ID: a2d4f6b8c013
+Revises: f1c3a5e7b920
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "a2d4f6b8c013"
+down_revision: Union[str, None] = "f1c3a5e7b920"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversations",
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_conversations_updated_at", "conversations", ["updated_at"])
+    op.create_index("ix_conversations_started_at", "conversations", ["started_at"])
+
+    op.create_table(
+        "conversation_rollups",
+        sa.Column("granularity", sa.String(5), primary_key=True),
+        sa.Column("bucket", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("strategy", sa.String(50), primary_key=True),
+        sa.Column("emotion", sa.String(50), primary_key=True),
+        sa.Column("risk_profile", sa.String(50), primary_key=True),
+        sa.Column("conversations", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("accepted", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("duration_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("duration_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_table(
+        "analytics_watermarks",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("watermark", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_watermarks")
+    op.drop_table("conversation_rollups")
+    op.drop_index("ix_conversations_started_at", table_name="conversations")
+    op.drop_index("ix_conversations_updated_at", table_name="conversations")
+    op.drop_column("conversations", "updated_at")
@@ -0,0 +1,65 @@
+"""add keyset pagination indexes
+
+Composite (filter, timestamp, id) indexes behind the cursor-paginated
+debtor and conversation lists, and (conversation_id, sequence) for loading
+a conversation's messages. (started_at, id) supersedes the single-column
+started_at index. Built CONCURRENTLY so writers are not blocked on large
+tables; each statement runs outside the migration transaction.
+
+Revision ID: b3e5a7c9d124
+Revises: a2d4f6b8c013
+Create Date: 2026-10-18 19:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "b3e5a7c9d124"
+down_revision: Union[str, None] = "a2d4f6b8c013"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("ix_debtors_created_at_id", "debtors", ["created_at", "id"]),
+    ("ix_debtors_risk_profile_created_at_id", "debtors", ["risk_profile", "created_at", "id"]),
+    ("ix_conversations_started_at_id", "conversations", ["started_at", "id"]),
+    ("ix_conversations_status_started_at_id", "conversations", ["status", "started_at", "id"]),
+    (
+        "ix_conversations_debtor_id_started_at_id",
+        "conversations",
+        ["debtor_id", "started_at", "id"],
+    ),
+    (
+        "ix_conversation_messages_conversation_id_sequence",
+        "conversation_messages",
+        ["conversation_id", "sequence"],
+    ),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True
+            )
+        op.drop_index(
+            "ix_conversations_started_at",
+            table_name="conversations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_conversations_started_at",
+            "conversations",
+            ["started_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,68 @@
+"""make debtors.external_id unique
+
+The bulk importer upserts on external_id (ON CONFLICT needs a unique
+index). The unique index is built CONCURRENTLY next to the existing one,
+then takes its name. Fails up front if debtors already share an
+external_id: merge or clear the duplicates first.
+
+Revision ID: c4f6b8d0e235
+Revises: b3e5a7c9d124
+Create Date: 2026-10-18 20:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "c4f6b8d0e235"
+down_revision: Union[str, None] = "b3e5a7c9d124"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DUPLICATES = """
+SELECT count(*) FROM (
+    SELECT external_id FROM debtors
+    WHERE external_id IS NOT NULL
+    GROUP BY external_id
+    HAVING count(*) > 1
+) duplicates
+"""
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().scalar(sa.text(DUPLICATES))
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} external_id values are shared by several debtors; "
+            "merge or clear them before upgrading"
+        )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_debtors_external_id_unique",
+            "debtors",
+            ["external_id"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_debtors_external_id",
+            table_name="debtors",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.execute("ALTER INDEX ix_debtors_external_id_unique RENAME TO ix_debtors_external_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_debtors_external_id_plain",
+            "debtors",
+            ["external_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_debtors_external_id", table_name="debtors", postgresql_concurrently=True
+        )
+        op.execute("ALTER INDEX ix_debtors_external_id_plain RENAME TO ix_debtors_external_id")
@@ -0,0 +1,47 @@
+"""add knowledge_chunks
+
+Chunk store and ingestion manifest for the knowledge base: one row per
+(source, content_hash) with its embedding.
+
+Revision ID: c5d1e9a7b342
+Revises: 8b2d4e6f1a23
+Create Date: 2026-10-18 14:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "c5d1e9a7b342"
+down_revision: Union[str, None] = "8b2d4e6f1a23"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_table(
+        "knowledge_chunks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("source", sa.String(255), nullable=False),
+        sa.Column("chunk_index", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("content_hash", sa.String(64), nullable=False),
+        sa.Column("embedding", Vector(1536), nullable=False),
+        sa.Column("metadata_json", postgresql.JSONB()),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.UniqueConstraint("source", "content_hash"),
+    )
+    op.create_index("ix_knowledge_chunks_source", "knowledge_chunks", ["source"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_knowledge_chunks_source", table_name="knowledge_chunks")
+    op.drop_table("knowledge_chunks")
@@ -0,0 +1,29 @@
+"""add HNSW index on knowledge_chunks.embedding
+
+Revision ID: d7a3f0c2e815
+Revises: c5d1e9a7b342
+Create Date: 2026-10-18 15:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = "d7a3f0c2e815"
+down_revision: Union[str, None] = "c5d1e9a7b342"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_knowledge_chunks_embedding_hnsw",
+        "knowledge_chunks",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_knowledge_chunks_embedding_hnsw", table_name="knowledge_chunks")
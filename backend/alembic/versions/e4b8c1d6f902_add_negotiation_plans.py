@@ -0,0 +1,44 @@
+"""add negotiation_plans
+
+Per-debtor opening strategy and offer written by the portfolio planner
+(python -m app.services.strategy.planner).
+
+Revision ID: e4b8c1d6f902
+Revises: d7a3f0c2e815
+Create Date: 2026-10-18 16:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "e4b8c1d6f902"
+down_revision: Union[str, None] = "d7a3f0c2e815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "negotiation_plans",
+        sa.Column(
+            "debtor_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("debtors.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("strategy", sa.String(50), nullable=False),
+        sa.Column("offer_amount", sa.Float()),
+        sa.Column("tone", sa.String(50), nullable=False),
+        sa.Column("urgency_level", sa.String(20), nullable=False),
+        sa.Column(
+            "planned_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_negotiation_plans_urgency_level", "negotiation_plans", ["urgency_level"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_negotiation_plans_urgency_level", table_name="negotiation_plans")
+    op.drop_table("negotiation_plans")
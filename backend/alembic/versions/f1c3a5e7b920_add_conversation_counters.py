@@ -0,0 +1,61 @@
+"""add conversation_counters
+
+Summary counters of the conversations table, kept up to date by row
+triggers so the metrics summary reads a few rows instead of scanning the
+table. Backfilled from the existing rows under a lock that blocks writes
+to conversations for the duration of the migration.
+
+Idempotent: a table created by create_all at startup is kept, and its
+triggers and counts are rebuilt. The SQL lives in app.models.analytics_ddl,
+shared with the create_all path.
+
+Revision ID: f1c3a5e7b920
+Revises: e4b8c1d6f902
+Create Date: 2026-10-18 17:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+from app.models import analytics_ddl
+
+
+revision: str = "f1c3a5e7b920"
+down_revision: Union[str, None] = "e4b8c1d6f902"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases initialized by create_all at startup may already have it.
+    if not sa.inspect(op.get_bind()).has_table("conversation_counters"):
+        op.create_table(
+            "conversation_counters",
+            sa.Column("dimension", sa.String(20), primary_key=True),
+            sa.Column("key", sa.String(50), primary_key=True),
+            sa.Column("shard", sa.SmallInteger(), primary_key=True),
+            sa.Column("total", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("completed", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("accepted", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("completed_decided", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("completed_accepted", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("duration_sum", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("duration_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+    op.execute(analytics_ddl.LOCK_CONVERSATIONS)
+    for statement in analytics_ddl.COUNTER_TRIGGERS_DDL:
+        op.execute(statement)
+    # Rebuilt rather than added to: counts left by an earlier setup are replaced.
+    op.execute("DELETE FROM conversation_counters")
+    op.execute(analytics_ddl.BACKFILL)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS conversations_counters_update ON conversations")
+    op.execute("DROP TRIGGER IF EXISTS conversations_counters_insert_delete ON conversations")
+    op.execute("DROP FUNCTION IF EXISTS update_conversation_counters()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS apply_conversation_counters("
+        "smallint, integer, text, text, text, text, integer)"
+    )
+    op.drop_table("conversation_counters")
@@ -1,11 +1,14 @@
 import uuid
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.pagination import paginate, set_next_cursor
 from app.models.conversation import Conversation
 from app.models.debtor import Debtor
 from app.schemas.conversation import (
@@ -13,6 +16,7 @@ from app.schemas.conversation import (
     ConversationResponse,
     ConversationDetail,
 )
+from app.services.conversation.export import iter_ndjson
 
 router = APIRouter()
 
@@ -35,20 +39,52 @@ async def create_conversation(
 
 @router.get("/", response_model=list[ConversationResponse])
 async def list_conversations(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
     status: str | None = None,
     debtor_id: uuid.UUID | None = None,
     db: AsyncSession = Depends(get_db),
 ):
+    """Newest first; pass the X-Next-Cursor header of a page as `after` to get the next one."""
     query = select(Conversation)
     if status:
         query = query.where(Conversation.status == status)
     if debtor_id:
         query = query.where(Conversation.debtor_id == debtor_id)
-    query = query.order_by(Conversation.started_at.desc()).offset(skip).limit(limit)
+    query = paginate(
+        query, Conversation.started_at, Conversation.id, limit, after=after, skip=skip
+    )
     result = await db.execute(query)
-    return result.scalars().all()
+    conversations = result.scalars().all()
+    set_next_cursor(response, conversations, "started_at", limit)
+    return conversations
+
+
+@router.get("/export")
+async def export_conversations(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: str | None = Query(None, pattern="^(active|completed|abandoned|escalated)$"),
+    strategy: str | None = Query(None, pattern="^(empathetic|firm|informative|urgent)$"),
+):
+    """
+    Stream conversations with their transcripts as NDJSON, oldest first.
+
+    One line per conversation in the shape of GET /conversations/{id};
+    `since` is inclusive and `until` exclusive on started_at.
+    """
+    # Naive datetimes are taken as UTC.
+    since = since if since is None or since.tzinfo else since.replace(tzinfo=timezone.utc)
+    until = until if until is None or until.tzinfo else until.replace(tzinfo=timezone.utc)
+    if since is not None and until is not None and until <= since:
+        raise HTTPException(status_code=400, detail="until must be after since")
+    return StreamingResponse(
+        iter_ndjson(since, until, status, strategy),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="conversations.ndjson"'},
+    )
 
 
 @router.get("/{conversation_id}", response_model=ConversationDetail)
@@ -1,15 +1,22 @@
+import asyncio
+import tempfile
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
+from app.core.pagination import paginate, set_next_cursor
 from app.models.debtor import Debtor
-from app.schemas.debtor import DebtorCreate, DebtorUpdate, DebtorResponse
+from app.schemas.debtor import DebtorCreate, DebtorImportReport, DebtorUpdate, DebtorResponse
+from app.services.debtors.importer import DEFAULT_CHUNK_SIZE, detect_format, import_debtors
 
 router = APIRouter()
 
+# Request bodies larger than this are spooled to disk before the import.
+_IMPORT_SPOOL_BYTES = 16 * 1024 * 1024
+
 
 @router.post("/", response_model=DebtorResponse, status_code=201)
 async def create_debtor(data: DebtorCreate, db: AsyncSession = Depends(get_db)):
@@ -20,19 +27,50 @@ async def create_debtor(data: DebtorCreate, db: AsyncSession = Depends(get_db)):
     return debtor
 
 
+@router.post("/import", response_model=DebtorImportReport)
+async def import_debtors_file(
+    request: Request,
+    format: str | None = Query(default=None, pattern="^(csv|ndjson)$"),
+    chunk_size: int = Query(default=DEFAULT_CHUNK_SIZE, ge=100, le=100_000),
+    dry_run: bool = False,
+):
+    """
+    Bulk upsert on external_id from a raw CSV (header row) or NDJSON body.
+
+    The format comes from `format` or the Content-Type (text/csv,
+    application/x-ndjson). Invalid rows are reported and skipped.
+    """
+    fmt = format or detect_format(content_type=request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson",
+        )
+    with tempfile.SpooledTemporaryFile(max_size=_IMPORT_SPOOL_BYTES) as spool:
+        async for data in request.stream():
+            await asyncio.to_thread(spool.write, data)
+        spool.seek(0)
+        return await import_debtors(spool, fmt, chunk_size=chunk_size, dry_run=dry_run)
+
+
 @router.get("/", response_model=list[DebtorResponse])
 async def list_debtors(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
     risk_profile: str | None = None,
     db: AsyncSession = Depends(get_db),
 ):
+    """Newest first; pass the X-Next-Cursor header of a page as `after` to get the next one."""
     query = select(Debtor)
     if risk_profile:
         query = query.where(Debtor.risk_profile == risk_profile)
-    query = query.offset(skip).limit(limit)
+    query = paginate(query, Debtor.created_at, Debtor.id, limit, after=after, skip=skip)
     result = await db.execute(query)
-    return result.scalars().all()
+    debtors = result.scalars().all()
+    set_next_cursor(response, debtors, "created_at", limit)
+    return debtors
 
 
 @router.get("/{debtor_id}", response_model=DebtorResponse)
@@ -1,69 +1,76 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy import select, func
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.clients import clients
 from app.core.database import get_db
-from app.models.conversation import Conversation
-from app.schemas.conversation import MetricsSummary
+from app.schemas.conversation import MetricsSummary, MetricsTrends, RuntimeMetrics
+from app.services.analytics.rollups import MAX_HOURLY_DAYS, get_trends
+from app.services.analytics.summary import get_summary
+from app.services.conversation.message_writer import message_writer
+from app.services.conversation.session_store import get_session_store
+from app.services.personaplex.history import history_totals
+from app.services.personaplex.prompt_engine import prompt_engine
+from app.services.rag.knowledge_base import retrieval_stats
+from app.services.rag.query_cache import get_query_cache
+from app.services.voice.tts_cache import get_tts_cache
 
 router = APIRouter()
 
 
 @router.get("/summary", response_model=MetricsSummary)
 async def get_metrics_summary(db: AsyncSession = Depends(get_db)):
-    total = await db.scalar(select(func.count(Conversation.id)))
-    completed = await db.scalar(
-        select(func.count(Conversation.id)).where(Conversation.status == "completed")
-    )
-    avg_duration = await db.scalar(
-        select(func.avg(Conversation.duration_seconds)).where(
-            Conversation.duration_seconds.is_not(None)
-        )
-    )
+    return await get_summary(db)
 
-    accepted = await db.scalar(
-        select(func.count(Conversation.id)).where(
-            Conversation.negotiation_result == "accepted"
-        )
-    )
-    acceptance_rate = None
-    if completed and completed > 0:
-        acceptance_rate = accepted / completed
 
-    emotional_result = await db.execute(
-        select(
-            Conversation.emotional_state_detected,
-            func.count(Conversation.id),
+@router.get("/trends", response_model=MetricsTrends)
+async def get_metrics_trends(
+    start: datetime,
+    end: datetime | None = None,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    group_by: str | None = Query(None, pattern="^(strategy|emotion|risk_profile)$"),
+    strategy: str | None = None,
+    emotion: str | None = None,
+    risk_profile: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    # Naive datetimes are taken as UTC, the timezone of the buckets.
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    if end is None:
+        # Up to the end of the current bucket, so repeated polls share a cache entry.
+        now = datetime.now(timezone.utc)
+        if granularity == "hour":
+            end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if granularity == "hour" and end - start > timedelta(days=MAX_HOURLY_DAYS):
+        raise HTTPException(
+            status_code=400, detail=f"hourly trends are limited to {MAX_HOURLY_DAYS} days"
         )
-        .where(Conversation.emotional_state_detected.is_not(None))
-        .group_by(Conversation.emotional_state_detected)
-    )
-    emotional_distribution = {
-        row[0]: row[1] for row in emotional_result.all()
-    }
 
-    strategy_result = await db.execute(
-        select(
-            Conversation.strategy,
-            func.avg(
-                func.cast(
-                    Conversation.negotiation_result == "accepted", type_=None
-                )
-            ),
+    filters = {
+        name: value
+        for name, value in (
+            ("strategy", strategy), ("emotion", emotion), ("risk_profile", risk_profile)
         )
-        .where(Conversation.status == "completed")
-        .group_by(Conversation.strategy)
-    )
-    strategy_effectiveness = {
-        row[0]: float(row[1]) if row[1] else 0.0
-        for row in strategy_result.all()
+        if value is not None
     }
+    return await get_trends(db, start, end, granularity, group_by, filters)
+
 
-    return MetricsSummary(
-        total_conversations=total or 0,
-        completed_conversations=completed or 0,
-        avg_duration_seconds=float(avg_duration) if avg_duration else None,
-        acceptance_rate=acceptance_rate,
-        emotional_distribution=emotional_distribution,
-        strategy_effectiveness=strategy_effectiveness,
+@router.get("/runtime", response_model=RuntimeMetrics)
+async def get_runtime_metrics():
+    return RuntimeMetrics(
+        http_clients=clients.stats(),
+        tts_cache=get_tts_cache().stats(),
+        history=history_totals(),
+        prompt_cache=prompt_engine.stats(),
+        rag_cache=get_query_cache().stats(),
+        retrieval=retrieval_stats(),
+        sessions=get_session_store().stats(),
+        message_writer=message_writer.stats(),
     )
@@ -1,22 +1,44 @@
+import asyncio
+import json
 import uuid
+from contextlib import aclosing
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from sqlalchemy import select
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 import structlog
 
-from app.core.database import async_session
-from app.models.conversation import Conversation, ConversationMessage
-from app.services.voice.stt import transcribe_audio
-from app.services.voice.tts import synthesize_speech
-from app.services.emotional.classifier import classify_emotion
-from app.services.personaplex.client import PersonaPlexClient
+from app.config import get_settings
+from app.services.conversation.pipeline import (
+    ConversationNotFoundError,
+    TurnPipeline,
+    load_session,
+)
+from app.services.conversation.session_store import get_session_store
+from app.services.voice.codecs import (
+    INPUT_CODECS,
+    OUTPUT_CODECS,
+    PCM_OUTPUT_SAMPLE_RATE,
+    CodecError,
+    create_decoder,
+)
+from app.services.voice.vad import UtteranceEndpointer
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
 
+# Close code sent to a socket whose session was resumed on another connection.
+SESSION_TAKEN_OVER = 4000
+# Close code for a conversation that does not exist.
+CONVERSATION_NOT_FOUND = 4404
+
+
 class ConnectionManager:
+    """
+    Sockets connected to this process. Events for a session go through the
+    session store (``publish()``), whichever worker holds the socket.
+    """
+
     def __init__(self):
         self.active_connections: dict[str, WebSocket] = {}
 
@@ -24,104 +46,198 @@ class ConnectionManager:
         await websocket.accept()
         self.active_connections[session_id] = websocket
 
-    def disconnect(self, session_id: str):
-        self.active_connections.pop(session_id, None)
-
-    async def send_json(self, session_id: str, data: dict):
-        ws = self.active_connections.get(session_id)
-        if ws:
-            await ws.send_json(data)
+    def disconnect(self, session_id: str, websocket: WebSocket | None = None):
+        # A resumed session may already be served by a newer socket.
+        if websocket is None or self.active_connections.get(session_id) is websocket:
+            self.active_connections.pop(session_id, None)
 
 
 manager = ConnectionManager()
-_personaplex = PersonaPlexClient()
+
+
+async def _forward_events(websocket: WebSocket, session_id: str, connection_id: str) -> bool:
+    """
+    Relay events published to the session to this socket.
+
+    Returns:
+        True when another connection took the session over, False if the
+        subscription failed.
+    """
+    try:
+        async with aclosing(get_session_store().events(session_id)) as events:
+            async for event in events:
+                if event.get("type") == "session_takeover":
+                    if event.get("connection_id") != connection_id:
+                        return True
+                    continue
+                if event.get("type") == "session_released":
+                    continue
+                await websocket.send_json(event)
+    except Exception as e:
+        logger.warning("session_events_error", conversation_id=session_id, error=str(e))
+    return False
+
+
+def _handle_control(
+    text: str, session_id: str, endpointer: UtteranceEndpointer, pipeline: TurnPipeline
+) -> None:
+    """Text frames carry JSON control messages from the client."""
+    try:
+        event = json.loads(text)
+    except ValueError:
+        logger.warning("control_message_invalid", conversation_id=session_id)
+        return
+    if not isinstance(event, dict):
+        return
+    if event.get("type") == "playback":
+        pipeline.report_playback(event)
+    elif event.get("type") == "end_of_utterance":
+        # Push-to-talk: the recording is trimmed, so the trailing silence
+        # the VAD waits for never comes.
+        utterance = endpointer.flush()
+        if utterance:
+            pipeline.submit(utterance)
+
+
+async def _receive_audio(
+    websocket: WebSocket,
+    session_id: str,
+    decoder,
+    endpointer: UtteranceEndpointer,
+    pipeline: TurnPipeline,
+) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("text") is not None:
+            _handle_control(message["text"], session_id, endpointer, pipeline)
+            continue
+        data = message.get("bytes")
+        if not data:
+            continue
+        try:
+            pcm = decoder.decode(data)
+        except Exception as e:
+            logger.warning("audio_decode_error", conversation_id=session_id, error=str(e))
+            continue
+
+        # Buffer frames until the VAD detects the end of an utterance;
+        # the pipeline answers turns in order while we keep receiving.
+        was_speaking = endpointer.in_speech
+        utterances = endpointer.feed(pcm)
+
+        # Caller started talking over the agent: drop the stale reply.
+        if not was_speaking and (endpointer.in_speech or utterances):
+            pipeline.barge_in()
+
+        for utterance in utterances:
+            pipeline.submit(utterance)
 
 
 @router.websocket("/conversation/{conversation_id}")
 async def websocket_conversation(
     websocket: WebSocket,
     conversation_id: uuid.UUID,
+    input_codec: str = Query("pcm", alias="input"),
+    output_codec: str = Query("mp3", alias="output"),
 ):
+    """
+    Live conversation socket.
+
+    Codecs are negotiated with query parameters: ``input`` is the uplink
+    format (pcm, opus, webm-opus) and ``output`` the downlink format. The
+    default mp3 sends each segment as one playable file. opus and pcm are
+    streamed: a segment arrives in several frames of whole Ogg pages or
+    whole samples, which only a streaming player (MediaSource, WebCodecs,
+    an AudioWorklet) can play as they come. The accepted pair is
+    confirmed in a ``session`` message right after connecting; a new call
+    then starts with the agent's AI disclosure.
+
+    Binary frames carry the caller's audio. Utterances are endpointed on
+    silence; a push-to-talk client sends ``{"type": "end_of_utterance"}``
+    when the caller stops talking. Each segment of agent audio
+    is preceded by an ``audio_segment`` message (reply and segment
+    indices); the client may report its playback position with
+    ``{"type": "playback", "reply": r, "segment": s, "position_ms": ms}``
+    text frames so a reply cut by barge-in is recorded as heard. On
+    ``barge_in`` the client must stop playing the audio it has buffered.
+
+    Reconnecting to the same conversation resumes its session (history,
+    persona, sequence) on any worker. The previous socket, if still open,
+    saves the session and is closed with code 4000 before it is loaded.
+    A conversation that does not exist is refused with code 4404.
+    """
     session_id = str(conversation_id)
     await manager.connect(websocket, session_id)
-    logger.info("websocket_connected", conversation_id=session_id)
-
-    conversation_history: list[dict] = []
-    persona_config: dict | None = None
-
-    # Load conversation context (debtor info + strategy) from DB
-    async with async_session() as db:
-        result = await db.execute(
-            select(Conversation).where(Conversation.id == conversation_id)
-        )
-        conv = result.scalar_one_or_none()
-        if conv:
-            debtor_result = await db.execute(
-                select(conv.__class__).where(conv.__class__.id == conv.id)
-            )
-            persona_config = {"strategy": conv.strategy}
 
     try:
-        while True:
-            data = await websocket.receive_bytes()
-
-            # 1. Speech to text
-            transcript = await transcribe_audio(data)
-            if not transcript:
-                continue
-
-            await manager.send_json(session_id, {
-                "type": "transcription",
-                "role": "user",
-                "content": transcript,
-            })
-
-            # 2. Classify emotion
-            emotion = await classify_emotion(transcript)
-            if persona_config is not None:
-                persona_config["emotional_state"] = emotion
-            await manager.send_json(session_id, {
-                "type": "emotion",
-                "emotion": emotion,
-            })
-
-            # 3. Generate agent response via OpenAI GPT
-            response_text = await _personaplex.generate_text_response(
-                text_input=transcript,
-                persona_config=persona_config,
-                conversation_history=conversation_history,
-            )
-
-            # Update in-memory conversation history
-            conversation_history.append({"role": "user", "content": transcript})
-            conversation_history.append({"role": "assistant", "content": response_text})
-
-            await manager.send_json(session_id, {
-                "type": "transcription",
-                "role": "agent",
-                "content": response_text,
-            })
-
-            # 4. Persist messages to DB
-            async with async_session() as db:
-                db.add(ConversationMessage(
-                    conversation_id=conversation_id,
-                    role="user",
-                    content=transcript,
-                    emotional_tone=emotion,
-                ))
-                db.add(ConversationMessage(
-                    conversation_id=conversation_id,
-                    role="agent",
-                    content=response_text,
-                ))
-                await db.commit()
-
-            # 5. Text to speech
-            audio_bytes = await synthesize_speech(response_text)
-            if audio_bytes:
-                await websocket.send_bytes(audio_bytes)
-
+        if output_codec not in OUTPUT_CODECS:
+            raise CodecError(f"unsupported output codec: {output_codec}")
+        decoder = create_decoder(input_codec)
+    except CodecError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        manager.disconnect(session_id, websocket)
+        return
+
+    logger.info(
+        "websocket_connected",
+        conversation_id=session_id,
+        input_codec=input_codec,
+        output_codec=output_codec,
+    )
+    await websocket.send_json({
+        "type": "session",
+        "input_codec": input_codec,
+        "output_codec": output_codec,
+        "output_sample_rate": PCM_OUTPUT_SAMPLE_RATE if output_codec == "pcm" else None,
+        "supported_input_codecs": list(INPUT_CODECS),
+    })
+
+    # Close any older socket of this conversation, on whichever worker,
+    # and wait for it to save the session before resuming it here.
+    connection_id = uuid.uuid4().hex
+    store = get_session_store()
+    await store.take_over(
+        session_id, connection_id, timeout=get_settings().session_takeover_timeout_seconds
+    )
+    try:
+        session = await load_session(conversation_id)
+    except ConversationNotFoundError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=CONVERSATION_NOT_FOUND)
+        manager.disconnect(session_id, websocket)
+        await store.release(session_id, connection_id)
+        return
+    pipeline = TurnPipeline(websocket, session, output_codec=output_codec)
+    endpointer = UtteranceEndpointer.from_settings(emit_wav=True)
+    if session.next_sequence == 0:
+        # A new call, not a resumed one: the agent discloses it is an AI first.
+        pipeline.greet()
+
+    receiver = asyncio.create_task(
+        _receive_audio(websocket, session_id, decoder, endpointer, pipeline)
+    )
+    events = asyncio.create_task(_forward_events(websocket, session_id, connection_id))
+    try:
+        await asyncio.wait({receiver, events}, return_when=asyncio.FIRST_COMPLETED)
+        if events.done() and events.result():
+            logger.info("websocket_taken_over", conversation_id=session_id)
+            try:
+                await websocket.close(code=SESSION_TAKEN_OVER)
+            except Exception:
+                pass  # the stale socket may already be gone
+        else:
+            await receiver
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
         logger.info("websocket_disconnected", conversation_id=session_id)
+    finally:
+        receiver.cancel()
+        events.cancel()
+        manager.disconnect(session_id, websocket)
+        try:
+            # Speech cut off by the disconnect or takeover is still recorded.
+            await pipeline.close(trailing=endpointer.flush())
+        finally:
+            await store.release(session_id, connection_id)
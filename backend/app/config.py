@@ -17,6 +17,100 @@ class Settings(BaseSettings):
     openai_tts_model: str = "tts-1"
     openai_stt_model: str = "whisper-1"
     openai_embedding_model: str = "text-embedding-3-small"
+    openai_embedding_dimensions: int = 1536
+
+    # Conversation history: last N turns verbatim, older ones summarized
+    openai_summary_model: str = "gpt-4o-mini"
+    history_keep_turns: int = 6
+    history_max_fact_tokens: int = 300
+    prompt_token_budget: int = 4000
+
+    # Shared OpenAI HTTP connection pool
+    openai_max_connections: int = 200
+    openai_max_keepalive_connections: int = 50
+    openai_keepalive_expiry: float = 30.0
+    openai_http2: bool = False
+    openai_timeout: float = 30.0
+    openai_warmup_connections: int = 2
+
+    # Streaming turns: LLM tokens are split into sentences and synthesized
+    # segment by segment instead of waiting for the full reply.
+    stream_responses: bool = True
+    tts_segment_min_chars: int = 40
+    tts_segment_max_chars: int = 240
+
+    # TTS audio cache (memory LRU -> Redis -> optional disk)
+    tts_cache_memory_bytes: int = 64 * 1024 * 1024
+    tts_cache_redis_enabled: bool = True
+    tts_cache_redis_bytes: int = 512 * 1024 * 1024
+    tts_cache_disk_dir: str = ""
+    tts_cache_disk_bytes: int = 1024 * 1024 * 1024
+    tts_cache_prewarm: bool = True
+    # Output formats pre-warmed, comma-separated: those the clients negotiate
+    tts_cache_prewarm_formats: str = "mp3,opus,pcm"
+
+    # Knowledge base ingestion (python -m app.services.rag.ingest)
+    knowledge_dir: str = ""  # defaults to backend/knowledge
+    knowledge_chunk_size: int = 500
+    knowledge_chunk_overlap: int = 50
+    knowledge_embedding_batch_size: int = 128
+    knowledge_ingest_on_startup: bool = True
+    knowledge_hnsw_ef_search: int = 40
+    # "pgvector" (HNSW in Postgres) or "mmap" (in-process index exported by ingest)
+    knowledge_backend: str = "pgvector"
+    knowledge_index_dir: str = "data/knowledge_index"
+    # Hybrid retrieval: BM25 fused with vector search; a confident lexical
+    # match (all query terms, min score, margin over runner-up) skips the
+    # embedding call.
+    knowledge_hybrid: bool = True
+    knowledge_lexical_min_score: float = 4.0
+    knowledge_lexical_margin: float = 1.5
+    # Grounding of live turns: retrieval runs alongside emotion classification
+    # and is dropped if it misses the deadline (measured from the transcript).
+    knowledge_turn_retrieval: bool = True
+    knowledge_turn_deadline_ms: int = 200
+    knowledge_turn_top_k: int = 3
+    knowledge_turn_min_words: int = 3
+    knowledge_context_max_chars: int = 1200
+
+    # Retrieval caches: query embeddings and top-k results per normalized query
+    rag_cache_memory_bytes: int = 16 * 1024 * 1024
+    rag_cache_redis_enabled: bool = True
+    rag_cache_redis_bytes: int = 128 * 1024 * 1024
+    rag_embedding_cache_ttl: int = 7 * 24 * 3600
+    rag_result_cache_ttl: int = 24 * 3600
+
+    # Dashboard metrics: "counters" (trigger-maintained totals) or "scan"
+    # (one aggregate query over conversations); responses memoized per worker.
+    metrics_summary_source: str = "counters"
+    metrics_cache_ttl: float = 5.0
+    # Hourly/daily rollups behind /metrics/trends, refreshed in the background
+    # (0 disables); the watermark trails now() by the lag.
+    metrics_rollup_interval: int = 60
+    metrics_rollup_lag_seconds: int = 120
+
+    # Emotion classification: "keywords" (rules) or "model" (hashed n-gram
+    # logistic model trained with python -m app.services.emotional.train)
+    emotion_engine: str = "keywords"
+    emotion_model_dir: str = "data/emotion_model"
+
+    # Server-side VAD / utterance endpointing (16 kHz PCM uplink)
+    vad_frame_ms: int = 30
+    vad_energy_threshold: float = 500.0
+    vad_noise_multiplier: float = 3.0
+    vad_zcr_max: float = 0.35
+    vad_min_speech_ms: int = 120
+    vad_hangover_ms: int = 600
+    vad_max_utterance_ms: int = 15000
+    vad_padding_ms: int = 150
+
+    # Live session state (persona, compact history, next sequence) and event
+    # channel: "memory" (single worker) or "redis" (shared by every worker, so
+    # a reconnect resumes the call anywhere)
+    session_store: str = "memory"
+    session_ttl_seconds: int = 3600
+    # How long a reconnect waits for the previous connection to save the session
+    session_takeover_timeout_seconds: float = 5.0
 
     secret_key: str = "change-this-in-production"
     cors_origins: str = "http://localhost:3000"
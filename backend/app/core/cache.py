@@ -0,0 +1,197 @@
+"""
+Byte-bounded LRU cache tiers shared by the application caches.
+
+``MemoryTier`` is a per-process LRU; ``RedisTier`` is shared by every
+worker. Both evict least-recently-used entries once they exceed their
+byte budget and keep hit/miss counters.
+
+``TTLCache`` memoizes computed responses (e.g. dashboard metrics) for a
+few seconds in-process.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+import structlog
+
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+
+class CacheTier:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class MemoryTier(CacheTier):
+    def __init__(self, max_bytes: int):
+        super().__init__(max_bytes)
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = value
+        self._bytes += len(value)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "bytes": self._bytes, "entries": len(self._entries)}
+
+
+class RedisTier(CacheTier):
+    """
+    Shared tier. Recency lives in a sorted set and entry sizes in a hash,
+    so any process can evict the oldest entries once the budget is exceeded.
+    With a ttl, entries also expire on their own; their index entries are
+    the oldest and are reclaimed by the next eviction.
+    """
+
+    def __init__(self, max_bytes: int, prefix: str, ttl: int | None = None):
+        super().__init__(max_bytes)
+        self.prefix = prefix
+        self.ttl = ttl
+        self._index = f"{prefix}index"
+        self._sizes = f"{prefix}sizes"
+        self._total = f"{prefix}bytes"
+        self.errors = 0
+
+    async def get(self, key: str) -> bytes | None:
+        redis = get_redis()
+        try:
+            value = await redis.get(self.prefix + key)
+            if value is not None:
+                await redis.zadd(self._index, {key: time.time()})
+        except Exception as e:
+            self._error(e)
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    async def put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        redis = get_redis()
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hget(self._sizes, key)
+                pipe.set(self.prefix + key, value, ex=self.ttl)
+                pipe.hset(self._sizes, key, len(value))
+                pipe.zadd(self._index, {key: time.time()})
+                previous, *_ = await pipe.execute()
+            delta = len(value) - int(previous or 0)
+            total = await redis.incrby(self._total, delta)
+            if total > self.max_bytes:
+                await self._evict(total)
+        except Exception as e:
+            self._error(e)
+
+    async def _evict(self, total: int) -> None:
+        redis = get_redis()
+        while total > self.max_bytes:
+            oldest = await redis.zpopmin(self._index, 16)
+            if not oldest:
+                break
+            keys = [member.decode() for member, _ in oldest]
+            sizes = await redis.hmget(self._sizes, keys)
+            freed = sum(int(size or 0) for size in sizes)
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.delete(*(self.prefix + key for key in keys))
+                pipe.hdel(self._sizes, *keys)
+                pipe.decrby(self._total, freed)
+                *_, total = await pipe.execute()
+            self.evictions += len(keys)
+
+    def _error(self, error: Exception) -> None:
+        self.errors += 1
+        if self.errors == 1 or self.errors % 100 == 0:
+            logger.warning(
+                "cache_redis_error", prefix=self.prefix, error=str(error), errors=self.errors
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "errors": self.errors}
+
+
+class TTLCache:
+    """
+    Per-process memo of computed values with a short time to live.
+
+    Concurrent misses on the same key wait for a single load instead of
+    each running it.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._locks: dict[Hashable, asyncio.Lock] = {}
+
+    def _fresh(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return True, entry[1]
+        return False, None
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl <= 0:
+            return await load()
+        fresh, value = self._fresh(key)
+        if fresh:
+            self.hits += 1
+            return value
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            fresh, value = self._fresh(key)
+            if fresh:
+                self.hits += 1
+                return value
+            self.misses += 1
+            value = await load()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._locks.pop(evicted, None)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
@@ -0,0 +1,112 @@
+"""
+Process-wide pooled HTTP / OpenAI clients.
+
+A single httpx connection pool (keep-alive, optional HTTP/2) backs the
+AsyncOpenAI client shared by STT, TTS, chat and embeddings. It is opened
+and warmed up in the application lifespan and closed on shutdown.
+"""
+
+import asyncio
+import importlib.util
+
+import httpx
+import structlog
+from openai import AsyncOpenAI
+
+from app.config import get_settings
+
+logger = structlog.get_logger()
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._http: httpx.AsyncClient | None = None
+        self._openai: AsyncOpenAI | None = None
+        self._http2 = False
+        self._requests = 0
+        self._errors = 0
+
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            self._build()
+        return self._openai
+
+    def _build(self) -> None:
+        settings = get_settings()
+
+        http2 = settings.openai_http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("http2_unavailable", reason="h2 package not installed")
+            http2 = False
+        self._http2 = http2
+
+        self._http = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_keepalive_connections,
+                keepalive_expiry=settings.openai_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.openai_timeout, connect=5.0),
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+        self._openai = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=self._http,
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self._requests += 1
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        if response.status_code >= 500:
+            self._errors += 1
+
+    async def warm_up(self) -> None:
+        """Open (and TLS-handshake) pooled connections before the first call."""
+        settings = get_settings()
+        if not settings.openai_api_key:
+            return
+        client = self.openai()
+        results = await asyncio.gather(
+            *(client.models.list() for _ in range(settings.openai_warmup_connections)),
+            return_exceptions=True,
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("openai_warmup_failed", error=str(failures[0]))
+        logger.info("openai_clients_warmed", **self.stats())
+
+    def stats(self) -> dict:
+        connections = []
+        if self._http is not None:
+            pool = getattr(self._http._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "http2": self._http2,
+            "requests": self._requests,
+            "server_errors": self._errors,
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+    async def close(self) -> None:
+        if self._openai is not None:
+            await self._openai.close()
+        elif self._http is not None:
+            await self._http.aclose()
+        self._openai = None
+        self._http = None
+
+
+clients = ClientRegistry()
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Shared AsyncOpenAI client backed by the process-wide connection pool."""
+    return clients.openai()
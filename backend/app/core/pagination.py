@@ -0,0 +1,75 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered by a (timestamp, id) pair, newest first, and the next
+page starts strictly after the last row of the previous one:
+``WHERE (ts, id) < (:ts, :id) ORDER BY ts DESC, id DESC LIMIT n``. With a
+composite index on (ts, id) Postgres seeks straight to the position, so
+page N costs the same as page 1, unlike OFFSET which reads and discards
+every earlier row.
+
+The cursor handed to clients is an opaque URL-safe token; the position
+of the next page is returned in the ``X-Next-Cursor`` response header so
+list responses keep their shape.
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps([timestamp.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), uuid.UUID(row_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor") from e
+
+
+def paginate(
+    query: Select,
+    timestamp: InstrumentedAttribute,
+    row_id: InstrumentedAttribute,
+    limit: int,
+    after: str | None = None,
+    skip: int = 0,
+) -> Select:
+    """
+    Order a query newest first and restrict it to one page.
+
+    Args:
+        query: The filtered select.
+        timestamp: Ordering column (first column of the supporting index).
+        row_id: Unique tie-breaker (last column of the index).
+        limit: Page size.
+        after: Cursor of the previous page; takes precedence over skip.
+        skip: Legacy offset, kept for backward compatibility.
+    """
+    query = query.order_by(timestamp.desc(), row_id.desc()).limit(limit)
+    if after is not None:
+        position_timestamp, position_id = decode_cursor(after)
+        return query.where(
+            tuple_(timestamp, row_id)
+            < tuple_(literal(position_timestamp, timestamp.type), literal(position_id, row_id.type))
+        )
+    return query.offset(skip) if skip else query
+
+
+def set_next_cursor(response: Response, rows: list, timestamp: str, limit: int) -> None:
+    """Advertise the cursor of the next page when this one is full."""
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, timestamp), last.id)
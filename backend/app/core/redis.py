@@ -0,0 +1,24 @@
+"""
+Shared Redis connection used by caches and cross-process state.
+"""
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+
+_redis: Redis | None = None
+
+
+def get_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        settings = get_settings()
+        _redis = Redis.from_url(settings.redis_url)
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
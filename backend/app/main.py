@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -5,8 +6,17 @@ from fastapi.middleware.cors import CORSMiddleware
 import structlog
 
 from app.config import get_settings
+from app.core.clients import clients
 from app.core.database import engine, Base
+from app.core.redis import close_redis
 from app.api.v1.router import api_router
+from app.services.analytics.rollups import rollups_in_background
+from app.services.conversation.message_writer import message_writer
+from app.services.conversation.session_store import close_session_store
+from app.services.emotional.model import get_emotion_model
+from app.services.personaplex.prompts import CACHED_PHRASES
+from app.services.rag.ingest import ingest_in_background
+from app.services.voice.tts import prewarm_speech_cache
 
 logger = structlog.get_logger()
 
@@ -20,8 +30,26 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
 
     logger.info("database_initialized")
+    await message_writer.start()
+    await clients.warm_up()
+    if settings.emotion_engine == "model":
+        get_emotion_model()
+    background = []
+    if settings.tts_cache_prewarm and settings.openai_api_key:
+        formats = [f.strip() for f in settings.tts_cache_prewarm_formats.split(",") if f.strip()]
+        background.append(asyncio.create_task(prewarm_speech_cache(CACHED_PHRASES, formats)))
+    if settings.knowledge_ingest_on_startup and settings.openai_api_key:
+        background.append(asyncio.create_task(ingest_in_background()))
+    if settings.metrics_rollup_interval > 0:
+        background.append(asyncio.create_task(rollups_in_background()))
     yield
     logger.info("shutting_down_application")
+    for task in background:
+        task.cancel()
+    await message_writer.stop()
+    await clients.close()
+    await close_session_store()
+    await close_redis()
 
 
 def create_app() -> FastAPI:
@@ -1,4 +1,16 @@
 from app.models.debtor import Debtor
 from app.models.conversation import Conversation, ConversationMessage
+from app.models.knowledge import KnowledgeChunk
+from app.models.negotiation import NegotiationPlan
+from app.models.analytics import ConversationCounter, ConversationRollup, AnalyticsWatermark
 
-__all__ = ["Debtor", "Conversation", "ConversationMessage"]
+__all__ = [
+    "Debtor",
+    "Conversation",
+    "ConversationMessage",
+    "KnowledgeChunk",
+    "NegotiationPlan",
+    "ConversationCounter",
+    "ConversationRollup",
+    "AnalyticsWatermark",
+]
@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from sqlalchemy import String, Integer, BigInteger, SmallInteger, DateTime, event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.models import analytics_ddl
+
+
+class ConversationCounter(Base):
+    """
+    Running totals of the conversations table, maintained by triggers.
+
+    One row per (dimension, key, shard): dimension "all" (key ""),
+    "strategy" or "emotion" (key = the value). Each trigger call adds to a
+    random shard so concurrent updates do not queue on a single row;
+    readers sum the shards.
+    """
+
+    __tablename__ = "conversation_counters"
+
+    dimension: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    shard: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    total: Mapped[int] = mapped_column(BigInteger, default=0)
+    completed: Mapped[int] = mapped_column(BigInteger, default=0)
+    accepted: Mapped[int] = mapped_column(BigInteger, default=0)
+    # Completed conversations with a negotiation result, and those accepted.
+    completed_decided: Mapped[int] = mapped_column(BigInteger, default=0)
+    completed_accepted: Mapped[int] = mapped_column(BigInteger, default=0)
+    duration_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    duration_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ConversationRollup(Base):
+    """
+    Conversation totals per time bucket and slice.
+
+    Buckets are UTC hours and days of ``started_at``; rows are recomputed
+    for the buckets touched since the last refresh (see
+    ``app.services.analytics.rollups``).
+    """
+
+    __tablename__ = "conversation_rollups"
+
+    granularity: Mapped[str] = mapped_column(String(5), primary_key=True)  # hour, day
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    strategy: Mapped[str] = mapped_column(String(50), primary_key=True)
+    emotion: Mapped[str] = mapped_column(String(50), primary_key=True)
+    risk_profile: Mapped[str] = mapped_column(String(50), primary_key=True)
+    conversations: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    accepted: Mapped[int] = mapped_column(Integer, default=0)
+    duration_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    duration_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class AnalyticsWatermark(Base):
+    """How far (in ``conversations.updated_at``) each incremental job has read."""
+
+    __tablename__ = "analytics_watermarks"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    watermark: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+# create_all makes the table at startup on fresh databases: install what
+# the f1c3a5e7b920 migration would, or the summary would report zeros.
+def _install_counter_triggers(metadata, connection, tables=(), **kw) -> None:
+    # After every table, so conversations exists whatever the creation order.
+    if ConversationCounter.__table__ not in tables or connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(analytics_ddl.LOCK_CONVERSATIONS)
+    for statement in analytics_ddl.COUNTER_TRIGGERS_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(analytics_ddl.BACKFILL)
+
+
+event.listen(Base.metadata, "after_create", _install_counter_triggers)
@@ -0,0 +1,120 @@
+"""
+SQL behind the ``conversation_counters`` running totals.
+
+The single source of the functions, triggers and backfill: the
+f1c3a5e7b920 migration runs them, and so does create_all at startup when
+it makes the table (see ``app.models.analytics``). Plain strings, no
+imports, so migrations can use them.
+"""
+
+# Adds one change of a conversation (sign +1 / -1) to a counter shard.
+APPLY_FUNCTION = """
+CREATE OR REPLACE FUNCTION apply_conversation_counters(
+    p_shard smallint,
+    p_sign integer,
+    p_strategy text,
+    p_emotion text,
+    p_status text,
+    p_result text,
+    p_duration integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO conversation_counters AS c (
+        dimension, key, shard, total, completed, accepted,
+        completed_decided, completed_accepted, duration_sum, duration_count
+    )
+    SELECT
+        d.dimension, d.key, p_shard, p_sign,
+        CASE WHEN p_status = 'completed' THEN p_sign ELSE 0 END,
+        CASE WHEN p_result = 'accepted' THEN p_sign ELSE 0 END,
+        CASE WHEN p_status = 'completed' AND p_result IS NOT NULL THEN p_sign ELSE 0 END,
+        CASE WHEN p_status = 'completed' AND p_result = 'accepted' THEN p_sign ELSE 0 END,
+        p_sign * COALESCE(p_duration, 0),
+        CASE WHEN p_duration IS NOT NULL THEN p_sign ELSE 0 END
+    FROM (VALUES ('all', ''), ('strategy', p_strategy), ('emotion', p_emotion)) AS d(dimension, key)
+    WHERE d.key IS NOT NULL
+    ON CONFLICT (dimension, key, shard) DO UPDATE SET
+        total = c.total + EXCLUDED.total,
+        completed = c.completed + EXCLUDED.completed,
+        accepted = c.accepted + EXCLUDED.accepted,
+        completed_decided = c.completed_decided + EXCLUDED.completed_decided,
+        completed_accepted = c.completed_accepted + EXCLUDED.completed_accepted,
+        duration_sum = c.duration_sum + EXCLUDED.duration_sum,
+        duration_count = c.duration_count + EXCLUDED.duration_count;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION update_conversation_counters() RETURNS trigger AS $$
+DECLARE
+    shard smallint := floor(random() * 16);
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_conversation_counters(
+            shard, -1, OLD.strategy, OLD.emotional_state_detected,
+            OLD.status, OLD.negotiation_result, OLD.duration_seconds
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_conversation_counters(
+            shard, 1, NEW.strategy, NEW.emotional_state_detected,
+            NEW.status, NEW.negotiation_result, NEW.duration_seconds
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Idempotent: the functions are replaced and the triggers recreated.
+COUNTER_TRIGGERS_DDL = (
+    APPLY_FUNCTION,
+    TRIGGER_FUNCTION,
+    "DROP TRIGGER IF EXISTS conversations_counters_insert_delete ON conversations",
+    "CREATE TRIGGER conversations_counters_insert_delete "
+    "AFTER INSERT OR DELETE ON conversations "
+    "FOR EACH ROW EXECUTE FUNCTION update_conversation_counters()",
+    "DROP TRIGGER IF EXISTS conversations_counters_update ON conversations",
+    "CREATE TRIGGER conversations_counters_update "
+    "AFTER UPDATE OF strategy, emotional_state_detected, status, negotiation_result, "
+    "duration_seconds ON conversations "
+    "FOR EACH ROW WHEN ("
+    "OLD.strategy IS DISTINCT FROM NEW.strategy "
+    "OR OLD.emotional_state_detected IS DISTINCT FROM NEW.emotional_state_detected "
+    "OR OLD.status IS DISTINCT FROM NEW.status "
+    "OR OLD.negotiation_result IS DISTINCT FROM NEW.negotiation_result "
+    "OR OLD.duration_seconds IS DISTINCT FROM NEW.duration_seconds"
+    ") EXECUTE FUNCTION update_conversation_counters()",
+)
+
+BACKFILL = """
+INSERT INTO conversation_counters (
+    dimension, key, shard, total, completed, accepted,
+    completed_decided, completed_accepted, duration_sum, duration_count
+)
+SELECT
+    CASE
+        WHEN GROUPING(strategy) = 0 THEN 'strategy'
+        WHEN GROUPING(emotional_state_detected) = 0 THEN 'emotion'
+        ELSE 'all'
+    END,
+    COALESCE(strategy, emotional_state_detected, ''),
+    0,
+    count(*),
+    count(*) FILTER (WHERE status = 'completed'),
+    count(*) FILTER (WHERE negotiation_result = 'accepted'),
+    count(*) FILTER (WHERE status = 'completed' AND negotiation_result IS NOT NULL),
+    count(*) FILTER (WHERE status = 'completed' AND negotiation_result = 'accepted'),
+    COALESCE(sum(duration_seconds), 0),
+    count(duration_seconds)
+FROM conversations
+GROUP BY GROUPING SETS ((), (strategy), (emotional_state_detected))
+HAVING GROUPING(strategy) = 1 AND GROUPING(emotional_state_detected) = 1
+    OR GROUPING(strategy) = 0 AND strategy IS NOT NULL
+    OR GROUPING(emotional_state_detected) = 0 AND emotional_state_detected IS NOT NULL
+"""
+
+# Writers to conversations wait until the triggers exist and the backfill
+# is committed, so no change is counted twice or missed.
+LOCK_CONVERSATIONS = "LOCK TABLE conversations IN SHARE ROW EXCLUSIVE MODE"
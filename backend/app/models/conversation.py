@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Float, Integer, DateTime, Text, ForeignKey, func, JSON
+from sqlalchemy import (
+    String, Float, Integer, Boolean, DateTime, Text, ForeignKey, Index, func, false, JSON
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,6 +12,13 @@ from app.core.database import Base
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Keyset pagination of the conversation list, newest first, per filter;
+        # the first one also serves started_at range scans of the rollups.
+        Index("ix_conversations_started_at_id", "started_at", "id"),
+        Index("ix_conversations_status_started_at_id", "status", "started_at", "id"),
+        Index("ix_conversations_debtor_id_started_at_id", "debtor_id", "started_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -35,15 +44,23 @@ class Conversation(Base):
         DateTime(timezone=True), server_default=func.now()
     )
     ended_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )  # drives the incremental analytics rollups
 
     debtor: Mapped["Debtor"] = relationship(back_populates="conversations")
     messages: Mapped[list["ConversationMessage"]] = relationship(
-        back_populates="conversation", cascade="all, delete-orphan"
+        back_populates="conversation",
+        cascade="all, delete-orphan",
+        order_by="[ConversationMessage.sequence, ConversationMessage.timestamp]",
     )
 
 
 class ConversationMessage(Base):
     __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_id_sequence", "conversation_id", "sequence"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -51,10 +68,16 @@ class ConversationMessage(Base):
     conversation_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("conversations.id")
     )
+    sequence: Mapped[int | None] = mapped_column(
+        Integer
+    )  # per-conversation turn order; messages are written in batches
     role: Mapped[str] = mapped_column(String(20))  # agent, user, system
     content: Mapped[str] = mapped_column(Text)
     emotional_tone: Mapped[str | None] = mapped_column(String(50))
     confidence: Mapped[float | None] = mapped_column(Float)
+    truncated: Mapped[bool] = mapped_column(
+        Boolean, default=False, server_default=false()
+    )  # agent reply cut short by a barge-in
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
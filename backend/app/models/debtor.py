@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import String, Float, Integer, DateTime, Text, func
+from sqlalchemy import Index, String, Float, Integer, DateTime, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -10,11 +10,18 @@ from app.core.database import Base
 
 class Debtor(Base):
     __tablename__ = "debtors"
+    __table_args__ = (
+        # Keyset pagination of the debtor list, newest first.
+        Index("ix_debtors_created_at_id", "created_at", "id"),
+        Index("ix_debtors_risk_profile_created_at_id", "risk_profile", "created_at", "id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    external_id: Mapped[str | None] = mapped_column(String(100), index=True)
+    external_id: Mapped[str | None] = mapped_column(
+        String(100), unique=True, index=True
+    )  # bulk imports upsert on it
     name: Mapped[str] = mapped_column(String(200))
     original_amount: Mapped[float] = mapped_column(Float)
     negotiable_amount: Mapped[float] = mapped_column(Float)
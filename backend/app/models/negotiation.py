@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import String, Float, DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class NegotiationPlan(Base):
+    """Opening strategy and offer precomputed for a debtor by the portfolio planner."""
+
+    __tablename__ = "negotiation_plans"
+
+    debtor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("debtors.id", ondelete="CASCADE"), primary_key=True
+    )
+    strategy: Mapped[str] = mapped_column(String(50))
+    offer_amount: Mapped[float | None] = mapped_column(Float)
+    tone: Mapped[str] = mapped_column(String(50))
+    urgency_level: Mapped[str] = mapped_column(String(20), index=True)  # low, medium, high
+    planned_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
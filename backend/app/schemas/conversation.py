@@ -31,10 +31,12 @@ class ConversationResponse(BaseModel):
 class ConversationMessageResponse(BaseModel):
     id: uuid.UUID
     conversation_id: uuid.UUID
+    sequence: int | None
     role: str
     content: str
     emotional_tone: str | None
     confidence: float | None
+    truncated: bool = False
     timestamp: datetime
 
     model_config = {"from_attributes": True}
@@ -51,3 +53,30 @@ class MetricsSummary(BaseModel):
     acceptance_rate: float | None
     emotional_distribution: dict[str, int]
     strategy_effectiveness: dict[str, float]
+
+
+class TrendPoint(BaseModel):
+    bucket: datetime
+    key: str | None = None
+    conversations: int
+    completed: int
+    accepted: int
+    acceptance_rate: float | None
+    avg_duration_seconds: float | None
+
+
+class MetricsTrends(BaseModel):
+    granularity: str
+    group_by: str | None
+    points: list[TrendPoint]
+
+
+class RuntimeMetrics(BaseModel):
+    http_clients: dict[str, int | bool]
+    tts_cache: dict[str, dict[str, int]]
+    history: dict[str, int]
+    prompt_cache: dict[str, int | float]
+    rag_cache: dict[str, dict[str, int]]
+    retrieval: dict[str, int]
+    sessions: dict[str, int | str]
+    message_writer: dict[str, int]
@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field
 
 
 class DebtorCreate(BaseModel):
-    external_id: str | None = None
+    external_id: str | None = Field(default=None, max_length=100)
     name: str = Field(min_length=1, max_length=200)
     original_amount: float = Field(gt=0)
     negotiable_amount: float = Field(gt=0)
@@ -47,3 +47,21 @@ class DebtorResponse(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class DebtorImportError(BaseModel):
+    line: int
+    external_id: str | None = None
+    errors: list[str]
+
+
+class DebtorImportReport(BaseModel):
+    rows: int = 0
+    inserted: int = 0
+    updated: int = 0
+    superseded: int = 0  # rows replaced by a later row with the same external_id
+    invalid: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors: list[DebtorImportError] = []  # first max_errors invalid rows
@@ -0,0 +1,252 @@
+"""
+Time-bucketed conversation rollups.
+
+``conversation_rollups`` holds, per UTC hour and day of ``started_at`` and
+per (strategy, detected emotion, debtor risk profile), the number of
+conversations, completions, acceptances and the duration sum/count. The
+trends endpoint only reads these rows, so a year of daily points costs
+O(buckets x slices) whatever the number of conversations.
+
+The refresh is incremental. Conversations whose ``updated_at`` moved
+past the watermark mark their hour as dirty; only dirty hours are
+recomputed from ``conversations``, and their days from the hourly rows.
+The watermark trails ``now()`` by ``metrics_rollup_lag_seconds`` so rows
+written by transactions still in flight are picked up by a later
+refresh. Risk profiles are read when a bucket is recomputed, and deleted
+conversations are only removed by a rebuild.
+
+Usage (from backend/):
+    python -m app.services.analytics.rollups [--rebuild]
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.core.database import async_session, engine
+from app.models.analytics import AnalyticsWatermark, ConversationRollup
+from app.schemas.conversation import MetricsTrends, TrendPoint
+
+logger = structlog.get_logger()
+
+WATERMARK = "conversation_rollups"
+_ROLLUP_LOCK_KEY = 0x726F6C6C
+# Largest hourly range served by the trends endpoint.
+MAX_HOURLY_DAYS = 92
+
+_DIRTY_HOURS = text("""
+CREATE TEMP TABLE rollup_dirty_hours ON COMMIT DROP AS
+SELECT DISTINCT date_trunc('hour', started_at, 'UTC') AS bucket
+FROM conversations
+WHERE updated_at > :low AND updated_at <= :high
+""")
+
+_DELETE_HOURS = text("""
+DELETE FROM conversation_rollups
+WHERE granularity = 'hour' AND bucket IN (SELECT bucket FROM rollup_dirty_hours)
+""")
+
+_INSERT_HOURS = text("""
+INSERT INTO conversation_rollups (
+    granularity, bucket, strategy, emotion, risk_profile,
+    conversations, completed, accepted, duration_sum, duration_count
+)
+SELECT
+    'hour',
+    d.bucket,
+    COALESCE(c.strategy, 'unknown'),
+    COALESCE(c.emotional_state_detected, 'unknown'),
+    COALESCE(debtor.risk_profile, 'unknown'),
+    count(*),
+    count(*) FILTER (WHERE c.status = 'completed'),
+    count(*) FILTER (WHERE c.negotiation_result = 'accepted'),
+    COALESCE(sum(c.duration_seconds), 0),
+    count(c.duration_seconds)
+FROM rollup_dirty_hours d
+JOIN conversations c
+    ON c.started_at >= d.bucket AND c.started_at < d.bucket + interval '1 hour'
+JOIN debtors debtor ON debtor.id = c.debtor_id
+GROUP BY 2, 3, 4, 5
+""")
+
+_DELETE_DAYS = text("""
+DELETE FROM conversation_rollups
+WHERE granularity = 'day'
+    AND bucket IN (SELECT DISTINCT date_trunc('day', bucket, 'UTC') FROM rollup_dirty_hours)
+""")
+
+_INSERT_DAYS = text("""
+INSERT INTO conversation_rollups (
+    granularity, bucket, strategy, emotion, risk_profile,
+    conversations, completed, accepted, duration_sum, duration_count
+)
+SELECT
+    'day', d.bucket, r.strategy, r.emotion, r.risk_profile,
+    sum(r.conversations), sum(r.completed), sum(r.accepted),
+    sum(r.duration_sum), sum(r.duration_count)
+FROM (SELECT DISTINCT date_trunc('day', bucket, 'UTC') AS bucket FROM rollup_dirty_hours) d
+JOIN conversation_rollups r
+    ON r.granularity = 'hour'
+    AND r.bucket >= d.bucket AND r.bucket < d.bucket + interval '1 day'
+GROUP BY 2, 3, 4, 5
+""")
+
+_cache = TTLCache(get_settings().metrics_cache_ttl)
+
+
+async def refresh_rollups(rebuild: bool = False) -> int | None:
+    """
+    Recompute the rollups of the buckets touched since the last refresh.
+
+    Args:
+        rebuild: Drop every rollup and recompute all of history.
+
+    Returns:
+        Number of hourly buckets recomputed, or None if another process
+        holds the refresh lock.
+    """
+    settings = get_settings()
+    async with async_session() as db:
+        locked = await db.scalar(select(func.pg_try_advisory_xact_lock(_ROLLUP_LOCK_KEY)))
+        if not locked:
+            return None
+
+        high = await db.scalar(
+            text("SELECT now() - make_interval(secs => :lag)"),
+            {"lag": float(settings.metrics_rollup_lag_seconds)},
+        )
+        watermark = await db.get(AnalyticsWatermark, WATERMARK)
+        if rebuild:
+            await db.execute(text("DELETE FROM conversation_rollups"))
+        if rebuild or watermark is None:
+            low = datetime.min.replace(tzinfo=timezone.utc)
+        else:
+            low = watermark.watermark
+
+        await db.execute(_DIRTY_HOURS, {"low": low, "high": high})
+        hours = await db.scalar(text("SELECT count(*) FROM rollup_dirty_hours"))
+        if hours:
+            for statement in (_DELETE_HOURS, _INSERT_HOURS, _DELETE_DAYS, _INSERT_DAYS):
+                await db.execute(statement)
+
+        if watermark is None:
+            db.add(AnalyticsWatermark(name=WATERMARK, watermark=high))
+        else:
+            watermark.watermark = high
+        await db.commit()
+
+    if hours:
+        _cache.clear()
+    logger.info("conversation_rollups_refreshed", hours=hours, watermark=high.isoformat())
+    return hours
+
+
+async def rollups_in_background() -> None:
+    """Startup job: refresh periodically; never fails the application, only logs."""
+    interval = get_settings().metrics_rollup_interval
+    while True:
+        try:
+            await refresh_rollups()
+        except Exception as e:
+            logger.error("conversation_rollups_error", error=str(e))
+        await asyncio.sleep(interval)
+
+
+async def _query_trends(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    granularity: str,
+    group_by: str | None,
+    filters: dict[str, str],
+) -> MetricsTrends:
+    key = getattr(ConversationRollup, group_by) if group_by else None
+    stmt = select(
+        ConversationRollup.bucket,
+        *([key] if key is not None else []),
+        func.sum(ConversationRollup.conversations),
+        func.sum(ConversationRollup.completed),
+        func.sum(ConversationRollup.accepted),
+        func.sum(ConversationRollup.duration_sum),
+        func.sum(ConversationRollup.duration_count),
+    ).where(
+        ConversationRollup.granularity == granularity,
+        ConversationRollup.bucket >= start,
+        ConversationRollup.bucket < end,
+        *(getattr(ConversationRollup, name) == value for name, value in filters.items()),
+    )
+    group = [ConversationRollup.bucket, *([key] if key is not None else [])]
+    stmt = stmt.group_by(*group).order_by(*group)
+
+    points = []
+    for row in (await db.execute(stmt)).all():
+        bucket, *rest = row
+        slice_key = rest.pop(0) if key is not None else None
+        conversations, completed, accepted, duration_sum, duration_count = (
+            int(value or 0) for value in rest
+        )
+        points.append(TrendPoint(
+            bucket=bucket,
+            key=slice_key,
+            conversations=conversations,
+            completed=completed,
+            accepted=accepted,
+            acceptance_rate=accepted / completed if completed else None,
+            avg_duration_seconds=duration_sum / duration_count if duration_count else None,
+        ))
+    return MetricsTrends(granularity=granularity, group_by=group_by, points=points)
+
+
+async def get_trends(
+    db: AsyncSession,
+    start: datetime,
+    end: datetime,
+    granularity: str = "day",
+    group_by: str | None = None,
+    filters: dict[str, str] | None = None,
+) -> MetricsTrends:
+    """
+    Conversation totals per bucket, optionally split by one slice.
+
+    Args:
+        db: Session used on a cache miss.
+        start: First bucket (inclusive).
+        end: End of the range (exclusive).
+        granularity: "hour" or "day".
+        group_by: "strategy", "emotion" or "risk_profile" to get one point
+            per bucket and value; None for one point per bucket.
+        filters: Slice values the rows must have, e.g. {"risk_profile": "high"}.
+
+    Returns:
+        The points in bucket order.
+    """
+    filters = filters or {}
+    key = (start, end, granularity, group_by, tuple(sorted(filters.items())))
+    return await _cache.get_or_load(
+        key, lambda: _query_trends(db, start, end, granularity, group_by, filters)
+    )
+
+
+async def _main(rebuild: bool) -> int | None:
+    try:
+        return await refresh_rollups(rebuild=rebuild)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh the conversation rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute all of history")
+    args = parser.parse_args()
+    print(json.dumps({"hours": asyncio.run(_main(args.rebuild))}))
+
+
+if __name__ == "__main__":
+    main()
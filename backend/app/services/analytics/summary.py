@@ -0,0 +1,196 @@
+"""
+All-time conversation metrics for the dashboard.
+
+Two sources produce the same per-dimension totals:
+
+- ``conversation_counters``: running totals maintained by triggers on
+  ``conversations`` (see the f1c3a5e7b920 migration). Reading them costs a
+  few dozen rows whatever the size of the history.
+- a single scan of ``conversations`` computing every total with
+  ``FILTER`` clauses and ``GROUPING SETS`` (overall, per strategy, per
+  emotion) in one pass. Used with ``metrics_summary_source = "scan"``,
+  while the counter triggers are missing (a database initialized by
+  create_all before they were installed there, until the migration
+  runs), and to check or rebuild the counters.
+
+The endpoint result is memoized for ``metrics_cache_ttl`` seconds.
+
+Usage (from backend/):
+    python -m app.services.analytics.summary [--rebuild]
+"""
+
+import argparse
+import asyncio
+import json
+from collections.abc import Sequence
+
+import structlog
+from sqlalchemy import case, delete, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.core.database import async_session, engine
+from app.models.analytics import ConversationCounter
+from app.models.conversation import Conversation
+from app.schemas.conversation import MetricsSummary
+
+logger = structlog.get_logger()
+
+_COUNTERS = (
+    "total",
+    "completed",
+    "accepted",
+    "completed_decided",
+    "completed_accepted",
+    "duration_sum",
+    "duration_count",
+)
+
+_cache = TTLCache(get_settings().metrics_cache_ttl)
+_triggers_installed = False
+_missing_logged = False
+
+_TRIGGERS_EXIST = text(
+    "SELECT count(*) = 2 FROM pg_trigger WHERE tgname IN "
+    "('conversations_counters_insert_delete', 'conversations_counters_update')"
+)
+
+
+def _scan_query():
+    completed = Conversation.status == "completed"
+    accepted = Conversation.negotiation_result == "accepted"
+    strategy_set = func.grouping(Conversation.strategy) == 0
+    emotion_set = func.grouping(Conversation.emotional_state_detected) == 0
+    return (
+        select(
+            case((strategy_set, "strategy"), (emotion_set, "emotion"), else_="all"),
+            func.coalesce(Conversation.strategy, Conversation.emotional_state_detected, ""),
+            func.count(),
+            func.count().filter(completed),
+            func.count().filter(accepted),
+            func.count().filter(completed, Conversation.negotiation_result.is_not(None)),
+            func.count().filter(completed, accepted),
+            func.coalesce(func.sum(Conversation.duration_seconds), 0),
+            func.count(Conversation.duration_seconds),
+        )
+        .group_by(text("GROUPING SETS ((), (strategy), (emotional_state_detected))"))
+        .having(
+            (~strategy_set & ~emotion_set)
+            | (strategy_set & Conversation.strategy.is_not(None))
+            | (emotion_set & Conversation.emotional_state_detected.is_not(None))
+        )
+    )
+
+
+def _counters_query():
+    return select(
+        ConversationCounter.dimension,
+        ConversationCounter.key,
+        *(func.sum(getattr(ConversationCounter, name)) for name in _COUNTERS),
+    ).group_by(ConversationCounter.dimension, ConversationCounter.key)
+
+
+def build_summary(rows: Sequence[Sequence]) -> MetricsSummary:
+    """MetricsSummary from (dimension, key, *counters) rows of either source."""
+    overall = dict.fromkeys(_COUNTERS, 0)
+    emotional_distribution: dict[str, int] = {}
+    strategy_effectiveness: dict[str, float] = {}
+    for dimension, key, *values in rows:
+        counters = dict(zip(_COUNTERS, (int(value or 0) for value in values)))
+        if dimension == "all":
+            overall = counters
+        elif dimension == "emotion" and counters["total"] > 0:
+            emotional_distribution[key] = counters["total"]
+        elif dimension == "strategy" and counters["completed"] > 0:
+            decided = counters["completed_decided"]
+            strategy_effectiveness[key] = (
+                counters["completed_accepted"] / decided if decided else 0.0
+            )
+
+    completed = overall["completed"]
+    return MetricsSummary(
+        total_conversations=overall["total"],
+        completed_conversations=completed,
+        avg_duration_seconds=overall["duration_sum"] / overall["duration_count"]
+        if overall["duration_count"]
+        else None,
+        acceptance_rate=overall["accepted"] / completed if completed else None,
+        emotional_distribution=emotional_distribution,
+        strategy_effectiveness=strategy_effectiveness,
+    )
+
+
+async def summary_from_counters(db: AsyncSession) -> MetricsSummary:
+    return build_summary((await db.execute(_counters_query())).all())
+
+
+async def summary_from_scan(db: AsyncSession) -> MetricsSummary:
+    return build_summary((await db.execute(_scan_query())).all())
+
+
+async def counters_available(db: AsyncSession) -> bool:
+    """Whether the triggers maintaining the counters exist; checked until they do."""
+    global _triggers_installed, _missing_logged
+    if not _triggers_installed:
+        _triggers_installed = bool(await db.scalar(_TRIGGERS_EXIST))
+        if not _triggers_installed and not _missing_logged:
+            _missing_logged = True
+            logger.warning("conversation_counters_not_installed", fallback="scan")
+    return _triggers_installed
+
+
+async def get_summary(db: AsyncSession) -> MetricsSummary:
+    """The dashboard summary from the configured source, memoized briefly."""
+    if get_settings().metrics_summary_source == "scan" or not await counters_available(db):
+        return await _cache.get_or_load("scan", lambda: summary_from_scan(db))
+    return await _cache.get_or_load("counters", lambda: summary_from_counters(db))
+
+
+async def rebuild_counters(db: AsyncSession) -> None:
+    """
+    Recompute the counters from a scan of conversations.
+
+    Writers to conversations wait for the caller's transaction, so the
+    triggers and the rebuild never count the same change twice.
+    """
+    await db.execute(text("LOCK TABLE conversations IN SHARE ROW EXCLUSIVE MODE"))
+    await db.execute(delete(ConversationCounter))
+    scan = _scan_query().subquery()
+    columns = list(scan.c)
+    await db.execute(
+        insert(ConversationCounter).from_select(
+            ["dimension", "key", "shard", *_COUNTERS],
+            select(columns[0], columns[1], literal(0), *columns[2:]),
+        )
+    )
+    _cache.clear()
+
+
+async def _main(rebuild: bool) -> dict:
+    try:
+        async with async_session() as db:
+            if rebuild:
+                await rebuild_counters(db)
+                await db.commit()
+                logger.info("conversation_counters_rebuilt")
+            counters = await summary_from_counters(db)
+            scan = await summary_from_scan(db)
+        return {
+            "consistent": counters == scan,
+            "counters": counters.model_dump(),
+            "scan": scan.model_dump(),
+        }
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check the conversation counters against a scan.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the counters first")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(_main(args.rebuild)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Bulk export of conversations with their transcripts.
+
+Conversations and their messages are read in one ordered query through a
+server-side cursor (``yield_per``) as plain rows, no ORM objects, and
+regrouped on the fly. Rows come in (started_at, id) order, so Postgres can
+walk the (started_at, id) index and add each conversation's messages
+through the (conversation_id, sequence) index without sorting the export.
+Only the conversation being assembled is held in memory, so memory stays
+flat whatever the size of the export.
+
+Formats:
+
+- NDJSON: one conversation per line with its ``messages`` nested, the
+  shape of ``GET /conversations/{id}``. Served as a chunked HTTP response
+  by ``GET /conversations/export``.
+- Parquet (CLI only, requires ``pyarrow``): ``conversations.parquet`` and
+  ``messages.parquet`` in an output directory, written one row group at
+  a time.
+
+Usage (from backend/):
+    python -m app.services.conversation.export [--format ndjson|parquet]
+        [--output PATH] [--since ISO] [--until ISO] [--status completed]
+        [--strategy firm] [--row-group-size 100000]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.core.database import async_session, engine
+from app.models.conversation import Conversation, ConversationMessage
+
+FORMATS = ("ndjson", "parquet")
+DEFAULT_ROW_GROUP_SIZE = 100_000
+# NDJSON lines are sent in blocks of about this size.
+_FLUSH_BYTES = 64 * 1024
+
+_CONVERSATION_COLUMNS = (
+    Conversation.id,
+    Conversation.debtor_id,
+    Conversation.status,
+    Conversation.strategy,
+    Conversation.emotional_state_detected,
+    Conversation.negotiation_result,
+    Conversation.offered_amount,
+    Conversation.accepted_amount,
+    Conversation.duration_seconds,
+    Conversation.started_at,
+    Conversation.ended_at,
+)
+_MESSAGE_COLUMNS = (
+    ConversationMessage.id,
+    ConversationMessage.sequence,
+    ConversationMessage.role,
+    ConversationMessage.content,
+    ConversationMessage.emotional_tone,
+    ConversationMessage.confidence,
+    ConversationMessage.truncated,
+    ConversationMessage.timestamp,
+)
+CONVERSATION_FIELDS = tuple(column.key for column in _CONVERSATION_COLUMNS)
+MESSAGE_FIELDS = tuple(column.key for column in _MESSAGE_COLUMNS)
+
+
+class ExportError(Exception):
+    pass
+
+
+@dataclass
+class ExportReport:
+    conversations: int = 0
+    messages: int = 0
+    seconds: float = 0.0
+
+
+async def stream_transcripts(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: str | None = None,
+    strategy: str | None = None,
+    rows_per_fetch: int = 5_000,
+) -> AsyncIterator[tuple[Sequence, list[Sequence]]]:
+    """
+    (conversation row, message rows) pairs in started_at order.
+
+    Args:
+        since: Only conversations started at or after this time.
+        until: Only conversations started before this time.
+        status: Only conversations with this status.
+        strategy: Only conversations with this strategy.
+        rows_per_fetch: Rows fetched per round trip of the server-side cursor.
+    """
+    stmt = (
+        select(*_CONVERSATION_COLUMNS, *_MESSAGE_COLUMNS)
+        .outerjoin(ConversationMessage, ConversationMessage.conversation_id == Conversation.id)
+        .order_by(
+            Conversation.started_at,
+            Conversation.id,
+            ConversationMessage.sequence.nulls_last(),
+            ConversationMessage.timestamp,
+        )
+        .execution_options(yield_per=rows_per_fetch)
+    )
+    if since is not None:
+        stmt = stmt.where(Conversation.started_at >= since)
+    if until is not None:
+        stmt = stmt.where(Conversation.started_at < until)
+    if status is not None:
+        stmt = stmt.where(Conversation.status == status)
+    if strategy is not None:
+        stmt = stmt.where(Conversation.strategy == strategy)
+
+    width = len(_CONVERSATION_COLUMNS)
+    current: Sequence | None = None
+    messages: list[Sequence] = []
+    async with async_session() as db:
+        result = await db.stream(stmt)
+        async for row in result:
+            if current is None or current[0] != row[0]:
+                if current is not None:
+                    yield current, messages
+                current, messages = row[:width], []
+            if row[width] is not None:  # no messages: one row with NULL message columns
+                messages.append(row[width:])
+    if current is not None:
+        yield current, messages
+
+
+def _json_default(value: object) -> str:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def transcript_line(conversation: Sequence, messages: list[Sequence]) -> str:
+    """One NDJSON line: the conversation with its messages nested."""
+    record = dict(zip(CONVERSATION_FIELDS, conversation))
+    record["messages"] = [dict(zip(MESSAGE_FIELDS, message)) for message in messages]
+    return json.dumps(record, ensure_ascii=False, default=_json_default) + "\n"
+
+
+async def iter_ndjson(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: str | None = None,
+    strategy: str | None = None,
+    report: ExportReport | None = None,
+) -> AsyncIterator[bytes]:
+    """NDJSON export in blocks of about 64 KiB, for a chunked response or a file."""
+    report = report if report is not None else ExportReport()
+    buffer: list[str] = []
+    size = 0
+    async for conversation, messages in stream_transcripts(since, until, status, strategy):
+        line = transcript_line(conversation, messages)
+        buffer.append(line)
+        size += len(line)
+        report.conversations += 1
+        report.messages += len(messages)
+        if size >= _FLUSH_BYTES:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+class _ParquetFile:
+    """Column buffers flushed to a ParquetWriter one row group at a time."""
+
+    def __init__(self, pa, pq, path: Path, schema, row_group_size: int):
+        self._pa = pa
+        self._schema = schema
+        self._row_group_size = row_group_size
+        self._writer = pq.ParquetWriter(path, schema, compression="zstd")
+        self._columns: list[list] = [[] for _ in schema.names]
+        self._rows = 0
+
+    def append(self, values: Sequence) -> None:
+        for column, value in zip(self._columns, values):
+            column.append(str(value) if isinstance(value, uuid.UUID) else value)
+        self._rows += 1
+        if self._rows >= self._row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._rows:
+            batch = self._pa.RecordBatch.from_arrays(
+                [
+                    self._pa.array(column, type=field.type)
+                    for column, field in zip(self._columns, self._schema)
+                ],
+                schema=self._schema,
+            )
+            self._writer.write_batch(batch, row_group_size=self._rows)
+            self._columns = [[] for _ in self._schema.names]
+            self._rows = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+
+def _parquet_schemas(pa):
+    timestamp = pa.timestamp("us", tz="UTC")
+    conversations = pa.schema([
+        ("id", pa.string()),
+        ("debtor_id", pa.string()),
+        ("status", pa.string()),
+        ("strategy", pa.string()),
+        ("emotional_state_detected", pa.string()),
+        ("negotiation_result", pa.string()),
+        ("offered_amount", pa.float64()),
+        ("accepted_amount", pa.float64()),
+        ("duration_seconds", pa.int32()),
+        ("started_at", timestamp),
+        ("ended_at", timestamp),
+    ])
+    messages = pa.schema([
+        ("conversation_id", pa.string()),
+        ("id", pa.string()),
+        ("sequence", pa.int32()),
+        ("role", pa.string()),
+        ("content", pa.string()),
+        ("emotional_tone", pa.string()),
+        ("confidence", pa.float64()),
+        ("truncated", pa.bool_()),
+        ("timestamp", timestamp),
+    ])
+    return conversations, messages
+
+
+async def export_parquet(
+    directory: Path,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status: str | None = None,
+    strategy: str | None = None,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> ExportReport:
+    """
+    Write conversations.parquet and messages.parquet into a directory.
+
+    Messages reference their conversation through conversation_id. A row
+    group is written every row_group_size rows of each file.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportError("Parquet export requires the 'pyarrow' package") from e
+
+    directory.mkdir(parents=True, exist_ok=True)
+    conversation_schema, message_schema = _parquet_schemas(pa)
+    report = ExportReport()
+    conversations = _ParquetFile(
+        pa, pq, directory / "conversations.parquet", conversation_schema, row_group_size
+    )
+    messages = _ParquetFile(
+        pa, pq, directory / "messages.parquet", message_schema, row_group_size
+    )
+    try:
+        async for conversation, rows in stream_transcripts(since, until, status, strategy):
+            conversations.append(conversation)
+            for message in rows:
+                messages.append((conversation[0], *message))
+            report.conversations += 1
+            report.messages += len(rows)
+    finally:
+        conversations.close()
+        messages.close()
+    return report
+
+
+async def _main(args: argparse.Namespace) -> ExportReport:
+    filters = {
+        "since": args.since,
+        "until": args.until,
+        "status": args.status,
+        "strategy": args.strategy,
+    }
+    started = time.perf_counter()
+    try:
+        if args.format == "parquet":
+            report = await export_parquet(
+                Path(args.output), row_group_size=args.row_group_size, **filters
+            )
+        else:
+            report = ExportReport()
+            sink = open(args.output, "wb") if args.output else sys.stdout.buffer
+            try:
+                async for block in iter_ndjson(report=report, **filters):
+                    sink.write(block)
+            finally:
+                if sink is not sys.stdout.buffer:
+                    sink.close()
+    finally:
+        await engine.dispose()
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export conversations with their transcripts.")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument(
+        "--output", help="NDJSON file (default: stdout) or Parquet directory (required)"
+    )
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Started at or after")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Started before")
+    parser.add_argument("--status")
+    parser.add_argument("--strategy")
+    parser.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    args = parser.parse_args()
+    if args.format == "parquet" and not args.output:
+        parser.error("--output is required for Parquet")
+
+    report = asyncio.run(_main(args))
+    # stdout may carry the export itself.
+    print(json.dumps(asdict(report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
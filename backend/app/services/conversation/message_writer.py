@@ -0,0 +1,181 @@
+"""
+Write-behind persistence for conversation messages.
+
+Live turns enqueue their messages here instead of opening a session and
+committing on the critical path. A single background task per process
+drains the queue and inserts everything pending, across all live calls,
+with one multi-row INSERT per batch.
+
+A batch still failing after ``max_retries`` attempts is split, first per
+conversation and then per message, each part tried once, so a bad row
+(e.g. a foreign key violation) only costs its own message, not the turns
+of every other call in the batch. Dropped messages are counted apart
+from the written ones, reported by ``stats()`` and returned by
+``flush()``, so a caller waiting for its messages learns they were lost.
+"""
+
+import asyncio
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import insert
+
+from app.core.database import async_session
+from app.models.conversation import ConversationMessage
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class PendingMessage:
+    conversation_id: uuid.UUID
+    sequence: int
+    role: str
+    content: str
+    emotional_tone: str | None = None
+    confidence: float | None = None
+    truncated: bool = False
+    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class MessageWriter:
+    """
+    Per-process write-behind queue.
+
+    Messages carry their per-conversation sequence number, so the order in
+    which batches reach the database does not matter for reading them back.
+    """
+
+    def __init__(self, batch_size: int = 500, max_retries: int = 3):
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue[PendingMessage] | None = None
+        self._task: asyncio.Task | None = None
+        self._written = asyncio.Condition()
+        self._enqueued_count = 0
+        # Messages processed (written or dropped), and those dropped.
+        self._done_count = 0
+        self._dropped_count = 0
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still pending and stop the background task."""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        stats = self.stats()
+        if stats["dropped"]:
+            logger.error("message_writer_stopped", **stats)
+        else:
+            logger.info("message_writer_stopped", **stats)
+
+    def enqueue(self, message: PendingMessage) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._queue.put_nowait(message)
+        self._enqueued_count += 1
+
+    async def flush(self) -> int:
+        """
+        Wait until every message enqueued before this call is processed.
+
+        Returns:
+            Messages dropped while waiting, after exhausting their retries;
+            0 when everything was written.
+        """
+        target = self._enqueued_count
+        dropped = self._dropped_count
+        async with self._written:
+            await self._written.wait_for(lambda: self._done_count >= target)
+        return self._dropped_count - dropped
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "enqueued": self._enqueued_count,
+            "written": self._done_count - self._dropped_count,
+            "dropped": self._dropped_count,
+            "pending": self._enqueued_count - self._done_count,
+        }
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            dropped = await self._write(batch, self.max_retries)
+
+            async with self._written:
+                self._done_count += len(batch)
+                self._dropped_count += dropped
+                self._written.notify_all()
+
+    async def _write(self, batch: list[PendingMessage], attempts: int) -> int:
+        """
+        Insert a batch, isolating the rows that keep failing.
+
+        Returns:
+            Messages dropped.
+        """
+        if await self._insert(batch, attempts):
+            return 0
+        if len(batch) == 1:
+            message = batch[0]
+            logger.error(
+                "message_dropped",
+                conversation_id=str(message.conversation_id),
+                sequence=message.sequence,
+            )
+            return 1
+
+        by_conversation: dict[uuid.UUID, list[PendingMessage]] = defaultdict(list)
+        for message in batch:
+            by_conversation[message.conversation_id].append(message)
+        parts = (
+            list(by_conversation.values())
+            if len(by_conversation) > 1
+            else [[message] for message in batch]
+        )
+        # Transient errors were retried on the whole batch: parts get one try.
+        dropped = 0
+        for part in parts:
+            dropped += await self._write(part, attempts=1)
+        return dropped
+
+    async def _insert(self, batch: list[PendingMessage], attempts: int) -> bool:
+        rows = [asdict(message) for message in batch]
+        for attempt in range(1, attempts + 1):
+            try:
+                async with async_session() as db:
+                    await db.execute(insert(ConversationMessage), rows)
+                    await db.commit()
+                return True
+            except Exception as e:
+                logger.error(
+                    "message_write_error",
+                    error=str(e),
+                    batch_size=len(rows),
+                    attempt=attempt,
+                )
+                if attempt < attempts:
+                    await asyncio.sleep(0.1 * 2**attempt)
+        return False
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,627 @@
+"""
+Turn scheduler for live voice conversations.
+
+Runs the per-turn stages (STT, emotion classification, LLM, TTS) so that
+independent work overlaps: transcription of the next utterance starts as
+soon as it is endpointed, even while the previous reply is still being
+spoken; the emotion classifier and the knowledge base search run
+alongside the transcript echo, the search under a hard deadline so a slow
+retrieval only costs the turn its grounding, never its reply; TTS starts
+as soon as text exists; and messages are persisted through the
+write-behind MessageWriter instead of a DB round trip per turn.
+
+When the caller talks over the agent (barge-in), the reply in flight is
+cancelled and the client is told to stop playing the audio it buffered.
+A reply is recorded once its playback is over, or at barge-in cut to what
+the caller heard, marked as truncated.
+
+After every turn the session (persona config, compact history, next
+sequence) is saved to the session store, so a reconnect resumes it on
+any worker.
+"""
+
+import asyncio
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import structlog
+from fastapi import WebSocket
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+
+from app.config import get_settings
+from app.core.database import async_session
+from app.models.conversation import Conversation, ConversationMessage
+from app.services.conversation.message_writer import PendingMessage, message_writer
+from app.services.conversation.session_store import get_session_store
+from app.services.emotional.classifier import predict_emotion
+from app.services.personaplex.client import PersonaPlexClient
+from app.services.personaplex.history import ConversationHistory
+from app.services.personaplex.prompts import AI_DISCLOSURE_OPENING, INTERRUPTED_MARKER
+from app.services.rag.knowledge_base import get_knowledge_base
+from app.services.voice.playback import PlaybackTracker
+from app.services.voice.segmenter import SentenceSegmenter
+from app.services.voice.stt import transcribe_audio
+from app.services.voice.tts import speech_segments, synthesize_speech, stream_speech
+
+logger = structlog.get_logger()
+
+_personaplex = PersonaPlexClient()
+
+# A reply is recorded in full this long after its estimated playback end.
+_PLAYBACK_GRACE_SECONDS = 1.0
+
+
+class ConversationNotFoundError(LookupError):
+    pass
+
+
+@dataclass
+class ConversationSession:
+    conversation_id: uuid.UUID
+    persona_config: dict | None = None
+    history: ConversationHistory = field(default_factory=ConversationHistory.from_settings)
+    next_sequence: int = 0
+
+    def take_sequence(self) -> int:
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        return sequence
+
+    def snapshot(self) -> dict:
+        """State saved to the session store."""
+        return {
+            "persona_config": self.persona_config,
+            "next_sequence": self.next_sequence,
+            "history": self.history.snapshot(),
+        }
+
+
+async def load_session(conversation_id: uuid.UUID) -> ConversationSession:
+    """
+    Resume the session from the session store, or load the conversation
+    context (debtor info + strategy) from the DB.
+
+    The next sequence is the highest of the stored one and the DB's: a
+    worker may have persisted messages of a turn it never saved.
+
+    Raises:
+        ConversationNotFoundError: If the conversation does not exist; its
+            messages could never be written.
+    """
+    state = await get_session_store().load(str(conversation_id))
+    conv = None
+    async with async_session() as db:
+        if state is None:
+            result = await db.execute(
+                select(Conversation)
+                .where(Conversation.id == conversation_id)
+                .options(selectinload(Conversation.debtor))
+            )
+            conv = result.scalar_one_or_none()
+            exists = conv is not None
+        else:
+            exists = await db.scalar(
+                select(Conversation.id).where(Conversation.id == conversation_id)
+            ) is not None
+        if not exists:
+            raise ConversationNotFoundError(f"conversation {conversation_id} not found")
+        last_sequence = await db.scalar(
+            select(func.max(ConversationMessage.sequence)).where(
+                ConversationMessage.conversation_id == conversation_id
+            )
+        )
+
+    session = ConversationSession(
+        conversation_id=conversation_id,
+        next_sequence=last_sequence + 1 if last_sequence is not None else 0,
+    )
+    if state is not None:
+        session.persona_config = state["persona_config"]
+        session.next_sequence = max(session.next_sequence, state["next_sequence"])
+        session.history.restore(state["history"])
+        logger.info(
+            "conversation_session_resumed",
+            conversation_id=str(conversation_id),
+            messages=len(session.history),
+        )
+    else:
+        session.persona_config = {"strategy": conv.strategy}
+        if conv.debtor:
+            session.persona_config.update(
+                original_amount=conv.debtor.original_amount,
+                negotiable_amount=conv.debtor.negotiable_amount,
+                days_past_due=conv.debtor.days_past_due,
+            )
+    return session
+
+
+@dataclass
+class _Segment:
+    text: str
+    chunks: asyncio.Queue
+    task: asyncio.Task
+
+
+@dataclass
+class _Reply:
+    """A reply sent to the client, recorded once the caller has heard it."""
+
+    playback: PlaybackTracker
+    # None when the reply was cancelled before it was complete.
+    text: str | None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class TurnPipeline:
+    """
+    Per-connection turn scheduler.
+
+    Utterances are submitted as they are endpointed; their transcription
+    starts immediately and the turns are answered one at a time, in order.
+    barge_in() stops the agent's audio when the caller starts speaking
+    over it. The client may report its playback position with
+    report_playback() so the recorded reply matches what was heard.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        session: ConversationSession,
+        output_codec: str = "mp3",
+    ):
+        self.websocket = websocket
+        self.session = session
+        self.output_codec = output_codec
+        self.settings = get_settings()
+        # STT tasks of the submitted utterances; None stands for the greeting.
+        self._turns: asyncio.Queue[asyncio.Task | None] = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        self._current: asyncio.Task | None = None
+        self._reply_ids = itertools.count()
+        # Playback of the reply in flight, then of the reply awaiting the
+        # end of its playback to be recorded.
+        self._playback: PlaybackTracker | None = None
+        self._reply: _Reply | None = None
+        self._reply_timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def greet(self) -> None:
+        """
+        Open a new call with the AI disclosure, from the pre-warmed TTS cache.
+
+        Call before submitting utterances: the greeting is the first turn,
+        answered and barged in on like any reply.
+        """
+        self._start_worker()
+        self._turns.put_nowait(None)
+
+    def submit(self, utterance: bytes) -> None:
+        """Schedule an utterance; its STT request is started right away."""
+        self._start_worker()
+        self._turns.put_nowait(asyncio.create_task(transcribe_audio(utterance)))
+
+    def _start_worker(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    def barge_in(self) -> bool:
+        """
+        Stop the agent's audio because the caller started speaking.
+
+        The client is always told to stop playback: audio is sent faster
+        than real time, so a reply whose task has finished is usually still
+        playing. A reply in flight is cancelled, and the reply is recorded
+        up to what the caller heard.
+
+        Returns:
+            True if a reply was cancelled or cut short.
+        """
+        if self._current is not None and not self._current.done():
+            if self._playback is not None:
+                self._playback.stop()
+            # The worker tells the client to stop once no more audio is sent.
+            self._current.cancel()
+            return True
+        self._spawn(self._stop_playback())
+        reply = self._reply
+        if reply is None:
+            return False
+        reply.playback.stop()
+        self._finish_reply(interrupted=True)
+        return True
+
+    def report_playback(self, event: dict) -> None:
+        """
+        Playback position reported by the client.
+
+        Args:
+            event: ``{"type": "playback", "reply": id, "segment": index,
+                "position_ms": ms}``, ``reply`` and ``segment`` as announced
+                in the ``audio_segment`` message sent before each segment.
+        """
+        reply = self._reply
+        for playback in (self._playback, reply.playback if reply is not None else None):
+            if playback is not None and playback.reply_id == event.get("reply"):
+                try:
+                    playback.report(int(event["segment"]), float(event["position_ms"]) / 1000)
+                except (KeyError, TypeError, ValueError):
+                    logger.debug("playback_report_invalid", event=event)
+                return
+
+    async def close(self, trailing: bytes | None = None) -> None:
+        """
+        Cancel outstanding work, save the session and flush this call's messages to the DB.
+
+        Args:
+            trailing: Utterance the caller was speaking when the socket
+                closed; it is transcribed and recorded, not answered.
+        """
+        # cancel() only schedules the cancellation: wait for the reply in
+        # flight to record what was heard before the session is saved.
+        tasks = [task for task in (self._current, self._worker) if task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+        while not self._turns.empty():
+            stt_task = self._turns.get_nowait()
+            if stt_task is not None:
+                stt_task.cancel()
+        # The caller hung up: keep what they heard of the last reply.
+        if self._reply is not None:
+            self._reply.playback.stop()
+        self._finish_reply(interrupted=True)
+        if trailing:
+            await self._record_trailing(trailing)
+        await self.save_session()
+        await self.session.history.close()
+        logger.info(
+            "conversation_history_stats",
+            conversation_id=str(self.session.conversation_id),
+            **self.session.history.stats(),
+        )
+        dropped = await message_writer.flush()
+        if dropped:
+            # The writer is shared: the lost messages may be other calls' too.
+            logger.error(
+                "messages_dropped_during_close",
+                conversation_id=str(self.session.conversation_id),
+                dropped=dropped,
+            )
+
+    async def _record_trailing(self, utterance: bytes) -> None:
+        transcript = await transcribe_audio(utterance)
+        if not transcript:
+            return
+        session = self.session
+        self._save_user_message(session.take_sequence(), transcript)
+        session.history.add("user", transcript)
+        logger.info(
+            "trailing_utterance_recorded",
+            conversation_id=str(session.conversation_id),
+            chars=len(transcript),
+        )
+
+    async def _run(self) -> None:
+        while True:
+            stt_task = await self._turns.get()
+            try:
+                if stt_task is None:
+                    reply = self._greet()
+                else:
+                    transcript = await stt_task
+                    if not transcript:
+                        continue
+                    reply = self._respond(transcript)
+                self._current = asyncio.create_task(reply)
+                try:
+                    await asyncio.shield(self._current)
+                except asyncio.CancelledError:
+                    if not self._current.cancelled():
+                        # The worker itself is being cancelled (disconnect).
+                        self._current.cancel()
+                        raise
+                    await self._stop_playback()
+                await self.save_session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    "turn_error",
+                    conversation_id=str(self.session.conversation_id),
+                    error=str(e),
+                )
+            finally:
+                self._current = None
+
+    async def save_session(self) -> None:
+        await get_session_store().save(
+            str(self.session.conversation_id), self.session.snapshot()
+        )
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _stop_playback(self) -> None:
+        try:
+            await self._send_json({"type": "barge_in"})
+        except Exception as e:
+            # The socket is closing; the receive loop ends the call.
+            logger.debug("barge_in_send_error", error=str(e))
+
+    def _hold_reply(self, reply: _Reply) -> None:
+        """Record the reply when its playback ends, unless the caller barges in first."""
+        self._reply = reply
+        delay = max(reply.playback.ends_at() - time.monotonic(), 0.0) + _PLAYBACK_GRACE_SECONDS
+        self._reply_timer = asyncio.get_running_loop().call_later(delay, self._on_playback_end)
+
+    def _on_playback_end(self) -> None:
+        self._reply_timer = None
+        if self._finish_reply(interrupted=False):
+            self._spawn(self.save_session())
+
+    def _finish_reply(self, interrupted: bool) -> bool:
+        """
+        Add the held reply to the history and the write-behind queue.
+
+        Args:
+            interrupted: Keep only what the caller heard, marked as
+                truncated, unless all of it was played.
+
+        Returns:
+            True if a reply was recorded.
+        """
+        reply, self._reply = self._reply, None
+        if self._reply_timer is not None:
+            self._reply_timer.cancel()
+            self._reply_timer = None
+        if reply is None:
+            return False
+
+        session = self.session
+        heard, complete = reply.playback.heard()
+        truncated = reply.text is None or (interrupted and not complete)
+        content = heard if truncated else reply.text
+        if truncated:
+            logger.info(
+                "turn_barge_in",
+                conversation_id=str(session.conversation_id),
+                heard_chars=len(heard),
+                sent_chars=sum(len(segment.text) for segment in reply.playback.segments),
+            )
+        if not content:
+            return False
+        session.history.add("assistant", f"{content} {INTERRUPTED_MARKER}" if truncated else content)
+        message_writer.enqueue(PendingMessage(
+            conversation_id=session.conversation_id,
+            sequence=session.take_sequence(),
+            role="agent",
+            content=content,
+            truncated=truncated,
+            timestamp=reply.created_at,
+        ))
+        return True
+
+    async def _greet(self) -> None:
+        self._finish_reply(interrupted=False)
+        playback = self._playback = PlaybackTracker(next(self._reply_ids), self.output_codec)
+        segments = [self._start_segment(text) for text in speech_segments(AI_DISCLOSURE_OPENING)]
+        try:
+            for segment in segments:
+                await self._play_segment(segment, playback)
+            await self._send_json(
+                {"type": "transcription", "role": "agent", "content": AI_DISCLOSURE_OPENING}
+            )
+        except asyncio.CancelledError:
+            self._playback = None
+            self._reply = _Reply(playback, None)
+            self._finish_reply(interrupted=True)
+            raise
+        finally:
+            for segment in segments:
+                segment.task.cancel()
+        self._playback = None
+        self._hold_reply(_Reply(playback, AI_DISCLOSURE_OPENING))
+
+    async def _respond(self, transcript: str) -> None:
+        session = self.session
+        self._finish_reply(interrupted=False)
+        # The agent's sequence is taken when its message is recorded, so a
+        # turn cut short before it replies leaves no gap.
+        user_sequence = session.take_sequence()
+        playback = self._playback = PlaybackTracker(next(self._reply_ids), self.output_codec)
+        user_saved = False
+
+        try:
+            # 1. Echo the transcript while the emotion is classified and the
+            #    knowledge base is searched
+            (emotion, confidence), knowledge, _ = await asyncio.gather(
+                predict_emotion(transcript),
+                self._retrieve_knowledge(transcript),
+                self._send_json({"type": "transcription", "role": "user", "content": transcript}),
+            )
+            if session.persona_config is not None:
+                session.persona_config["emotional_state"] = emotion
+            self._save_user_message(user_sequence, transcript, emotion, confidence)
+            user_saved = True
+
+            # 2. Generate the reply; TTS starts as soon as text is available
+            if self.settings.stream_responses:
+                _, response_text = await asyncio.gather(
+                    self._send_json({"type": "emotion", "emotion": emotion, "confidence": confidence}),
+                    self._stream_reply(transcript, playback, knowledge),
+                )
+            else:
+                _, response_text = await asyncio.gather(
+                    self._send_json({"type": "emotion", "emotion": emotion, "confidence": confidence}),
+                    _personaplex.generate_text_response(
+                        text_input=transcript,
+                        persona_config=session.persona_config,
+                        conversation_history=session.history,
+                        knowledge=knowledge,
+                    ),
+                )
+                audio_bytes = await synthesize_speech(response_text, self.output_codec)
+                if audio_bytes:
+                    await self._send_segment_start(playback, response_text)
+                    await self.websocket.send_bytes(audio_bytes)
+                    playback.add_audio(audio_bytes)
+                    playback.end_segment()
+
+            await self._send_json({"type": "transcription", "role": "agent", "content": response_text})
+        except asyncio.CancelledError:
+            if not user_saved:
+                # Barged in before classification finished: keep the transcript.
+                self._save_user_message(user_sequence, transcript)
+            session.history.add("user", transcript)
+            self._playback = None
+            self._reply = _Reply(playback, None)
+            self._finish_reply(interrupted=True)
+            raise
+
+        # 3. Update history; the reply is recorded once it has been played
+        session.history.add("user", transcript)
+        self._playback = None
+        self._hold_reply(_Reply(playback, response_text))
+
+    def _save_user_message(
+        self,
+        sequence: int,
+        transcript: str,
+        emotion: str | None = None,
+        confidence: float | None = None,
+    ) -> None:
+        message_writer.enqueue(PendingMessage(
+            conversation_id=self.session.conversation_id,
+            sequence=sequence,
+            role="user",
+            content=transcript,
+            emotional_tone=emotion,
+            confidence=confidence,
+        ))
+
+    async def _retrieve_knowledge(self, transcript: str) -> list[str]:
+        """Passages grounding this turn; empty if disabled, trivial or past the deadline."""
+        settings = self.settings
+        if (
+            not settings.knowledge_turn_retrieval
+            or len(transcript.split()) < settings.knowledge_turn_min_words
+        ):
+            return []
+        return await get_knowledge_base().retrieve_within(
+            transcript,
+            timeout=settings.knowledge_turn_deadline_ms / 1000,
+            top_k=settings.knowledge_turn_top_k,
+        )
+
+    async def _stream_reply(
+        self,
+        transcript: str,
+        playback: PlaybackTracker,
+        knowledge: list[str] | None = None,
+    ) -> str:
+        """
+        Stream the LLM reply into sentence-level TTS.
+
+        Each completed sentence is synthesized as soon as it is available and
+        the resulting audio is sent to the socket in order, while the model
+        keeps generating the rest of the reply. With a streamable output
+        codec (opus, pcm) each segment is itself forwarded chunk by chunk.
+        Every segment is announced and timed in `playback`.
+
+        Returns:
+            The full agent response text.
+        """
+        segmenter = SentenceSegmenter(
+            min_clause_chars=self.settings.tts_segment_min_chars,
+            max_chars=self.settings.tts_segment_max_chars,
+        )
+        pending: asyncio.Queue[_Segment | None] = asyncio.Queue()
+        parts: list[str] = []
+        started = time.perf_counter()
+
+        async def produce() -> None:
+            try:
+                async for delta in _personaplex.stream_text_response(
+                    text_input=transcript,
+                    persona_config=self.session.persona_config,
+                    conversation_history=self.session.history,
+                    knowledge=knowledge,
+                ):
+                    parts.append(delta)
+                    for segment in segmenter.feed(delta):
+                        pending.put_nowait(self._start_segment(segment))
+                tail = segmenter.flush()
+                if tail:
+                    pending.put_nowait(self._start_segment(tail))
+            finally:
+                pending.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        # The segment being sent is no longer in `pending`; keep it to cancel its TTS.
+        item: _Segment | None = None
+        try:
+            while (item := await pending.get()) is not None:
+                await self._play_segment(item, playback, started)
+            await producer
+        finally:
+            producer.cancel()
+            if item is not None:
+                item.task.cancel()
+            while not pending.empty():
+                item = pending.get_nowait()
+                if item is not None:
+                    item.task.cancel()
+
+        return "".join(parts).strip()
+
+    def _start_segment(self, text: str) -> "_Segment":
+        """Start synthesizing one segment; its audio is queued as it arrives."""
+        chunks: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+        async def synthesize() -> None:
+            try:
+                if self.output_codec == "mp3":
+                    audio_bytes = await synthesize_speech(text)
+                    if audio_bytes:
+                        chunks.put_nowait(audio_bytes)
+                else:
+                    async for chunk in stream_speech(text, self.output_codec):
+                        chunks.put_nowait(chunk)
+            finally:
+                chunks.put_nowait(None)
+
+        return _Segment(text, chunks, asyncio.create_task(synthesize()))
+
+    async def _play_segment(
+        self, item: _Segment, playback: PlaybackTracker, started: float | None = None
+    ) -> None:
+        """Announce a segment and send its audio as it is synthesized."""
+        sent = False
+        while (chunk := await item.chunks.get()) is not None:
+            if not sent:
+                if started is not None and not playback.segments:
+                    logger.info(
+                        "turn_first_audio",
+                        latency_ms=round((time.perf_counter() - started) * 1000),
+                    )
+                await self._send_segment_start(playback, item.text)
+                sent = True
+            await self.websocket.send_bytes(chunk)
+            playback.add_audio(chunk)
+        playback.end_segment()
+
+    async def _send_segment_start(self, playback: PlaybackTracker, text: str) -> None:
+        segment = playback.start_segment(text)
+        await self._send_json(
+            {"type": "audio_segment", "reply": playback.reply_id, "segment": segment}
+        )
+
+    async def _send_json(self, data: dict) -> None:
+        await self.websocket.send_json(data)
@@ -0,0 +1,372 @@
+"""
+Offline replay of stored conversations against the current policy.
+
+Streams every conversation with its messages and debtor from the DB
+through a server-side cursor, in (conversation, sequence) order, and
+fans batches of conversations out to a process pool. For each user turn
+a worker re-runs the emotion classifier (current keywords or model), the
+NegotiationEngine and the prompt assembly, and optionally asks a local
+OpenAI-compatible server (llama.cpp, vLLM, ...) for the reply.
+
+The diff is against what was recorded: the emotional tone stored on each
+message, and the strategy and offered amount stored on the conversation.
+Run it before and after a change to EMOTION_KEYWORDS, the negotiation
+thresholds or the prompt guides and compare the two reports.
+
+Memory stays bounded: the cursor yields rows in chunks, and at most two
+batches per worker are in flight.
+
+Usage (from backend/):
+    python -m app.services.conversation.replay [--workers 8] [--batch-size 500]
+        [--since 2026-01-01] [--limit 100000] [--output diffs.jsonl]
+        [--llm-url http://localhost:8080/v1 --llm-model local]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import NamedTuple
+
+import httpx
+import structlog
+from sqlalchemy import select
+
+from app.core.database import async_session, engine
+from app.models.conversation import Conversation, ConversationMessage
+from app.models.debtor import Debtor
+from app.services.emotional.classifier import predict_emotion_sync
+from app.services.personaplex.client import PersonaPlexClient
+from app.services.personaplex.prompt_engine import prompt_engine
+from app.services.strategy.negotiation import NegotiationContext, NegotiationEngine
+
+logger = structlog.get_logger()
+
+_ROLES = {"agent": "assistant", "user": "user", "system": "system"}
+
+
+class StoredConversation(NamedTuple):
+    """Picklable snapshot of one conversation, as shipped to the workers."""
+
+    id: str
+    strategy: str
+    offered_amount: float | None
+    original_amount: float
+    negotiable_amount: float
+    days_past_due: int
+    risk_profile: str
+    messages: list[tuple[str, str, str | None]]  # (role, content, emotional_tone)
+
+
+@dataclass
+class ReplayReport:
+    conversations: int = 0
+    turns: int = 0
+    emotion_changes: int = 0
+    strategy_changes: int = 0
+    offer_changes: int = 0
+    prompt_tokens: int = 0
+    llm_replies: int = 0
+    llm_errors: int = 0
+    seconds: float = 0.0
+    # "recorded->replayed" counts
+    emotion_transitions: dict[str, int] = field(default_factory=dict)
+    strategy_transitions: dict[str, int] = field(default_factory=dict)
+
+    def merge(self, other: "ReplayReport") -> None:
+        for name in (
+            "conversations", "turns", "emotion_changes", "strategy_changes",
+            "offer_changes", "prompt_tokens", "llm_replies", "llm_errors",
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.emotion_transitions = dict(
+            Counter(self.emotion_transitions) + Counter(other.emotion_transitions)
+        )
+        self.strategy_transitions = dict(
+            Counter(self.strategy_transitions) + Counter(other.strategy_transitions)
+        )
+
+
+# Per-process worker state, set by _init_worker.
+_negotiation: NegotiationEngine | None = None
+_client: PersonaPlexClient | None = None
+_llm: httpx.Client | None = None
+_llm_model = ""
+
+
+def _init_worker(llm_url: str | None, llm_model: str) -> None:
+    global _negotiation, _client, _llm, _llm_model
+    # The engine logs every decision; a replay makes millions of them.
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+    _negotiation = NegotiationEngine()
+    _client = PersonaPlexClient()
+    if llm_url:
+        _llm = httpx.Client(base_url=llm_url, timeout=60.0)
+        _llm_model = llm_model
+
+
+def _generate(messages: list[dict]) -> str | None:
+    try:
+        response = _llm.post(
+            "/chat/completions",
+            json={"model": _llm_model, "messages": messages, "temperature": 0, "max_tokens": 300},
+        )
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+    except Exception:
+        return None
+
+
+def replay_conversation(conv: StoredConversation, report: ReplayReport) -> dict | None:
+    """
+    Replay the user turns of one conversation.
+
+    Returns:
+        The per-turn differences with what was recorded, or None if there are none.
+    """
+    strategy = conv.strategy
+    offer: float | None = None
+    history: list[dict] = []
+    emotions, replies = [], []
+    turn = 0
+
+    for role, content, recorded_tone in conv.messages:
+        if role != "user":
+            history.append({"role": _ROLES.get(role, "assistant"), "content": content})
+            continue
+
+        emotion = predict_emotion_sync(content).label
+        if recorded_tone is not None and recorded_tone != emotion:
+            emotions.append({"turn": turn, "recorded": recorded_tone, "replayed": emotion})
+            key = f"{recorded_tone}->{emotion}"
+            report.emotion_transitions[key] = report.emotion_transitions.get(key, 0) + 1
+
+        action = _negotiation.determine_action(NegotiationContext(
+            original_amount=conv.original_amount,
+            negotiable_amount=conv.negotiable_amount,
+            days_past_due=conv.days_past_due,
+            risk_profile=conv.risk_profile,
+            emotional_state=emotion,
+            current_strategy=strategy,
+            turn_count=turn,
+        ))
+        strategy = action.strategy
+        if action.offer_amount is not None:
+            offer = action.offer_amount
+
+        persona_config = {
+            "strategy": strategy,
+            "original_amount": conv.original_amount,
+            "negotiable_amount": conv.negotiable_amount,
+            "days_past_due": conv.days_past_due,
+            "emotional_state": emotion,
+        }
+        report.prompt_tokens += prompt_engine.render(persona_config).tokens
+        if _llm is not None:
+            # The recorded agent replies stay in the history, so every turn
+            # is replayed against the conversation that actually happened.
+            reply = _generate(_client.build_messages(content, persona_config, history))
+            if reply is None:
+                report.llm_errors += 1
+            else:
+                report.llm_replies += 1
+                replies.append({"turn": turn, "reply": reply})
+
+        history.append({"role": "user", "content": content})
+        turn += 1
+
+    report.conversations += 1
+    report.turns += turn
+    report.emotion_changes += len(emotions)
+    diff: dict = {}
+    if emotions:
+        diff["emotions"] = emotions
+    if turn and strategy != conv.strategy:
+        report.strategy_changes += 1
+        key = f"{conv.strategy}->{strategy}"
+        report.strategy_transitions[key] = report.strategy_transitions.get(key, 0) + 1
+        diff["strategy"] = {"recorded": conv.strategy, "replayed": strategy}
+    if conv.offered_amount is not None and (
+        offer is None or abs(offer - conv.offered_amount) >= 0.005
+    ):
+        report.offer_changes += 1
+        diff["offer"] = {"recorded": conv.offered_amount, "replayed": offer}
+    if replies:
+        diff["replies"] = replies
+    if not diff:
+        return None
+    return {"conversation_id": conv.id, **diff}
+
+
+def _replay_batch(batch: list[StoredConversation]) -> tuple[ReplayReport, list[dict]]:
+    report = ReplayReport()
+    diffs = [diff for conv in batch if (diff := replay_conversation(conv, report)) is not None]
+    return report, diffs
+
+
+async def stream_conversations(
+    batch_size: int,
+    since: datetime | None = None,
+    limit: int | None = None,
+    rows_per_fetch: int = 10_000,
+) -> AsyncIterator[list[StoredConversation]]:
+    """Batches of stored conversations, read through a server-side cursor."""
+    conversations = select(Conversation.id).order_by(Conversation.id)
+    if since is not None:
+        conversations = conversations.where(Conversation.started_at >= since)
+    if limit is not None:
+        conversations = conversations.limit(limit)
+    conversations = conversations.subquery()
+
+    stmt = (
+        select(
+            Conversation.id,
+            Conversation.strategy,
+            Conversation.offered_amount,
+            Debtor.original_amount,
+            Debtor.negotiable_amount,
+            Debtor.days_past_due,
+            Debtor.risk_profile,
+            ConversationMessage.role,
+            ConversationMessage.content,
+            ConversationMessage.emotional_tone,
+        )
+        .join(conversations, conversations.c.id == Conversation.id)
+        .join(Debtor, Debtor.id == Conversation.debtor_id)
+        .join(ConversationMessage, ConversationMessage.conversation_id == Conversation.id)
+        .order_by(
+            Conversation.id,
+            ConversationMessage.sequence.nulls_last(),
+            ConversationMessage.timestamp,
+        )
+        .execution_options(yield_per=rows_per_fetch)
+    )
+
+    batch: list[StoredConversation] = []
+    current: StoredConversation | None = None
+    async with async_session() as db:
+        result = await db.stream(stmt)
+        async for row in result:
+            if current is None or current.id != str(row[0]):
+                if current is not None:
+                    batch.append(current)
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+                current = StoredConversation(
+                    str(row[0]), row[1], row[2], row[3], row[4], row[5], row[6], []
+                )
+            current.messages.append((row[7], row[8], row[9]))
+    if current is not None:
+        batch.append(current)
+    if batch:
+        yield batch
+
+
+async def replay(
+    workers: int | None = None,
+    batch_size: int = 500,
+    since: datetime | None = None,
+    limit: int | None = None,
+    output: str | None = None,
+    llm_url: str | None = None,
+    llm_model: str = "local",
+) -> ReplayReport:
+    """
+    Replay stored conversations across a process pool.
+
+    Args:
+        workers: Worker processes (default: CPU count).
+        batch_size: Conversations per task sent to a worker.
+        since: Only conversations started at or after this time.
+        limit: Maximum number of conversations.
+        output: JSONL file receiving the per-conversation differences.
+        llm_url: Base URL of a local OpenAI-compatible server; no replies
+            are generated without it.
+        llm_model: Model name sent to that server.
+
+    Returns:
+        Aggregated differences.
+    """
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    report = ReplayReport()
+    pending: set[asyncio.Future] = set()
+    started = time.perf_counter()
+    sink = open(output, "w", encoding="utf-8") if output else None
+
+    async def collect(return_when: str) -> None:
+        nonlocal pending
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for future in done:
+            batch_report, diffs = future.result()
+            report.merge(batch_report)
+            if sink is not None:
+                sink.writelines(json.dumps(diff, ensure_ascii=False) + "\n" for diff in diffs)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(llm_url, llm_model)
+        ) as pool:
+            async for batch in stream_conversations(batch_size, since, limit):
+                pending.add(loop.run_in_executor(pool, _replay_batch, batch))
+                if len(pending) >= 2 * workers:
+                    await collect(asyncio.FIRST_COMPLETED)
+            if pending:
+                await collect(asyncio.ALL_COMPLETED)
+    finally:
+        if sink is not None:
+            sink.close()
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        "conversation_replay_finished",
+        conversations=report.conversations,
+        turns=report.turns,
+        emotion_changes=report.emotion_changes,
+        strategy_changes=report.strategy_changes,
+        offer_changes=report.offer_changes,
+        seconds=report.seconds,
+    )
+    return report
+
+
+async def _main(args: argparse.Namespace) -> ReplayReport:
+    try:
+        return await replay(
+            workers=args.workers,
+            batch_size=args.batch_size,
+            since=args.since,
+            limit=args.limit,
+            output=args.output,
+            llm_url=args.llm_url,
+            llm_model=args.llm_model,
+        )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay stored conversations against the current policy.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Conversations per worker task")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only conversations started since")
+    parser.add_argument("--limit", type=int, help="Maximum number of conversations")
+    parser.add_argument("--output", help="JSONL file for the per-conversation differences")
+    parser.add_argument("--llm-url", help="Local OpenAI-compatible server, e.g. http://localhost:8080/v1")
+    parser.add_argument("--llm-model", default="local")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    print(json.dumps(asdict(report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Shared state of live conversation sessions.
+
+The state a live call needs to continue is a compact JSON document: the
+persona config, the next message sequence and the turn history (running
+summary, pinned facts and the verbatim recent turns). The turn pipeline
+saves it after every turn, so a client whose connection dropped resumes
+the conversation on any worker instead of starting from scratch.
+
+Each session also has an event channel. Any process can push a JSON
+event to a live session with ``publish()``, and the worker holding its
+socket forwards it to the client.
+
+A session has one holder, the connection serving it. A reconnecting
+client takes it over with ``take_over()``: it claims the session, asks
+the previous holder to stop with a ``session_takeover`` event and waits
+for its ``session_released`` event, published by ``release()`` once the
+old connection has cancelled its turn, flushed its messages and saved
+the session. Only then is the state loaded, so no turn is lost or
+numbered twice.
+
+Backends (SESSION_STORE):
+
+- ``memory``: per-process dict and queues, for a single worker.
+- ``redis``: JSON values expiring after ``session_ttl_seconds``, and
+  pub/sub over one connection per process that dispatches events to the
+  local subscribers of each session.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+
+import structlog
+
+from app.config import get_settings
+from app.core.redis import get_redis
+
+logger = structlog.get_logger()
+
+# Events waiting for a slow socket beyond this are dropped.
+_EVENT_QUEUE_SIZE = 256
+_SWEEP_EVERY = 1024
+
+# Delete the holder key only if it still names the releasing connection.
+_RELEASE_HOLDER = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class SessionStore:
+    backend = ""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.errors = 0
+        self.saves = 0
+        self.resumes = 0
+        self.dropped_events = 0
+        self._listeners: dict[str, set[asyncio.Queue]] = {}
+
+    async def load(self, conversation_id: str) -> dict | None:
+        raise NotImplementedError
+
+    async def save(self, conversation_id: str, state: dict) -> None:
+        raise NotImplementedError
+
+    async def publish(self, conversation_id: str, event: dict) -> None:
+        """Deliver an event to the sockets of a session, on any worker."""
+        raise NotImplementedError
+
+    async def claim(self, conversation_id: str, connection_id: str) -> str | None:
+        """Make a connection the holder of a session; returns the previous holder."""
+        raise NotImplementedError
+
+    async def _release_holder(self, conversation_id: str, connection_id: str) -> None:
+        raise NotImplementedError
+
+    async def release(self, conversation_id: str, connection_id: str) -> None:
+        """
+        Give up a session once its final state is saved.
+
+        The holder is cleared unless another connection has claimed the
+        session since, and a connection waiting in take_over() is told it
+        can go on.
+        """
+        await self._release_holder(conversation_id, connection_id)
+        await self.publish(
+            conversation_id, {"type": "session_released", "connection_id": connection_id}
+        )
+
+    async def take_over(self, conversation_id: str, connection_id: str, timeout: float) -> bool:
+        """
+        Claim a session and wait until its previous holder has released it.
+
+        Args:
+            conversation_id: Session to claim.
+            connection_id: The new holder.
+            timeout: Seconds to wait for the previous holder, which may
+                have died without releasing the session.
+
+        Returns:
+            False if the previous holder did not release the session in time.
+        """
+        # Listen before claiming, so the release cannot be missed.
+        queue = await self._listen(conversation_id)
+        try:
+            previous = await self.claim(conversation_id, connection_id)
+            if previous is None or previous == connection_id:
+                return True
+            await self.publish(
+                conversation_id, {"type": "session_takeover", "connection_id": connection_id}
+            )
+            try:
+                async with asyncio.timeout(timeout):
+                    while True:
+                        event = await queue.get()
+                        if (
+                            event.get("type") == "session_released"
+                            and event.get("connection_id") == previous
+                        ):
+                            return True
+            except TimeoutError:
+                logger.warning("session_takeover_timeout", conversation_id=conversation_id)
+                return False
+        finally:
+            await self._unlisten(conversation_id, queue)
+
+    async def events(self, conversation_id: str) -> AsyncIterator[dict]:
+        """
+        Events published to a session, until the iterator is closed.
+
+        Use with contextlib.aclosing so the subscription is released when
+        the consumer is cancelled.
+        """
+        queue = await self._listen(conversation_id)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            await self._unlisten(conversation_id, queue)
+
+    async def _listen(self, conversation_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=_EVENT_QUEUE_SIZE)
+        listeners = self._listeners.setdefault(conversation_id, set())
+        listeners.add(queue)
+        if len(listeners) == 1:
+            await self._subscribe(conversation_id)
+        return queue
+
+    async def _unlisten(self, conversation_id: str, queue: asyncio.Queue) -> None:
+        listeners = self._listeners.get(conversation_id)
+        if listeners is None:
+            return
+        listeners.discard(queue)
+        if not listeners:
+            del self._listeners[conversation_id]
+            await self._unsubscribe(conversation_id)
+
+    async def close(self) -> None:
+        pass
+
+    async def _subscribe(self, conversation_id: str) -> None:
+        pass
+
+    async def _unsubscribe(self, conversation_id: str) -> None:
+        pass
+
+    def _dispatch(self, conversation_id: str, event: dict) -> None:
+        for queue in self._listeners.get(conversation_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped_events += 1
+                logger.warning("session_event_dropped", conversation_id=conversation_id)
+
+    def _error(self, error: Exception) -> None:
+        self.errors += 1
+        if self.errors == 1 or self.errors % 100 == 0:
+            logger.warning(
+                "session_store_error", backend=self.backend, error=str(error), errors=self.errors
+            )
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "subscribed_sessions": len(self._listeners),
+            "saves": self.saves,
+            "resumes": self.resumes,
+            "dropped_events": self.dropped_events,
+            "errors": self.errors,
+        }
+
+
+class MemorySessionStore(SessionStore):
+    """Single-process store; values are kept serialized like in Redis."""
+
+    backend = "memory"
+
+    def __init__(self, ttl: int):
+        super().__init__(ttl)
+        self._states: dict[str, tuple[float, str]] = {}
+        self._holders: dict[str, str] = {}
+
+    async def load(self, conversation_id: str) -> dict | None:
+        entry = self._states.get(conversation_id)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._states[conversation_id]
+            return None
+        self.resumes += 1
+        return json.loads(value)
+
+    async def save(self, conversation_id: str, state: dict) -> None:
+        self._states[conversation_id] = (time.monotonic() + self.ttl, json.dumps(state))
+        self.saves += 1
+        if self.saves % _SWEEP_EVERY == 0:
+            now = time.monotonic()
+            for key in [key for key, (expires_at, _) in self._states.items() if expires_at <= now]:
+                del self._states[key]
+
+    async def publish(self, conversation_id: str, event: dict) -> None:
+        # Same copy semantics as the Redis channel.
+        self._dispatch(conversation_id, json.loads(json.dumps(event, default=str)))
+
+    async def claim(self, conversation_id: str, connection_id: str) -> str | None:
+        previous = self._holders.get(conversation_id)
+        self._holders[conversation_id] = connection_id
+        return previous
+
+    async def _release_holder(self, conversation_id: str, connection_id: str) -> None:
+        if self._holders.get(conversation_id) == connection_id:
+            del self._holders[conversation_id]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "sessions": len(self._states)}
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Store shared by every worker and node.
+
+    Failures are counted and logged, never raised: a Redis outage costs
+    resumability, not the live call.
+    """
+
+    backend = "redis"
+
+    def __init__(self, ttl: int, prefix: str = "session:"):
+        super().__init__(ttl)
+        self.prefix = prefix
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}"
+
+    def _channel(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}:events"
+
+    def _holder_key(self, conversation_id: str) -> str:
+        return f"{self.prefix}{conversation_id}:holder"
+
+    async def load(self, conversation_id: str) -> dict | None:
+        try:
+            value = await get_redis().get(self._key(conversation_id))
+        except Exception as e:
+            self._error(e)
+            return None
+        if value is None:
+            return None
+        self.resumes += 1
+        return json.loads(value)
+
+    async def save(self, conversation_id: str, state: dict) -> None:
+        try:
+            await get_redis().set(self._key(conversation_id), json.dumps(state), ex=self.ttl)
+        except Exception as e:
+            self._error(e)
+            return
+        self.saves += 1
+
+    async def publish(self, conversation_id: str, event: dict) -> None:
+        try:
+            await get_redis().publish(
+                self._channel(conversation_id), json.dumps(event, default=str)
+            )
+        except Exception as e:
+            self._error(e)
+
+    async def claim(self, conversation_id: str, connection_id: str) -> str | None:
+        try:
+            previous = await get_redis().set(
+                self._holder_key(conversation_id), connection_id, ex=self.ttl, get=True
+            )
+        except Exception as e:
+            self._error(e)
+            return None
+        return previous.decode() if isinstance(previous, bytes) else previous
+
+    async def _release_holder(self, conversation_id: str, connection_id: str) -> None:
+        try:
+            await get_redis().eval(
+                _RELEASE_HOLDER, 1, self._holder_key(conversation_id), connection_id
+            )
+        except Exception as e:
+            self._error(e)
+
+    async def _subscribe(self, conversation_id: str) -> None:
+        try:
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub()
+            await self._pubsub.subscribe(self._channel(conversation_id))
+        except Exception as e:
+            self._error(e)
+            return
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def _unsubscribe(self, conversation_id: str) -> None:
+        if self._pubsub is None:
+            return
+        try:
+            await self._pubsub.unsubscribe(self._channel(conversation_id))
+        except Exception as e:
+            self._error(e)
+
+    async def _read(self) -> None:
+        """Dispatch messages of every subscribed channel to the local listeners."""
+        suffix = len(":events")
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py reconnects and resubscribes on the next read.
+                self._error(e)
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                event = json.loads(message["data"])
+            except ValueError:
+                continue
+            self._dispatch(channel[len(self.prefix):-suffix], event)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception as e:
+                self._error(e)
+            self._pubsub = None
+
+
+_store: SessionStore | None = None
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        settings = get_settings()
+        if settings.session_store == "redis":
+            _store = RedisSessionStore(settings.session_ttl_seconds)
+        elif settings.session_store == "memory":
+            _store = MemorySessionStore(settings.session_ttl_seconds)
+        else:
+            raise ValueError(f"Unknown session store: {settings.session_store!r}")
+    return _store
+
+
+async def close_session_store() -> None:
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
@@ -0,0 +1,310 @@
+"""
+Bulk debtor import.
+
+Streams a CSV (header row) or NDJSON placement file and loads it chunk by
+chunk, one short transaction per chunk:
+
+1. parse and validate ``chunk_size`` rows against ``DebtorCreate`` in a
+   worker thread; invalid rows are reported with their line number and
+   skipped, the rest of the chunk goes on;
+2. ``COPY`` the valid rows into a temporary staging table with asyncpg's
+   ``copy_records_to_table`` (binary protocol, no per-row statements);
+3. merge the staging table into ``debtors`` with a single
+   ``INSERT ... ON CONFLICT (external_id) DO UPDATE``.
+
+The next chunk is parsed while the current one is loaded, so memory is
+bounded by two chunks whatever the size of the file. An upsert replaces
+every imported column of the existing debtor; within a file the last row
+of an external_id wins. Rows without an external_id are always inserted.
+
+Usage (from backend/):
+    python -m app.services.debtors.importer placements.csv [--format ndjson]
+        [--chunk-size 10000] [--max-errors 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import sys
+import time
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO
+
+import structlog
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from app.core.database import async_session, engine
+from app.schemas.debtor import DebtorCreate, DebtorImportError, DebtorImportReport
+
+logger = structlog.get_logger()
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 10_000
+MAX_REPORTED_ERRORS = 1_000
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+_STAGING_COLUMNS = (
+    "line",
+    "id",
+    "external_id",
+    "name",
+    "original_amount",
+    "negotiable_amount",
+    "days_past_due",
+    "risk_profile",
+    "emotional_profile",
+    "notes",
+)
+
+_CREATE_STAGING = text("""
+CREATE TEMP TABLE IF NOT EXISTS debtor_import (
+    line bigint NOT NULL,
+    id uuid NOT NULL,
+    external_id varchar(100),
+    name varchar(200) NOT NULL,
+    original_amount double precision NOT NULL,
+    negotiable_amount double precision NOT NULL,
+    days_past_due integer NOT NULL,
+    risk_profile varchar(50) NOT NULL,
+    emotional_profile varchar(50),
+    notes text
+) ON COMMIT DELETE ROWS
+""")
+
+# DISTINCT ON keeps the last row of each external_id: ON CONFLICT cannot
+# update the same debtor twice in one statement.
+_MERGE = text("""
+WITH merged AS (
+    INSERT INTO debtors (
+        id, external_id, name, original_amount, negotiable_amount,
+        days_past_due, risk_profile, emotional_profile, notes
+    )
+    SELECT * FROM (
+        SELECT DISTINCT ON (external_id)
+            id, external_id, name, original_amount, negotiable_amount,
+            days_past_due, risk_profile, emotional_profile, notes
+        FROM debtor_import
+        WHERE external_id IS NOT NULL
+        ORDER BY external_id, line DESC
+    ) latest
+    UNION ALL
+    SELECT
+        id, external_id, name, original_amount, negotiable_amount,
+        days_past_due, risk_profile, emotional_profile, notes
+    FROM debtor_import
+    WHERE external_id IS NULL
+    ON CONFLICT (external_id) DO UPDATE SET
+        name = EXCLUDED.name,
+        original_amount = EXCLUDED.original_amount,
+        negotiable_amount = EXCLUDED.negotiable_amount,
+        days_past_due = EXCLUDED.days_past_due,
+        risk_profile = EXCLUDED.risk_profile,
+        emotional_profile = EXCLUDED.emotional_profile,
+        notes = EXCLUDED.notes,
+        updated_at = now()
+    RETURNING xmax = 0 AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM merged
+""")
+
+
+@dataclass
+class _Chunk:
+    rows: int = 0
+    records: list[tuple] = field(default_factory=list)
+    errors: list[DebtorImportError] = field(default_factory=list)
+
+    def reject(self, line: int, external_id: object, errors: list[str]) -> None:
+        self.errors.append(DebtorImportError(
+            line=line,
+            external_id=None if external_id is None else str(external_id),
+            errors=errors,
+        ))
+
+
+def detect_format(filename: str | None = None, content_type: str | None = None) -> str | None:
+    """csv or ndjson from a file extension or a Content-Type, None if unknown."""
+    if content_type:
+        fmt = _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    if filename:
+        suffix = Path(filename).suffix.lower()
+        if suffix == ".csv":
+            return "csv"
+        if suffix in (".ndjson", ".jsonl"):
+            return "ndjson"
+    return None
+
+
+def _iter_csv(source: BinaryIO) -> Iterator[tuple[int, dict | str]]:
+    reader = csv.DictReader(codecs.iterdecode(source, "utf-8-sig", errors="replace"))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        # Unrecoverable (e.g. an unterminated quote); the rest of the file is lost.
+        yield reader.line_num, f"malformed CSV: {e}"
+
+
+def _iter_ndjson(source: BinaryIO) -> Iterator[tuple[int, dict | str]]:
+    for line, raw in enumerate(source, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            yield line, f"invalid JSON: {e}"
+            continue
+        yield line, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def _validate_chunk(rows: Iterator[tuple[int, dict | str]], size: int) -> _Chunk:
+    chunk = _Chunk()
+    for line, row in islice(rows, size):
+        chunk.rows += 1
+        if isinstance(row, str):
+            chunk.reject(line, None, [row])
+            continue
+        # Empty CSV cells and JSON nulls mean "not provided": defaults apply.
+        fields = {k: v for k, v in row.items() if k is not None and v not in ("", None)}
+        try:
+            debtor = DebtorCreate.model_validate(fields)
+        except ValidationError as e:
+            chunk.reject(line, fields.get("external_id"), [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            ])
+            continue
+        chunk.records.append((
+            line,
+            uuid.uuid4(),
+            debtor.external_id,
+            debtor.name,
+            debtor.original_amount,
+            debtor.negotiable_amount,
+            debtor.days_past_due,
+            debtor.risk_profile,
+            debtor.emotional_profile,
+            debtor.notes,
+        ))
+    return chunk
+
+
+async def _load_chunk(records: list[tuple]) -> tuple[int, int]:
+    async with async_session() as db:
+        # The first statement opens the transaction the COPY then joins.
+        await db.execute(_CREATE_STAGING)
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            "debtor_import", records=records, columns=_STAGING_COLUMNS
+        )
+        inserted, updated = (await db.execute(_MERGE)).one()
+        await db.commit()
+    return inserted, updated
+
+
+async def import_debtors(
+    source: BinaryIO,
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_errors: int = MAX_REPORTED_ERRORS,
+    dry_run: bool = False,
+) -> DebtorImportReport:
+    """
+    Validate and upsert every row of a placement file.
+
+    Args:
+        source: Binary file positioned at the start of the data.
+        fmt: "csv" (with a header row) or "ndjson".
+        chunk_size: Rows validated and loaded per transaction.
+        max_errors: Invalid rows listed in the report; all are counted.
+        dry_run: Validate without writing.
+
+    Returns:
+        Counts, throughput and the first invalid rows.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format {fmt!r}; expected one of {FORMATS}")
+
+    rows = _iter_csv(source) if fmt == "csv" else _iter_ndjson(source)
+    report = DebtorImportReport()
+    started = time.perf_counter()
+    chunk = await asyncio.to_thread(_validate_chunk, rows, chunk_size)
+    while chunk.rows:
+        # The next chunk is parsed while this one is loaded.
+        next_chunk = (
+            asyncio.create_task(asyncio.to_thread(_validate_chunk, rows, chunk_size))
+            if chunk.rows == chunk_size
+            else None
+        )
+        try:
+            if chunk.records and not dry_run:
+                inserted, updated = await _load_chunk(chunk.records)
+                report.inserted += inserted
+                report.updated += updated
+                report.superseded += len(chunk.records) - inserted - updated
+        except BaseException:
+            if next_chunk is not None:
+                next_chunk.cancel()
+            raise
+        report.rows += chunk.rows
+        report.invalid += len(chunk.errors)
+        report.errors.extend(chunk.errors[: max(max_errors - len(report.errors), 0)])
+        report.chunks += 1
+        chunk = await next_chunk if next_chunk is not None else _Chunk()
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    report.rows_per_second = round(report.rows / report.seconds, 1) if report.seconds else 0.0
+    logger.info(
+        "debtors_imported",
+        format=fmt,
+        dry_run=dry_run,
+        **report.model_dump(exclude={"errors"}),
+    )
+    return report
+
+
+async def _main(path: str, fmt: str, chunk_size: int, max_errors: int, dry_run: bool):
+    try:
+        if path == "-":
+            return await import_debtors(sys.stdin.buffer, fmt, chunk_size, max_errors, dry_run)
+        with open(path, "rb") as source:
+            return await import_debtors(source, fmt, chunk_size, max_errors, dry_run)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import debtors from CSV or NDJSON.")
+    parser.add_argument("path", help="Placement file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-errors", type=int, default=MAX_REPORTED_ERRORS)
+    parser.add_argument("--dry-run", action="store_true", help="Validate without writing")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("cannot infer the format from the file name; pass --format")
+    report = asyncio.run(_main(args.path, fmt, args.chunk_size, args.max_errors, args.dry_run))
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
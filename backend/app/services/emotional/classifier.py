@@ -5,13 +5,24 @@ Analyzes user messages to detect emotional state and adapt
 the agent's strategy accordingly.
 
 Phase 1: Rule-based keyword classification.
-Phase 2+: ML-based classifier with fine-tuned model.
+
+The keyword table is compiled once at import into a token-level matcher:
+text is normalized and split into word tokens in a single pass, single-word
+keywords are found with one set intersection, and multi-word phrases are
+only verified when their first word occurs. Matching is word-boundary
+aware, so "hell" does not fire on "hello" nor "sure" on "pressure".
+
+Phase 2: Hashed n-gram logistic model (see ``model.py``) returning a
+calibrated probability, selected with the ``emotion_engine`` setting.
+The keyword rules remain the fallback when no trained model is available.
 """
 
-import re
-import structlog
+import string
+from collections.abc import Iterable
+from typing import NamedTuple
 
-logger = structlog.get_logger()
+from app.config import get_settings
+from app.services.emotional.model import get_emotion_model
 
 EMOTION_KEYWORDS = {
     "aggressive": [
@@ -42,9 +53,107 @@ EMOTION_KEYWORDS = {
 }
 
 
-async def classify_emotion(text: str) -> str:
+_DEFAULT_EMOTION = "cooperative"
+
+
+class EmotionPrediction(NamedTuple):
+    label: str
+    confidence: float | None
+
+# Everything that is not part of a word becomes a separator; apostrophes are
+# kept so contractions ("can't", "i'll") stay single tokens.
+_SEPARATORS = string.punctuation.replace("'", "") + "¿¡“”«»…–—\t\r\n"
+_NORMALIZE = str.maketrans({**{c: " " for c in _SEPARATORS}, "’": "'", "‘": "'"})
+
+
+def _normalize(text: str) -> str:
+    return text.lower().translate(_NORMALIZE)
+
+
+def _tokenize(text: str) -> list[str]:
+    return _normalize(text).split()
+
+
+def _compile(keywords: dict[str, list[str]]):
+    words: dict[str, str] = {}
+    phrases: dict[str, list[tuple[str, str]]] = {}
+    for emotion, entries in keywords.items():
+        for keyword in entries:
+            tokens = _tokenize(keyword)
+            if len(tokens) == 1:
+                words[tokens[0]] = emotion
+            else:
+                phrases.setdefault(tokens[0], []).append((" ".join(tokens), emotion))
+    return words, frozenset(words), phrases
+
+
+_WORDS, _WORD_SET, _PHRASES = _compile(EMOTION_KEYWORDS)
+
+
+def emotion_scores(text: str) -> dict[str, int]:
     """
-    Classify the emotional state of a text message.
+    Count the distinct keywords of each emotion present in a text.
+
+    Returns:
+        Mapping of emotion to score, in EMOTION_KEYWORDS order, containing
+        only emotions with at least one match.
+    """
+    normalized = _normalize(text)
+    present = set(normalized.split())
+    matched = [_WORDS[word] for word in present & _WORD_SET]
+
+    candidates = present & _PHRASES.keys()
+    if candidates:
+        # Separators were mapped to spaces, so a phrase interrupted by
+        # punctuation ("not, now") does not match.
+        padded = f" {normalized} "
+        for first in candidates:
+            for phrase, emotion in _PHRASES[first]:
+                if f" {phrase} " in padded:
+                    matched.append(emotion)
+
+    if not matched:
+        return {}
+    return {
+        emotion: count
+        for emotion in EMOTION_KEYWORDS
+        if (count := matched.count(emotion))
+    }
+
+
+def classify_keywords(text: str) -> str:
+    """
+    Classify a text with the keyword rules.
+
+    Ties go to the emotion listed first in EMOTION_KEYWORDS.
+    """
+    scores = emotion_scores(text)
+    if not scores:
+        return _DEFAULT_EMOTION
+    return max(scores, key=scores.get)
+
+
+def predict_emotion_sync(text: str) -> EmotionPrediction:
+    """
+    Classify a text with the configured engine, without awaiting.
+
+    Args:
+        text: The user's message text.
+
+    Returns:
+        The detected emotion and, for the statistical model, its calibrated
+        probability. The keyword rules report no confidence.
+    """
+    if get_settings().emotion_engine == "model" and text.strip():
+        model = get_emotion_model()
+        if model is not None:
+            return EmotionPrediction(*model.predict(text))
+    return EmotionPrediction(classify_keywords(text), None)
+
+
+def classify_emotion_sync(text: str) -> str:
+    """
+    Classify the emotional state of a text message without awaiting.
 
     Args:
         text: The user's message text.
@@ -53,22 +162,36 @@ async def classify_emotion(text: str) -> str:
         Detected emotion: aggressive, anxious, cooperative, evasive, or defensive.
         Defaults to "cooperative" if no strong signal is detected.
     """
-    text_lower = text.lower()
-    scores = {}
+    return predict_emotion_sync(text).label
 
-    for emotion, keywords in EMOTION_KEYWORDS.items():
-        score = sum(1 for kw in keywords if kw in text_lower)
-        if score > 0:
-            scores[emotion] = score
 
-    if not scores:
-        return "cooperative"
-
-    detected = max(scores, key=scores.get)
-    logger.info(
-        "emotion_classified",
-        emotion=detected,
-        scores=scores,
-        text_preview=text[:80],
-    )
-    return detected
+def classify_many(texts: Iterable[str]) -> list[str]:
+    """
+    Classify a batch of messages, e.g. for offline replays and backfills.
+
+    Args:
+        texts: Message texts.
+
+    Returns:
+        One detected emotion per input text, in the same order.
+    """
+    return [classify_emotion_sync(text) for text in texts]
+
+
+async def predict_emotion(text: str) -> EmotionPrediction:
+    """Async counterpart of predict_emotion_sync for the turn pipeline."""
+    return predict_emotion_sync(text)
+
+
+async def classify_emotion(text: str) -> str:
+    """
+    Classify the emotional state of a text message.
+
+    Args:
+        text: The user's message text.
+
+    Returns:
+        Detected emotion: aggressive, anxious, cooperative, evasive, or defensive.
+        Defaults to "cooperative" if no strong signal is detected.
+    """
+    return classify_emotion_sync(text)
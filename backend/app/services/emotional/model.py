@@ -0,0 +1,291 @@
+"""
+Statistical emotion model (classifier Phase 2).
+
+A hashed n-gram vectorizer (word unigrams and bigrams plus character
+trigrams) feeding a multinomial logistic regression, all in NumPy and
+CPU-only. Weights are stored as a float32 ``weights.npy`` matrix of shape
+(n_features, n_labels), memory-mapped at load time, next to a small
+``model.json`` sidecar with the labels, bias, hashing parameters and the
+softmax temperature fitted on held-out data so the reported probability
+is calibrated.
+
+Training runs offline, see ``app.services.emotional.train``.
+"""
+
+import json
+import re
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+from app.config import get_settings
+
+logger = structlog.get_logger()
+
+WEIGHTS_FILE = "weights.npy"
+METADATA_FILE = "model.json"
+FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+
+def _hash(feature: str, mask: int) -> int:
+    return zlib.crc32(feature.encode()) & mask
+
+
+def featurize(text: str, n_features: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Hash a text into a sparse, L2-normalized feature vector.
+
+    Args:
+        text: Message text.
+        n_features: Size of the hashed feature space (a power of two).
+
+    Returns:
+        (indices, values) arrays of the non-zero features.
+    """
+    mask = n_features - 1
+    tokens = _TOKEN.findall(text.lower().replace("’", "'"))
+    counts: dict[int, int] = {}
+
+    previous = "<s>"
+    for token in tokens:
+        for feature in (f"w:{token}", f"b:{previous} {token}"):
+            index = _hash(feature, mask)
+            counts[index] = counts.get(index, 0) + 1
+        padded = f"<{token}>"
+        for i in range(len(padded) - 2):
+            index = _hash(f"c:{padded[i:i + 3]}", mask)
+            counts[index] = counts.get(index, 0) + 1
+        previous = token
+
+    if not counts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    values /= np.sqrt(np.dot(values, values))
+    return indices, values
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+@dataclass
+class EmotionModel:
+    labels: list[str]
+    weights: np.ndarray
+    bias: np.ndarray
+    temperature: float = 1.0
+    metrics: dict | None = None
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        indices, values = featurize(text, self.n_features)
+        logits = self.bias + values @ self.weights[indices] if len(indices) else self.bias
+        return _softmax(np.asarray(logits, dtype=np.float64) / self.temperature)
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """
+        Returns:
+            The most likely label and its calibrated probability.
+        """
+        probabilities = self.predict_proba(text)
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def save(self, directory: str | Path) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / WEIGHTS_FILE, np.ascontiguousarray(self.weights, dtype=np.float32))
+        metadata = {
+            "format_version": FORMAT_VERSION,
+            "labels": self.labels,
+            "n_features": self.n_features,
+            "bias": [float(b) for b in self.bias],
+            "temperature": self.temperature,
+            "metrics": self.metrics or {},
+        }
+        (directory / METADATA_FILE).write_text(json.dumps(metadata, indent=2))
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "EmotionModel":
+        """
+        Load a trained model; the weight matrix is memory-mapped, not read.
+
+        Raises:
+            FileNotFoundError: If the model files do not exist.
+            ValueError: If the files are from an incompatible format version.
+        """
+        directory = Path(directory)
+        metadata = json.loads((directory / METADATA_FILE).read_text())
+        if metadata.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported emotion model format: {metadata.get('format_version')}")
+        weights = np.load(directory / WEIGHTS_FILE, mmap_mode="r")
+        if weights.shape != (metadata["n_features"], len(metadata["labels"])):
+            raise ValueError(f"emotion model weights have shape {weights.shape}")
+        return cls(
+            labels=metadata["labels"],
+            weights=weights,
+            bias=np.asarray(metadata["bias"], dtype=np.float32),
+            temperature=metadata["temperature"],
+            metrics=metadata.get("metrics"),
+        )
+
+
+@lru_cache
+def get_emotion_model() -> EmotionModel | None:
+    """Load the configured model once; None if it is missing or unreadable."""
+    path = get_settings().emotion_model_dir
+    try:
+        model = EmotionModel.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("emotion_model_unavailable", path=path, error=str(e))
+        return None
+    logger.info("emotion_model_loaded", path=path, labels=model.labels, n_features=model.n_features)
+    return model
+
+
+class _SparseRows:
+    """Featurized texts in CSR layout."""
+
+    def __init__(self, texts: list[str], n_features: int):
+        indptr = [0]
+        indices, values = [], []
+        for text in texts:
+            i, v = featurize(text, n_features)
+            indices.append(i)
+            values.append(v)
+            indptr.append(indptr[-1] + len(i))
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        self.values = np.concatenate(values) if values else np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def batch(self, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Gather rows; returns (row id per non-zero, feature indices, values)."""
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        lengths = ends - starts
+        # Position of each gathered non-zero in the flat arrays.
+        batch_offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(starts - batch_offsets, lengths) + np.arange(lengths.sum())
+        row_ids = np.repeat(np.arange(len(rows)), lengths)
+        return row_ids, self.indices[positions], self.values[positions]
+
+    def logits(self, weights: np.ndarray, bias: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        rows = np.arange(len(self)) if rows is None else rows
+        row_ids, indices, values = self.batch(rows)
+        logits = np.tile(bias, (len(rows), 1)).astype(np.float64)
+        np.add.at(logits, row_ids, values[:, None] * weights[indices])
+        return logits
+
+
+def _fit_temperature(logits: np.ndarray, targets: np.ndarray) -> float:
+    best_t, best_nll = 1.0, np.inf
+    for t in np.geomspace(0.05, 10.0, 47):
+        probabilities = _softmax(logits / t)
+        nll = -np.mean(np.log(probabilities[np.arange(len(targets)), targets] + 1e-12))
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def train_model(
+    texts: list[str],
+    labels: list[str],
+    n_features: int = 2**16,
+    epochs: int = 8,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+    batch_size: int = 256,
+    validation_split: float = 0.1,
+    seed: int = 13,
+) -> EmotionModel:
+    """
+    Fit the model with mini-batch Adagrad on class-balanced cross-entropy.
+
+    A validation split is held out to fit the softmax temperature and to
+    report accuracy in the model metrics.
+
+    Args:
+        texts: Message texts.
+        labels: One label per text.
+        n_features: Size of the hashed feature space (a power of two).
+
+    Returns:
+        The trained model.
+    """
+    if n_features & (n_features - 1):
+        raise ValueError("n_features must be a power of two")
+    if len(texts) != len(labels):
+        raise ValueError("texts and labels must have the same length")
+
+    label_names = sorted(set(labels))
+    label_index = {label: i for i, label in enumerate(label_names)}
+    targets = np.asarray([label_index[label] for label in labels], dtype=np.int64)
+    n_labels = len(label_names)
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(texts))
+    n_validation = int(len(texts) * validation_split) if len(texts) >= 20 else 0
+    validation, training = order[:n_validation], order[n_validation:]
+
+    rows = _SparseRows(texts, n_features)
+    counts = np.bincount(targets[training], minlength=n_labels)
+    class_weights = len(training) / (n_labels * np.maximum(counts, 1))
+
+    weights = np.zeros((n_features, n_labels), dtype=np.float64)
+    bias = np.zeros(n_labels, dtype=np.float64)
+    weights_acc = np.full_like(weights, 1e-8)
+    bias_acc = np.full_like(bias, 1e-8)
+
+    for _ in range(epochs):
+        rng.shuffle(training)
+        for start in range(0, len(training), batch_size):
+            batch = training[start:start + batch_size]
+            row_ids, indices, values = rows.batch(batch)
+            logits = np.tile(bias, (len(batch), 1))
+            np.add.at(logits, row_ids, values[:, None] * weights[indices])
+
+            errors = _softmax(logits)
+            errors[np.arange(len(batch)), targets[batch]] -= 1.0
+            errors *= class_weights[targets[batch]][:, None] / len(batch)
+
+            grad = values[:, None] * errors[row_ids]
+            unique, inverse = np.unique(indices, return_inverse=True)
+            feature_grad = np.zeros((len(unique), n_labels))
+            np.add.at(feature_grad, inverse, grad)
+            feature_grad += l2 * weights[unique]
+
+            weights_acc[unique] += feature_grad**2
+            weights[unique] -= learning_rate * feature_grad / np.sqrt(weights_acc[unique])
+            bias_grad = errors.sum(axis=0)
+            bias_acc += bias_grad**2
+            bias -= learning_rate * bias_grad / np.sqrt(bias_acc)
+
+    metrics = {"train_examples": int(len(training)), "validation_examples": int(n_validation)}
+    temperature = 1.0
+    if n_validation:
+        logits = rows.logits(weights, bias, validation)
+        temperature = _fit_temperature(logits, targets[validation])
+        metrics["validation_accuracy"] = round(
+            float(np.mean(logits.argmax(axis=1) == targets[validation])), 4
+        )
+
+    return EmotionModel(
+        labels=label_names,
+        weights=weights.astype(np.float32),
+        bias=bias.astype(np.float32),
+        temperature=temperature,
+        metrics=metrics,
+    )
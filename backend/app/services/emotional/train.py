@@ -0,0 +1,78 @@
+"""
+Offline training for the statistical emotion model.
+
+Trains on user messages whose ``emotional_tone`` is set in
+``conversation_messages`` (or on a JSONL file of {"text", "label"} records)
+and writes the model files read by the ``model`` emotion engine.
+
+Usage (from backend/):
+    python -m app.services.emotional.train [--output data/emotion_model]
+        [--jsonl labeled.jsonl] [--n-features 65536] [--epochs 8]
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.core.database import async_session, engine
+from app.models.conversation import ConversationMessage
+from app.services.emotional.model import train_model
+
+
+async def load_labeled_messages() -> tuple[list[str], list[str]]:
+    """Labeled user messages from the database."""
+    texts, labels = [], []
+    async with async_session() as db:
+        result = await db.stream(
+            select(ConversationMessage.content, ConversationMessage.emotional_tone)
+            .where(
+                ConversationMessage.role == "user",
+                ConversationMessage.emotional_tone.is_not(None),
+            )
+            .execution_options(yield_per=5000)
+        )
+        async for content, tone in result:
+            if content and content.strip():
+                texts.append(content)
+                labels.append(tone)
+    await engine.dispose()
+    return texts, labels
+
+
+def load_jsonl(path: str) -> tuple[list[str], list[str]]:
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                texts.append(record["text"])
+                labels.append(record["label"])
+    return texts, labels
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram emotion model.")
+    parser.add_argument("--output", default=get_settings().emotion_model_dir)
+    parser.add_argument("--jsonl", help="Train from a JSONL file instead of the database")
+    parser.add_argument("--n-features", type=int, default=2**16)
+    parser.add_argument("--epochs", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.jsonl:
+        texts, labels = load_jsonl(args.jsonl)
+    else:
+        texts, labels = asyncio.run(load_labeled_messages())
+    if len(set(labels)) < 2:
+        parser.error(f"need at least two labels to train, found {sorted(set(labels))}")
+
+    model = train_model(texts, labels, n_features=args.n_features, epochs=args.epochs)
+    model.save(args.output)
+    print(json.dumps({"output": args.output, "labels": model.labels,
+                      "temperature": model.temperature, **model.metrics}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,16 @@ Replaces the local PersonaPlex model with the OpenAI Chat Completions API,
 maintaining the same interface and using the existing prompt templates.
 """
 
+from collections.abc import AsyncIterator
+
 import structlog
 from openai import AsyncOpenAI
 
 from app.config import get_settings
-from app.services.personaplex.prompts import SYSTEM_PROMPT, STRATEGY_PROMPTS, EMOTIONAL_RESPONSE_GUIDES
+from app.core.clients import get_openai_client
+from app.services.personaplex.history import ConversationHistory, count_tokens
+from app.services.personaplex.prompt_engine import prompt_engine
+from app.services.personaplex.prompts import FALLBACK_REPLY
 
 logger = structlog.get_logger()
 
@@ -17,32 +22,42 @@ logger = structlog.get_logger()
 class PersonaPlexClient:
     def __init__(self):
         self.settings = get_settings()
-        self._client: AsyncOpenAI | None = None
 
     def _get_client(self) -> AsyncOpenAI:
-        if self._client is None:
-            self._client = AsyncOpenAI(api_key=self.settings.openai_api_key)
-        return self._client
-
-    def _build_system_prompt(self, persona_config: dict | None) -> str:
-        config = persona_config or {}
-        base = SYSTEM_PROMPT.replace("${original_amount}", str(config.get("original_amount", "N/A")))
-        base = base.replace("${negotiable_amount}", str(config.get("negotiable_amount", "N/A")))
-        base = base.replace("${days_past_due}", str(config.get("days_past_due", "N/A")))
-        strategy = config.get("strategy", "empathetic")
-        base = base.replace("${strategy}", strategy)
+        return get_openai_client()
 
-        strategy_guide = STRATEGY_PROMPTS.get(strategy, "")
-        emotional_state = config.get("emotional_state", "cooperative")
-        emotional_guide = EMOTIONAL_RESPONSE_GUIDES.get(emotional_state, "")
-
-        return f"{base}\n\n{strategy_guide}\n\n{emotional_guide}"
+    def build_messages(
+        self,
+        text_input: str,
+        persona_config: dict | None,
+        conversation_history: ConversationHistory | list[dict] | None,
+        knowledge: list[str] | None = None,
+    ) -> list[dict]:
+        # Stable prefix first, then the history, then the per-turn section:
+        # consecutive turns share the longest possible cacheable prefix.
+        prompt = prompt_engine.render(
+            persona_config, knowledge, self.settings.knowledge_context_max_chars
+        )
+        messages = [{"role": "system", "content": prompt.prefix}]
+        if isinstance(conversation_history, ConversationHistory):
+            budget = (
+                self.settings.prompt_token_budget
+                - prompt.tokens
+                - count_tokens(text_input)
+            )
+            messages.extend(conversation_history.as_messages(max_tokens=budget))
+        elif conversation_history:
+            messages.extend(conversation_history)
+        messages.append({"role": "system", "content": prompt.suffix})
+        messages.append({"role": "user", "content": text_input})
+        return messages
 
     async def generate_text_response(
         self,
         text_input: str,
         persona_config: dict | None = None,
-        conversation_history: list[dict] | None = None,
+        conversation_history: ConversationHistory | list[dict] | None = None,
+        knowledge: list[str] | None = None,
     ) -> str:
         """
         Generate a text response using OpenAI GPT.
@@ -50,18 +65,17 @@ class PersonaPlexClient:
         Args:
             text_input: Transcribed user text.
             persona_config: Agent persona configuration (strategy, amounts, emotional_state).
-            conversation_history: Previous turns as list of {"role": ..., "content": ...}.
+            conversation_history: Previous turns, either a token-budgeted
+                ConversationHistory or a plain list of {"role": ..., "content": ...}.
+            knowledge: Knowledge base passages to ground the reply, most relevant first.
 
         Returns:
             Agent response text.
         """
         client = self._get_client()
-        system_prompt = self._build_system_prompt(persona_config)
-
-        messages = [{"role": "system", "content": system_prompt}]
-        if conversation_history:
-            messages.extend(conversation_history)
-        messages.append({"role": "user", "content": text_input})
+        messages = self.build_messages(
+            text_input, persona_config, conversation_history, knowledge
+        )
 
         try:
             response = await client.chat.completions.create(
@@ -71,9 +85,62 @@ class PersonaPlexClient:
                 max_tokens=300,
             )
             reply = response.choices[0].message.content.strip()
+            prompt_engine.record_usage(response.usage)
             logger.info("openai_response_generated", tokens=response.usage.total_tokens)
             return reply
 
         except Exception as e:
             logger.error("openai_error", error=str(e))
-            return "I understand your concern. Let me help you find the best solution for your situation."
+            return FALLBACK_REPLY
+
+    async def stream_text_response(
+        self,
+        text_input: str,
+        persona_config: dict | None = None,
+        conversation_history: ConversationHistory | list[dict] | None = None,
+        knowledge: list[str] | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Stream the agent response as text deltas using OpenAI GPT.
+
+        Takes the same arguments as generate_text_response. If the request
+        fails before any text was produced, the fallback reply is yielded
+        instead so the caller always has something to speak.
+
+        Yields:
+            Text deltas in generation order.
+        """
+        client = self._get_client()
+        messages = self.build_messages(
+            text_input, persona_config, conversation_history, knowledge
+        )
+        produced = False
+
+        try:
+            stream = await client.chat.completions.create(
+                model=self.settings.openai_model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=300,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        prompt_engine.record_usage(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        produced = True
+                        yield delta
+            finally:
+                # Release the pooled connection right away if the turn is cancelled.
+                await stream.close()
+            logger.info("openai_response_streamed")
+
+        except Exception as e:
+            logger.error("openai_stream_error", error=str(e))
+            if not produced:
+                yield FALLBACK_REPLY
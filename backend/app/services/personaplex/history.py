@@ -0,0 +1,251 @@
+"""
+Token-budgeted conversation history with rolling summarization.
+
+Keeps the last N turns verbatim and folds older turns into a running
+summary that a cheap model updates in the background, never on the
+critical path of a turn. Negotiation-critical facts (amounts, percentages,
+dates) found in folded turns are pinned and sent with the summary, up to
+a token cap (the oldest are dropped first: they are in the summary by
+then), and the rendered history is trimmed to fit the prompt token budget.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+
+import structlog
+
+from app.config import get_settings
+from app.core.clients import get_openai_client
+
+logger = structlog.get_logger()
+
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or encoding files unavailable
+    _encoding = None
+
+_FACT_PATTERN = re.compile(
+    r"[$€]\s?\d[\d.,]*"
+    r"|\d[\d.,]*\s?(?:%(?!\w)|(?:percent|por ciento|pesos|d[oó]lares|dollars|usd|cop)\b)"
+    r"|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b"
+    r"|\b\d+\s?(?:days|d[ií]as|months|meses|installments|cuotas)\b",
+    re.IGNORECASE,
+)
+_MAX_FACT_CHARS = 200
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """You maintain the running summary of a debt resolution phone call.
+Update the summary with the new turns below. Keep it under 120 words, in
+the third person, and preserve every commitment, objection, amount, date
+and payment option mentioned. Return only the updated summary."""
+
+_totals = {"calls": 0, "tokens_sent": 0, "tokens_saved": 0, "summaries": 0}
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+@dataclass
+class _Entry:
+    role: str
+    content: str
+    tokens: int
+
+    def as_message(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+
+class ConversationHistory:
+    def __init__(
+        self,
+        keep_turns: int = 6,
+        summary_model: str = "gpt-4o-mini",
+        max_fact_tokens: int = 300,
+    ):
+        self.keep_messages = keep_turns * 2
+        self.summary_model = summary_model
+        self.max_fact_tokens = max_fact_tokens
+        self.summary = ""
+        self.facts: list[str] = []
+        self._recent: list[_Entry] = []
+        self._pending: list[_Entry] = []
+        self._summary_task: asyncio.Task | None = None
+        self._full_tokens = 0
+        self.tokens_sent = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def from_settings(cls) -> "ConversationHistory":
+        settings = get_settings()
+        return cls(
+            keep_turns=settings.history_keep_turns,
+            summary_model=settings.openai_summary_model,
+            max_fact_tokens=settings.history_max_fact_tokens,
+        )
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._recent)
+
+    def add(self, role: str, content: str) -> None:
+        entry = _Entry(role, content, count_tokens(content) + _MESSAGE_OVERHEAD_TOKENS)
+        self._recent.append(entry)
+        self._full_tokens += entry.tokens
+
+        while len(self._recent) > self.keep_messages:
+            evicted = self._recent.pop(0)
+            self._pin_facts(evicted)
+            self._pending.append(evicted)
+        if self._pending:
+            self._schedule_summary()
+
+    def as_messages(self, max_tokens: int | None = None) -> list[dict]:
+        """
+        Render the history for the chat API.
+
+        Args:
+            max_tokens: Token budget for the rendered history, header included.
+                The oldest verbatim messages are dropped first, then the oldest
+                pinned facts, then the summary.
+        """
+        header = self._header(max_tokens)
+        budget = None if max_tokens is None else max_tokens - (header.tokens if header else 0)
+
+        # Turns not yet folded into the summary stay verbatim until they are.
+        entries = self._pending + self._recent
+        used = 0
+        kept: list[_Entry] = []
+        for entry in reversed(entries):
+            if budget is not None and used + entry.tokens > budget:
+                break
+            kept.append(entry)
+            used += entry.tokens
+        kept.reverse()
+
+        messages = [header.as_message()] if header else []
+        messages.extend(entry.as_message() for entry in kept)
+
+        sent = used + (header.tokens if header else 0)
+        saved = max(0, self._full_tokens - sent)
+        self.tokens_sent += sent
+        self.tokens_saved += saved
+        _totals["tokens_sent"] += sent
+        _totals["tokens_saved"] += saved
+        return messages
+
+    def _header(self, max_tokens: int | None = None) -> _Entry | None:
+        facts = list(self.facts)
+        while True:
+            header = self._render_header(self.summary, facts)
+            if header is None or max_tokens is None or header.tokens <= max_tokens:
+                return header
+            if facts:
+                facts.pop(0)
+            elif self.summary:
+                return None
+
+    @staticmethod
+    def _render_header(summary: str, facts: list[str]) -> _Entry | None:
+        if not summary and not facts:
+            return None
+        parts = []
+        if summary:
+            parts.append(f"Summary of the call so far: {summary}")
+        if facts:
+            parts.append("Key facts stated earlier (always honor these):")
+            parts.extend(f"- {fact}" for fact in facts)
+        content = "\n".join(parts)
+        return _Entry("system", content, count_tokens(content) + _MESSAGE_OVERHEAD_TOKENS)
+
+    def _pin_facts(self, entry: _Entry) -> None:
+        for sentence in re.split(r"(?<=[.!?])\s+", entry.content):
+            if _FACT_PATTERN.search(sentence):
+                fact = f"{entry.role}: {sentence.strip()[:_MAX_FACT_CHARS]}"
+                # A restated fact counts as the newest one.
+                if fact in self.facts:
+                    self.facts.remove(fact)
+                self.facts.append(fact)
+        self._trim_facts()
+
+    def _trim_facts(self) -> None:
+        # Drop the oldest facts over the cap; the summary keeps their amounts.
+        tokens = [count_tokens(fact) for fact in self.facts]
+        while tokens and sum(tokens) > self.max_fact_tokens:
+            self.facts.pop(0)
+            tokens.pop(0)
+
+    def _schedule_summary(self) -> None:
+        if self._summary_task is None or self._summary_task.done():
+            self._summary_task = asyncio.create_task(self._summarize())
+
+    async def _summarize(self) -> None:
+        while self._pending:
+            batch = list(self._pending)
+            turns = "\n".join(f"{e.role}: {e.content}" for e in batch)
+            try:
+                response = await get_openai_client().chat.completions.create(
+                    model=self.summary_model,
+                    messages=[
+                        {"role": "system", "content": SUMMARY_PROMPT},
+                        {
+                            "role": "user",
+                            "content": f"Current summary:\n{self.summary or '(none)'}\n\nNew turns:\n{turns}",
+                        },
+                    ],
+                    temperature=0.2,
+                    max_tokens=200,
+                )
+            except Exception as e:
+                # Keep the turns verbatim; the next eviction retries.
+                logger.warning("history_summary_error", error=str(e))
+                return
+
+            self.summary = response.choices[0].message.content.strip()
+            del self._pending[: len(batch)]
+            _totals["summaries"] += 1
+
+    def snapshot(self) -> dict:
+        """Compact JSON-serializable state, restored with restore() on another worker."""
+        return {
+            "summary": self.summary,
+            "facts": list(self.facts),
+            "messages": [[e.role, e.content, e.tokens] for e in self._pending + self._recent],
+            "pending": len(self._pending),
+            "full_tokens": self._full_tokens,
+        }
+
+    def restore(self, state: dict) -> None:
+        """Load a snapshot(); turns that were waiting to be summarized are scheduled again."""
+        entries = [_Entry(role, content, tokens) for role, content, tokens in state["messages"]]
+        pending = state["pending"]
+        self.summary = state["summary"]
+        self.facts = list(state["facts"])
+        self._trim_facts()
+        self._pending, self._recent = entries[:pending], entries[pending:]
+        self._full_tokens = state["full_tokens"]
+        if self._pending:
+            self._schedule_summary()
+
+    async def close(self) -> None:
+        if self._summary_task is not None:
+            self._summary_task.cancel()
+        _totals["calls"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "messages": len(self),
+            "summarized_pending": len(self._pending),
+            "pinned_facts": len(self.facts),
+            "tokens_sent": self.tokens_sent,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+def history_totals() -> dict[str, int]:
+    """Process-wide history token counters across all calls."""
+    return dict(_totals)
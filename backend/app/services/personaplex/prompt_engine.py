@@ -0,0 +1,135 @@
+"""
+Compiled, cache-friendly prompt assembly.
+
+Templates are compiled once at import and the static sections (base
+instructions + strategy guide, emotion guides) are memoized. The prompt is
+split in two system messages:
+
+- a stable prefix (instructions + strategy guide) sent first, so together
+  with the append-only history it matches the provider's prompt prefix
+  cache from one turn to the next;
+- a per-turn suffix (emotion guide + per-debtor variables + knowledge
+  passages retrieved for the turn) sent right before the user message.
+
+Usage reported by the API is accumulated to show how many prompt tokens
+were served from the provider cache.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from string import Template
+
+from app.services.personaplex.history import count_tokens
+from app.services.personaplex.prompts import (
+    SYSTEM_INSTRUCTIONS,
+    CONTEXT_TEMPLATE,
+    STRATEGY_PROMPTS,
+    EMOTIONAL_RESPONSE_GUIDES,
+    KNOWLEDGE_HEADER,
+)
+
+_CONTEXT = Template(CONTEXT_TEMPLATE)
+
+
+@dataclass(frozen=True)
+class RenderedPrompt:
+    prefix: str
+    suffix: str
+    tokens: int
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.suffix}"
+
+
+@lru_cache(maxsize=None)
+def _static_prefix(strategy: str) -> tuple[str, int]:
+    prefix = f"{SYSTEM_INSTRUCTIONS}\n{STRATEGY_PROMPTS.get(strategy, '')}".rstrip()
+    return prefix, count_tokens(prefix)
+
+
+@lru_cache(maxsize=None)
+def _emotion_guide(emotional_state: str) -> str:
+    return EMOTIONAL_RESPONSE_GUIDES.get(emotional_state, "")
+
+
+def compact_passages(passages: list[str], max_chars: int) -> list[str]:
+    """
+    Prepare retrieved passages for the prompt.
+
+    Whitespace is collapsed, passages repeated in (or contained in) another
+    one are dropped, and the rest are kept in relevance order until the
+    character budget is spent, the last one cut at a word boundary.
+    """
+    kept: list[str] = []
+    for passage in passages:
+        text = " ".join(passage.split())
+        if not text or any(text in other for other in kept):
+            continue
+        kept = [other for other in kept if other not in text]
+        kept.append(text)
+
+    compact, remaining = [], max_chars
+    for text in kept:
+        if len(text) > remaining:
+            cut = text[:remaining].rsplit(" ", 1)[0]
+            if cut:
+                compact.append(f"{cut}...")
+            break
+        compact.append(text)
+        remaining -= len(text)
+    return compact
+
+
+class PromptEngine:
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    def render(
+        self,
+        persona_config: dict | None,
+        knowledge: list[str] | None = None,
+        knowledge_max_chars: int = 1200,
+    ) -> RenderedPrompt:
+        config = persona_config or {}
+        strategy = config.get("strategy", "empathetic")
+        prefix, prefix_tokens = _static_prefix(strategy)
+
+        context = _CONTEXT.safe_substitute(
+            original_amount=config.get("original_amount", "N/A"),
+            negotiable_amount=config.get("negotiable_amount", "N/A"),
+            days_past_due=config.get("days_past_due", "N/A"),
+            strategy=strategy,
+        )
+        guide = _emotion_guide(config.get("emotional_state", "cooperative"))
+        suffix = f"{guide}\n\n{context}" if guide else context
+        if knowledge:
+            passages = compact_passages(knowledge, knowledge_max_chars)
+            if passages:
+                facts = "\n".join(f"- {passage}" for passage in passages)
+                suffix = f"{suffix}\n{KNOWLEDGE_HEADER}\n{facts}"
+        return RenderedPrompt(prefix, suffix, prefix_tokens + count_tokens(suffix))
+
+    def record_usage(self, usage) -> None:
+        """Accumulate the ``usage`` block of a chat completion response."""
+        if usage is None:
+            return
+        self.requests += 1
+        self.prompt_tokens += usage.prompt_tokens or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_prompt_tokens": self.cached_tokens,
+            "cache_hit_ratio": round(self.cached_tokens / self.prompt_tokens, 4)
+            if self.prompt_tokens
+            else 0.0,
+        }
+
+
+prompt_engine = PromptEngine()
@@ -0,0 +1,37 @@
+"""
+OpenAI embeddings through the shared connection pool.
+"""
+
+from app.config import get_settings
+from app.core.clients import get_openai_client
+
+
+async def embed_texts(texts: list[str], batch_size: int | None = None) -> list[list[float]]:
+    """
+    Embed texts in batched API calls.
+
+    Args:
+        texts: Texts to embed.
+        batch_size: Inputs per request; defaults to knowledge_embedding_batch_size.
+
+    Returns:
+        One embedding per text, in input order.
+    """
+    settings = get_settings()
+    batch_size = batch_size or settings.knowledge_embedding_batch_size
+    client = get_openai_client()
+
+    embeddings: list[list[float]] = []
+    for start in range(0, len(texts), batch_size):
+        response = await client.embeddings.create(
+            model=settings.openai_embedding_model,
+            input=texts[start:start + batch_size],
+            dimensions=settings.openai_embedding_dimensions,
+        )
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+    return embeddings
+
+
+async def embed_query(text: str) -> list[float]:
+    [embedding] = await embed_texts([text], batch_size=1)
+    return embedding
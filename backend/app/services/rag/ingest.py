@@ -0,0 +1,308 @@
+"""
+Incremental knowledge base ingestion.
+
+The ``knowledge_chunks`` table doubles as the manifest: every chunk is
+stored with the sha256 of its content, so a run only embeds chunks whose
+(source, hash) pair is new, reuses the vector of identical content that
+moved between files, and deletes chunks whose text or source file is gone.
+With an unchanged corpus a run costs one manifest query.
+
+With the in-process backend (KNOWLEDGE_BACKEND=mmap) or hybrid retrieval
+(KNOWLEDGE_HYBRID) every run that changes the corpus also exports the
+chunks, vectors and BM25 index to the memory-mapped index directory.
+
+Usage (from backend/):
+    python -m app.services.rag.ingest [--dir knowledge/] [--dry-run] [--export-index]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+import structlog
+from sqlalchemy import delete, func, insert, select, update
+
+from app.config import get_settings
+from app.core.database import async_session, engine
+from app.models.knowledge import KnowledgeChunk
+from app.services.rag.embeddings import embed_texts
+from app.services.rag.knowledge_base import KNOWLEDGE_DIR
+from app.services.rag.mmap_store import POINTER_FILE, write_index
+from app.services.rag.query_cache import get_query_cache
+
+logger = structlog.get_logger()
+
+_SEPARATORS = ("\n\n", "\n", ". ", " ", "")
+
+# Serializes concurrent runs (several workers starting at once).
+_INGEST_LOCK_KEY = 0x6B6E6F77
+
+
+@dataclass(frozen=True)
+class Chunk:
+    source: str
+    chunk_index: int
+    content: str
+    content_hash: str
+
+
+@dataclass
+class IngestReport:
+    files: int = 0
+    chunks: int = 0
+    unchanged: int = 0
+    added: int = 0
+    embedded: int = 0
+    reused: int = 0
+    reindexed: int = 0
+    deleted: int = 0
+    exported: int = 0  # rows written to the mmap index
+    skipped: bool = False  # another process held the ingest lock
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.deleted or self.reindexed)
+
+
+def _pieces(text: str, size: int, separators: tuple[str, ...]) -> list[str]:
+    """Break text into pieces no longer than size, at the coarsest separator possible."""
+    if len(text) <= size:
+        return [text]
+    separator, finer = separators[0], separators[1:]
+    if not separator:
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    parts = text.split(separator)
+    pieces = []
+    for i, part in enumerate(parts):
+        piece = part + separator if i < len(parts) - 1 else part
+        pieces.extend(_pieces(piece, size, finer))
+    return pieces
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+    """
+    Split a document into overlapping chunks of at most chunk_size characters.
+
+    Deterministic, so unchanged documents always produce the same chunk
+    hashes.
+    """
+    chunks: list[str] = []
+    window: list[str] = []
+    length = 0
+    for piece in _pieces(text, chunk_size, _SEPARATORS):
+        if window and length + len(piece) > chunk_size:
+            chunks.append("".join(window).strip())
+            while window and (length > chunk_overlap or length + len(piece) > chunk_size):
+                length -= len(window.pop(0))
+        window.append(piece)
+        length += len(piece)
+    if window:
+        chunks.append("".join(window).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def load_chunks(directory: Path) -> tuple[int, list[Chunk]]:
+    """
+    Read and split every .txt file under directory.
+
+    Returns:
+        (number of files, chunks with their content hash)
+    """
+    settings = get_settings()
+    files = sorted(directory.rglob("*.txt"))
+    chunks = []
+    for path in files:
+        source = path.relative_to(directory).as_posix()
+        document = path.read_text(encoding="utf-8")
+        for index, content in enumerate(
+            split_text(document, settings.knowledge_chunk_size, settings.knowledge_chunk_overlap)
+        ):
+            digest = hashlib.sha256(content.encode()).hexdigest()
+            chunks.append(Chunk(source, index, content, digest))
+    return len(files), chunks
+
+
+async def ingest_knowledge(directory: Path | None = None, dry_run: bool = False) -> IngestReport:
+    """
+    Bring knowledge_chunks in line with the documents on disk.
+
+    Args:
+        directory: Knowledge directory; defaults to the knowledge_dir setting.
+        dry_run: Compute the report without embedding or writing anything.
+
+    Raises:
+        FileNotFoundError: If the directory does not exist (an empty
+            directory is valid and empties the collection).
+    """
+    directory = directory or Path(get_settings().knowledge_dir or KNOWLEDGE_DIR)
+    if not directory.is_dir():
+        raise FileNotFoundError(f"knowledge directory not found: {directory}")
+
+    report = IngestReport()
+    report.files, chunks = load_chunks(directory)
+    wanted: dict[tuple[str, str], Chunk] = {}
+    for chunk in chunks:
+        wanted.setdefault((chunk.source, chunk.content_hash), chunk)
+    report.chunks = len(wanted)
+
+    async with async_session() as db:
+        locked = await db.scalar(select(func.pg_try_advisory_xact_lock(_INGEST_LOCK_KEY)))
+        if not locked:
+            report.skipped = True
+            return report
+
+        existing = {
+            (row.source, row.content_hash): row
+            for row in await db.execute(
+                select(
+                    KnowledgeChunk.id,
+                    KnowledgeChunk.source,
+                    KnowledgeChunk.content_hash,
+                    KnowledgeChunk.chunk_index,
+                )
+            )
+        }
+        stale = [row.id for key, row in existing.items() if key not in wanted]
+        new = [chunk for key, chunk in wanted.items() if key not in existing]
+        reindex = [
+            {"id": row.id, "chunk_index": wanted[key].chunk_index}
+            for key, row in existing.items()
+            if key in wanted and row.chunk_index != wanted[key].chunk_index
+        ]
+        report.unchanged = len(wanted) - len(new)
+        report.added = len(new)
+        report.deleted = len(stale)
+        report.reindexed = len(reindex)
+
+        # Identical text already embedded under another source: copy its vector.
+        reusable = {}
+        if new:
+            rows = await db.execute(
+                select(KnowledgeChunk.content_hash, KnowledgeChunk.embedding)
+                .where(KnowledgeChunk.content_hash.in_({c.content_hash for c in new}))
+                .distinct(KnowledgeChunk.content_hash)
+            )
+            reusable = {row.content_hash: row.embedding for row in rows}
+        to_embed = [c for c in new if c.content_hash not in reusable]
+        report.reused = len(new) - len(to_embed)
+        report.embedded = len(to_embed)
+
+        if dry_run or not (new or stale or reindex):
+            return report
+
+        vectors = dict(reusable)
+        if to_embed:
+            embeddings = await embed_texts([c.content for c in to_embed])
+            vectors.update((c.content_hash, e) for c, e in zip(to_embed, embeddings))
+
+        if stale:
+            await db.execute(delete(KnowledgeChunk).where(KnowledgeChunk.id.in_(stale)))
+        if reindex:
+            await db.execute(update(KnowledgeChunk), reindex)
+        if new:
+            await db.execute(
+                insert(KnowledgeChunk),
+                [
+                    {
+                        "source": c.source,
+                        "chunk_index": c.chunk_index,
+                        "content": c.content,
+                        "content_hash": c.content_hash,
+                        "embedding": vectors[c.content_hash],
+                        "metadata_json": {"document": Path(c.source).stem},
+                    }
+                    for c in new
+                ],
+            )
+        await db.commit()
+
+    version = await get_query_cache().bump_version()
+    logger.info("knowledge_ingested", collection_version=version, **asdict(report))
+    return report
+
+
+async def export_index(directory: Path) -> int:
+    """
+    Write every chunk to the index read by MmapVectorStore and MmapLexicalStore.
+
+    Returns:
+        Number of exported chunks.
+    """
+    async with async_session() as db:
+        rows = (
+            await db.execute(
+                select(
+                    KnowledgeChunk.content,
+                    KnowledgeChunk.source,
+                    KnowledgeChunk.metadata_json,
+                    KnowledgeChunk.embedding,
+                ).order_by(KnowledgeChunk.source, KnowledgeChunk.chunk_index)
+            )
+        ).all()
+
+    vectors = np.array([row.embedding for row in rows], dtype=np.float32).reshape(len(rows), -1)
+    chunks = [
+        {"content": row.content, "source": row.source, "metadata": row.metadata_json or {}}
+        for row in rows
+    ]
+    export = await asyncio.to_thread(write_index, directory, vectors, chunks)
+    logger.info("knowledge_index_exported", export=str(export), chunks=len(chunks))
+    return len(chunks)
+
+
+async def sync_knowledge(
+    directory: Path | None = None, dry_run: bool = False, export: bool | None = None
+) -> IngestReport:
+    """
+    Ingest, then refresh the mmap index when it is in use and out of date.
+
+    Args:
+        export: Force (True) or skip (False) the index export; by default
+            it follows the knowledge_backend and knowledge_hybrid settings.
+    """
+    settings = get_settings()
+    report = await ingest_knowledge(directory, dry_run=dry_run)
+    if export is None:
+        export = settings.knowledge_backend == "mmap" or settings.knowledge_hybrid
+    if export and not dry_run and not report.skipped:
+        index_dir = Path(settings.knowledge_index_dir)
+        if report.changed or not (index_dir / POINTER_FILE).exists():
+            report.exported = await export_index(index_dir)
+    return report
+
+
+async def ingest_in_background() -> None:
+    """Startup job: never fails the application, only logs."""
+    try:
+        await sync_knowledge()
+    except Exception as e:
+        logger.error("knowledge_ingest_error", error=str(e))
+
+
+async def _main(directory: Path | None, dry_run: bool, export: bool | None) -> IngestReport:
+    try:
+        return await sync_knowledge(directory, dry_run=dry_run, export=export)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Incrementally ingest the knowledge base.")
+    parser.add_argument("--dir", type=Path, help="Knowledge directory (default: backend/knowledge)")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without applying them")
+    parser.add_argument(
+        "--export-index", action="store_true", default=None,
+        help="Export the mmap/BM25 index even if no configured backend reads it",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args.dir, args.dry_run, args.export_index))
+    print(json.dumps(asdict(report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,231 @@
 """
 RAG-based knowledge base for debt collection domain knowledge.
 
-Uses OpenAI embeddings + pgvector for vector storage via LangChain.
+Uses OpenAI embeddings + pgvector for vector storage. Documents are
+embedded ahead of time by the incremental ingestion job
+(``python -m app.services.rag.ingest``); retrieval only embeds the query
+and searches either the pgvector HNSW index asynchronously or, for small
+corpora, an in-process memory-mapped index (``knowledge_backend``).
+Repeated questions are served from the query cache without either call.
+
+With ``knowledge_hybrid`` a BM25 index over the same chunks is searched
+first. Its ranking is fused with the vector ranking (reciprocal rank
+fusion), and when the lexical match is clearly confident (every query
+term in the best chunk, well ahead of the runner-up) the embedding call
+and vector search are skipped altogether.
+
+Live turns call ``retrieve_within``, which gives up after a deadline so
+a slow embedding call or database never delays the reply. The search
+itself runs on and fills the caches, so asking again is fast.
 """
 
+import asyncio
+
 import structlog
 from pathlib import Path
 
+from app.config import get_settings
+from app.services.rag.embeddings import embed_query
+from app.services.rag.mmap_store import MmapLexicalStore, MmapVectorStore
+from app.services.rag.query_cache import get_query_cache
+from app.services.rag.vector_store import Passage, PgVectorStore
+
 logger = structlog.get_logger()
 
 KNOWLEDGE_DIR = Path(__file__).parent.parent.parent.parent / "knowledge"
 
+# Vector candidates fetched per requested passage when fusing rankings.
+_FUSION_CANDIDATES = 4
+_RRF_K = 60
 
-class KnowledgeBase:
-    def __init__(self):
-        self.retriever = None
-        self.is_initialized = False
+# Searches that outlived their deadline, referenced until they finish.
+_late_searches: set[asyncio.Task] = set()
 
-    async def initialize(self):
-        """Load knowledge documents and create vector index with OpenAI embeddings."""
-        try:
-            from langchain_community.document_loaders import DirectoryLoader, TextLoader
-            from langchain_community.vectorstores import PGVector
-            from langchain_openai import OpenAIEmbeddings
-            from langchain.text_splitter import RecursiveCharacterTextSplitter
-            from app.config import get_settings
+_stats = {
+    "searches": 0,
+    "cache_hits": 0,
+    "lexical_short_circuits": 0,
+    "hybrid": 0,
+    "vector_only": 0,
+    "errors": 0,
+    "deadline_searches": 0,
+    "deadline_misses": 0,
+}
 
-            settings = get_settings()
 
-            embeddings = OpenAIEmbeddings(
-                model=settings.openai_embedding_model,
-                api_key=settings.openai_api_key,
-            )
+def _key(passage: Passage) -> tuple[str, str]:
+    return passage.source, passage.content
 
-            loader = DirectoryLoader(
-                str(KNOWLEDGE_DIR),
-                glob="**/*.txt",
-                loader_cls=TextLoader,
-            )
-            documents = loader.load()
 
-            if not documents:
-                logger.warning("knowledge_base_no_documents", path=str(KNOWLEDGE_DIR))
-                self.is_initialized = True
-                return
+def fuse_rankings(rankings: list[list[Passage]], top_k: int) -> list[Passage]:
+    """Reciprocal rank fusion; the fused score replaces the per-ranking scores."""
+    scores: dict[tuple[str, str], float] = {}
+    passages: dict[tuple[str, str], Passage] = {}
+    for ranking in rankings:
+        for rank, passage in enumerate(ranking):
+            key = _key(passage)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (_RRF_K + rank + 1)
+            passages.setdefault(key, passage)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [
+        Passage(passages[key].content, passages[key].source, scores[key], passages[key].metadata)
+        for key in best
+    ]
 
-            splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-            chunks = splitter.split_documents(documents)
 
-            # Use sync PGVector (LangChain community doesn't have full async support)
-            connection_string = settings.database_url.replace(
-                "postgresql+asyncpg://", "postgresql+psycopg2://"
-            )
-            vectorstore = PGVector.from_documents(
-                documents=chunks,
-                embedding=embeddings,
-                connection_string=connection_string,
-                collection_name="knowledge_base",
-                pre_delete_collection=False,
-            )
-            self.retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
-            self.is_initialized = True
-            logger.info("knowledge_base_initialized", chunks=len(chunks))
+def create_vector_store() -> PgVectorStore | MmapVectorStore:
+    settings = get_settings()
+    if settings.knowledge_backend == "mmap":
+        return MmapVectorStore(settings.knowledge_index_dir)
+    return PgVectorStore()
+
+
+class KnowledgeBase:
+    def __init__(
+        self,
+        store: PgVectorStore | MmapVectorStore | None = None,
+        lexical: MmapLexicalStore | None = None,
+    ):
+        settings = get_settings()
+        self.settings = settings
+        self.store = store or create_vector_store()
+        if lexical is None and settings.knowledge_hybrid:
+            lexical = MmapLexicalStore(settings.knowledge_index_dir)
+        self.lexical = lexical
+        self._lexical_missing_logged = False
+
+    def _lexical_search(
+        self, query: str, top_k: int, filters: dict | None
+    ) -> tuple[list[Passage], bool]:
+        """BM25 passages and whether they are confident enough to skip the vector search."""
+        if self.lexical is None:
+            return [], False
+        try:
+            passages, coverage = self.lexical.search(query, top_k, filters)
+        except FileNotFoundError as e:
+            if not self._lexical_missing_logged:
+                logger.warning("knowledge_lexical_index_missing", error=str(e))
+                self._lexical_missing_logged = True
+            return [], False
+
+        if not passages or coverage < 1.0:
+            return passages, False
+        top = passages[0].score
+        runner_up = passages[1].score if len(passages) > 1 else 0.0
+        confident = (
+            top >= self.settings.knowledge_lexical_min_score
+            and top >= runner_up * self.settings.knowledge_lexical_margin
+        )
+        return passages, confident
+
+    async def search(
+        self, query: str, top_k: int = 3, filters: dict | None = None
+    ) -> list[Passage]:
+        """
+        Retrieve the passages closest to a query, with their scores.
+
+        Args:
+            query: The search query.
+            top_k: Number of passages to retrieve.
+            filters: Metadata the passages must contain, e.g. {"document": "debt_reduction_law"}.
+
+        Returns:
+            Passages ordered by relevance; empty on errors.
+        """
+        cache = get_query_cache()
+        _stats["searches"] += 1
+        try:
+            passages = await cache.get_results(query, top_k, filters)
+            if passages is not None:
+                _stats["cache_hits"] += 1
+                return passages
 
+            lexical, confident = self._lexical_search(
+                query, top_k * _FUSION_CANDIDATES, filters
+            )
+            if confident:
+                _stats["lexical_short_circuits"] += 1
+                passages = lexical[:top_k]
+            else:
+                embedding = await cache.get_embedding(query)
+                if embedding is None:
+                    embedding = await embed_query(query)
+                    cache.put_embedding(query, embedding)
+
+                if lexical:
+                    _stats["hybrid"] += 1
+                    vector = await self.store.search(
+                        embedding, top_k=top_k * _FUSION_CANDIDATES, filters=filters
+                    )
+                    passages = fuse_rankings([vector, lexical], top_k)
+                else:
+                    _stats["vector_only"] += 1
+                    passages = await self.store.search(embedding, top_k=top_k, filters=filters)
+
+            await cache.put_results(query, top_k, filters, passages)
+            return passages
         except Exception as e:
-            logger.error("knowledge_base_init_error", error=str(e))
-            self.is_initialized = True  # mark as done to avoid retry loops
+            _stats["errors"] += 1
+            logger.error("knowledge_retrieve_error", error=str(e))
+            return []
 
-    async def retrieve(self, query: str, top_k: int = 3) -> list[str]:
+    async def retrieve(
+        self, query: str, top_k: int = 3, filters: dict | None = None
+    ) -> list[str]:
         """
         Retrieve relevant knowledge passages for a given query.
 
         Args:
             query: The search query.
             top_k: Number of passages to retrieve.
+            filters: Metadata the passages must contain.
 
         Returns:
             List of relevant text passages.
         """
-        if not self.is_initialized:
-            await self.initialize()
+        return [p.content for p in await self.search(query, top_k, filters)]
 
-        if self.retriever is None:
-            return []
+    async def retrieve_within(
+        self, query: str, timeout: float, top_k: int = 3, filters: dict | None = None
+    ) -> list[str]:
+        """
+        Retrieve passages, giving up after a deadline.
 
+        Args:
+            query: The search query.
+            timeout: Seconds to wait. A search past it is not cancelled:
+                it completes in the background and warms the caches.
+            top_k: Number of passages to retrieve.
+            filters: Metadata the passages must contain.
+
+        Returns:
+            List of relevant text passages; empty if the deadline passed.
+        """
+        _stats["deadline_searches"] += 1
+        task = asyncio.create_task(self.retrieve(query, top_k, filters))
         try:
-            results = self.retriever.invoke(query)
-            return [doc.page_content for doc in results[:top_k]]
-        except Exception as e:
-            logger.error("knowledge_retrieve_error", error=str(e))
-            return []
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            # Also when the turn itself is cancelled.
+            if not task.done():
+                _late_searches.add(task)
+                task.add_done_callback(_late_searches.discard)
+        if task in done:
+            return task.result()
+        _stats["deadline_misses"] += 1
+        return []
+
+
+_knowledge_base: KnowledgeBase | None = None
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    global _knowledge_base
+    if _knowledge_base is None:
+        _knowledge_base = KnowledgeBase()
+    return _knowledge_base
+
+
+def retrieval_stats() -> dict[str, int]:
+    """Process-wide retrieval path counters."""
+    return dict(_stats)
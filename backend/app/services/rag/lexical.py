@@ -0,0 +1,154 @@
+"""
+BM25 inverted index over the knowledge chunks.
+
+Built by the ingestion export and persisted next to the vectors:
+``lexical.json`` holds the vocabulary and parameters, and three ``.npy``
+arrays hold the postings (CSR layout: per-term offsets, chunk rows and
+the precomputed BM25 weight of each posting). Querying sums the weights
+of the query terms' postings, so scoring is a couple of vectorized NumPy
+operations with no per-document Python loop.
+
+Tokenization handles Spanish and English: lowercase, accents folded
+("prescripción" matches "prescripcion"), stopwords dropped and plural
+endings stripped.
+"""
+
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+LEXICAL_FILE = "lexical.json"
+OFFSETS_FILE = "lexical_offsets.npy"
+ROWS_FILE = "lexical_rows.npy"
+WEIGHTS_FILE = "lexical_weights.npy"
+
+_WORD = re.compile(r"\w+")
+
+STOPWORDS = frozenset(
+    """
+    a about an and are as at be but by can do does for from have how i if in
+    is it its me my no not of on or so that the their them there this to was
+    we what when which who will with would you your
+    al como con de del el en es esta este hay la las lo los me mi mis no o
+    para pero por que se si sin su sus te tu un una uno y ya yo
+    """.split()
+)
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _stem(token: str) -> str:
+    # Light plural folding shared by both languages, applied the same way to
+    # singulars so both forms meet: cuotas -> cuota, leyes/ley -> ley,
+    # deudores/deudor -> deudor, rules/rule -> rul.
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    if len(token) > 3 and token.endswith("e") and token[-2] in "lrndyz":
+        token = token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(token) for token in _WORD.findall(_fold(text)) if token not in STOPWORDS]
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        weights: np.ndarray,
+        n_chunks: int,
+    ):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.rows = rows
+        self.weights = weights
+        self.n_chunks = n_chunks
+
+    @classmethod
+    def build(cls, texts: list[str], k1: float = 1.2, b: float = 0.75) -> "LexicalIndex":
+        postings: dict[str, dict[int, int]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[row] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[row] = counts.get(row, 0) + 1
+
+        average = float(lengths.mean()) if len(texts) else 0.0
+        vocabulary = {term: i for i, term in enumerate(sorted(postings))}
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        rows, weights = [], []
+        for term, i in vocabulary.items():
+            counts = postings[term]
+            docs = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            idf = np.log(1 + (len(texts) - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = k1 * (1 - b + b * lengths[docs] / (average or 1))
+            rows.append(docs)
+            weights.append((idf * tf * (k1 + 1) / (tf + norm)).astype(np.float32))
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        return cls(
+            vocabulary,
+            offsets,
+            np.concatenate(rows) if rows else np.empty(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.empty(0, dtype=np.float32),
+            len(texts),
+        )
+
+    def save(self, directory: Path) -> None:
+        np.save(directory / OFFSETS_FILE, self.offsets)
+        np.save(directory / ROWS_FILE, self.rows)
+        np.save(directory / WEIGHTS_FILE, self.weights)
+        (directory / LEXICAL_FILE).write_text(
+            json.dumps({"n_chunks": self.n_chunks, "vocabulary": self.vocabulary}, ensure_ascii=False)
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> "LexicalIndex":
+        metadata = json.loads((directory / LEXICAL_FILE).read_text())
+        return cls(
+            metadata["vocabulary"],
+            np.load(directory / OFFSETS_FILE, mmap_mode="r"),
+            np.load(directory / ROWS_FILE, mmap_mode="r"),
+            np.load(directory / WEIGHTS_FILE, mmap_mode="r"),
+            metadata["n_chunks"],
+        )
+
+    def search(self, query: str, top_k: int) -> tuple[np.ndarray, np.ndarray, float]:
+        """
+        Score every chunk against a query.
+
+        Returns:
+            (rows, scores) of the best top_k chunks with a positive score,
+            best first, and the share of distinct query terms found in the
+            best chunk (0.0 when nothing matched).
+        """
+        query_terms = set(tokenize(query))
+        terms = [self.vocabulary[t] for t in query_terms if t in self.vocabulary]
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), 0.0
+
+        scores = np.zeros(self.n_chunks, dtype=np.float32)
+        matched = np.zeros(self.n_chunks, dtype=np.int32)
+        for term in terms:
+            start, end = self.offsets[term], self.offsets[term + 1]
+            rows = self.rows[start:end]
+            scores[rows] += self.weights[start:end]
+            matched[rows] += 1
+
+        hits = np.flatnonzero(scores)
+        k = min(top_k, len(hits))
+        best = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        best = best[np.argsort(-scores[best])]
+        return best, scores[best], float(matched[best[0]] / len(query_terms))
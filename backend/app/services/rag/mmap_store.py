@@ -0,0 +1,223 @@
+"""
+In-process vector index for small knowledge corpora.
+
+The ingestion job exports every chunk into an index directory:
+
+- ``vectors.npy``: contiguous float32 matrix (chunks x dimensions) of
+  L2-normalized embeddings, so cosine similarity is a dot product;
+- ``chunks.json``: content, source and metadata of each row;
+- the BM25 inverted index over the same rows (see ``lexical.py``).
+
+Exports are written to a fresh subdirectory and published by atomically
+replacing the ``CURRENT`` pointer file. Workers memory-map the matrix
+read-only, so every process on the host shares one copy through the page
+cache, and pick up a new export on their next search. Top-k is one
+vectorized dot product plus ``argpartition``: no database round trip.
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+import structlog
+
+from app.services.rag.lexical import LexicalIndex
+from app.services.rag.vector_store import Passage
+
+logger = structlog.get_logger()
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+POINTER_FILE = "CURRENT"
+_KEEP_EXPORTS = 2
+
+
+def write_index(directory: str | Path, vectors: np.ndarray, chunks: list[dict]) -> Path:
+    """
+    Publish a new index export.
+
+    Args:
+        directory: Index directory.
+        vectors: Embedding matrix, one row per chunk.
+        chunks: One {"content", "source", "metadata"} record per row.
+
+    Returns:
+        The export subdirectory that CURRENT now points to.
+    """
+    directory = Path(directory)
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(chunks), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    export = directory / f"export-{time.time_ns()}"
+    export.mkdir(parents=True)
+    np.save(export / VECTORS_FILE, vectors)
+    (export / CHUNKS_FILE).write_text(json.dumps(chunks, ensure_ascii=False))
+    LexicalIndex.build([chunk["content"] for chunk in chunks]).save(export)
+
+    pointer = directory / f"{POINTER_FILE}.tmp"
+    pointer.write_text(export.name)
+    os.replace(pointer, directory / POINTER_FILE)
+
+    # Older exports may still be mapped by running workers; unlinking them
+    # is safe on POSIX, the pages live until the last mapping is dropped.
+    exports = sorted(directory.glob("export-*"))
+    for old in exports[:-_KEEP_EXPORTS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return export
+
+
+def current_export(directory: Path) -> tuple[Path, int] | None:
+    """The published export and the pointer mtime, or None if nothing was exported."""
+    pointer = directory / POINTER_FILE
+    try:
+        mtime = pointer.stat().st_mtime_ns
+        return directory / pointer.read_text().strip(), mtime
+    except FileNotFoundError:
+        return None
+
+
+def _matches(metadata: dict, filters: dict) -> bool:
+    return all(metadata.get(key) == value for key, value in filters.items())
+
+
+class _ExportReader:
+    """Reloads its export when the CURRENT pointer changes."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._pointer_mtime: int | None = None
+        self._chunks: list[dict] = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._pointer_mtime is not None
+
+    def _refresh(self) -> None:
+        current = current_export(self.directory)
+        if current is None:
+            if not self.loaded:
+                raise FileNotFoundError(f"no knowledge index export in {self.directory}")
+            return
+        export, mtime = current
+        if mtime == self._pointer_mtime:
+            return
+        chunks = json.loads((export / CHUNKS_FILE).read_text())
+        self._load(export, chunks)
+        self._chunks = chunks
+        self._pointer_mtime = mtime
+        logger.info(
+            "knowledge_index_loaded",
+            export=export.name,
+            reader=type(self).__name__,
+            chunks=len(chunks),
+        )
+
+    def _load(self, export: Path, chunks: list[dict]) -> None:
+        raise NotImplementedError
+
+    def _passage(self, row: int, score: float) -> Passage:
+        chunk = self._chunks[row]
+        return Passage(chunk["content"], chunk["source"], score, chunk.get("metadata") or {})
+
+
+class MmapVectorStore(_ExportReader):
+    def __init__(self, directory: str | Path):
+        super().__init__(directory)
+        self._vectors: np.ndarray | None = None
+        self._postings: dict[tuple[str, str], np.ndarray] = {}
+
+    def _load(self, export: Path, chunks: list[dict]) -> None:
+        vectors = np.load(export / VECTORS_FILE, mmap_mode="r")
+        if vectors.shape[0] != len(chunks):
+            raise ValueError(f"knowledge index {export} is inconsistent")
+
+        postings: dict[tuple[str, str], list[int]] = {}
+        for row, chunk in enumerate(chunks):
+            for key, value in (chunk.get("metadata") or {}).items():
+                postings.setdefault((key, json.dumps(value, sort_keys=True)), []).append(row)
+
+        self._vectors = vectors
+        self._postings = {k: np.asarray(v, dtype=np.int64) for k, v in postings.items()}
+
+    def _candidates(self, filters: dict) -> np.ndarray:
+        rows = None
+        for key, value in filters.items():
+            posting = self._postings.get((key, json.dumps(value, sort_keys=True)))
+            if posting is None:
+                return np.empty(0, dtype=np.int64)
+            rows = posting if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+        return rows
+
+    async def search(
+        self,
+        embedding: list[float] | np.ndarray,
+        top_k: int = 3,
+        filters: dict | None = None,
+        ef_search: int | None = None,
+        exact: bool = False,
+    ) -> list[Passage]:
+        """
+        Nearest chunks to a query embedding.
+
+        Same interface as PgVectorStore.search; the scan is always exact, so
+        ef_search and exact are ignored.
+        """
+        self._refresh()
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if filters:
+            rows = self._candidates(filters)
+            scores = self._vectors[rows] @ query
+        else:
+            rows = None
+            scores = self._vectors @ query
+
+        k = min(top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+
+        return [
+            self._passage(int(rows[i]) if rows is not None else int(i), float(scores[i]))
+            for i in best
+        ]
+
+
+class MmapLexicalStore(_ExportReader):
+    """BM25 search over the same export, used by hybrid retrieval."""
+
+    def __init__(self, directory: str | Path):
+        super().__init__(directory)
+        self._index: LexicalIndex | None = None
+
+    def _load(self, export: Path, chunks: list[dict]) -> None:
+        index = LexicalIndex.load(export)
+        if index.n_chunks != len(chunks):
+            raise ValueError(f"knowledge index {export} is inconsistent")
+        self._index = index
+
+    def search(self, query: str, top_k: int, filters: dict | None = None) -> tuple[list[Passage], float]:
+        """
+        Returns:
+            The best passages by BM25 score and the share of query terms
+            found in the best one.
+        """
+        self._refresh()
+        # Over-fetch when filtering: rows are filtered after scoring.
+        rows, scores, coverage = self._index.search(query, top_k * 4 if filters else top_k)
+        passages = [self._passage(int(row), float(score)) for row, score in zip(rows, scores)]
+        if filters:
+            kept = [p for p in passages if _matches(p.metadata, filters)]
+            # Coverage describes the overall best row; void it if that row was filtered out.
+            if not kept or kept[0] is not passages[0]:
+                coverage = 0.0
+            passages = kept
+        return passages[:top_k], coverage
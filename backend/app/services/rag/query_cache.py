@@ -0,0 +1,179 @@
+"""
+Caches in front of knowledge base retrieval.
+
+Callers ask the same few questions over and over, so retrieval caches
+two things per normalized query:
+
+- the query embedding, as raw float32 bytes (model and dimensions are
+  part of the key), which saves the remote embedding call;
+- the final top-k passage list, keyed by (query, k, filters, collection
+  version), which also saves the vector query.
+
+Both live in a byte-bounded in-process LRU backed by a shared Redis tier
+with a TTL. The collection version is a Redis counter bumped by every
+ingestion that changes the corpus, so cached results of an older corpus
+are never served again.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+
+import numpy as np
+import structlog
+
+from app.config import get_settings
+from app.core.cache import MemoryTier, RedisTier
+from app.core.redis import get_redis
+from app.services.rag.vector_store import Passage
+
+logger = structlog.get_logger()
+
+_VERSION_KEY = "rag:collection_version"
+# How long a worker trusts its last read of the collection version.
+_VERSION_TTL = 2.0
+
+_PUNCTUATION = re.compile(r"[^\w\s']+")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", query.lower()).split())
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    def __init__(
+        self,
+        embeddings: MemoryTier,
+        results: MemoryTier,
+        shared_embeddings: RedisTier | None = None,
+        shared_results: RedisTier | None = None,
+    ):
+        self.embeddings = embeddings
+        self.results = results
+        self.shared_embeddings = shared_embeddings
+        self.shared_results = shared_results
+        self._version = 0
+        self._version_read_at = 0.0
+        self._background: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(cls) -> "QueryCache":
+        settings = get_settings()
+        redis_enabled = settings.rag_cache_redis_enabled
+        return cls(
+            embeddings=MemoryTier(settings.rag_cache_memory_bytes),
+            results=MemoryTier(settings.rag_cache_memory_bytes),
+            shared_embeddings=RedisTier(
+                settings.rag_cache_redis_bytes, prefix="rag:emb:", ttl=settings.rag_embedding_cache_ttl
+            )
+            if redis_enabled
+            else None,
+            shared_results=RedisTier(
+                settings.rag_cache_redis_bytes, prefix="rag:res:", ttl=settings.rag_result_cache_ttl
+            )
+            if redis_enabled
+            else None,
+        )
+
+    async def _get(self, memory: MemoryTier, shared: RedisTier | None, key: str) -> bytes | None:
+        value = memory.get(key)
+        if value is None and shared is not None:
+            value = await shared.get(key)
+            if value is not None:
+                memory.put(key, value)
+        return value
+
+    def _put(self, memory: MemoryTier, shared: RedisTier | None, key: str, value: bytes) -> None:
+        memory.put(key, value)
+        if shared is not None:
+            task = asyncio.create_task(shared.put(key, value))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    @staticmethod
+    def _embedding_key(query: str) -> str:
+        settings = get_settings()
+        return _digest(
+            settings.openai_embedding_model,
+            str(settings.openai_embedding_dimensions),
+            normalize_query(query),
+        )
+
+    async def get_embedding(self, query: str) -> np.ndarray | None:
+        value = await self._get(self.embeddings, self.shared_embeddings, self._embedding_key(query))
+        return None if value is None else np.frombuffer(value, dtype=np.float32)
+
+    def put_embedding(self, query: str, embedding: list[float] | np.ndarray) -> None:
+        value = np.asarray(embedding, dtype=np.float32).tobytes()
+        self._put(self.embeddings, self.shared_embeddings, self._embedding_key(query), value)
+
+    async def _results_key(self, query: str, top_k: int, filters: dict | None) -> str:
+        version = await self.collection_version()
+        return _digest(
+            normalize_query(query),
+            str(top_k),
+            json.dumps(filters or {}, sort_keys=True),
+            str(version),
+        )
+
+    async def get_results(self, query: str, top_k: int, filters: dict | None) -> list[Passage] | None:
+        key = await self._results_key(query, top_k, filters)
+        value = await self._get(self.results, self.shared_results, key)
+        if value is None:
+            return None
+        return [Passage(**passage) for passage in json.loads(value)]
+
+    async def put_results(
+        self, query: str, top_k: int, filters: dict | None, passages: list[Passage]
+    ) -> None:
+        key = await self._results_key(query, top_k, filters)
+        value = json.dumps([passage.__dict__ for passage in passages]).encode("utf-8")
+        self._put(self.results, self.shared_results, key, value)
+
+    async def collection_version(self) -> int:
+        if self.shared_results is None:
+            return self._version
+        now = time.monotonic()
+        if now - self._version_read_at > _VERSION_TTL:
+            self._version_read_at = now
+            try:
+                self._version = int(await get_redis().get(_VERSION_KEY) or 0)
+            except Exception as e:
+                logger.warning("rag_cache_version_error", error=str(e))
+        return self._version
+
+    async def bump_version(self) -> int:
+        """Invalidate every cached result list; called after an ingestion changes the corpus."""
+        if self.shared_results is not None:
+            try:
+                self._version = int(await get_redis().incr(_VERSION_KEY))
+                self._version_read_at = time.monotonic()
+                return self._version
+            except Exception as e:
+                logger.warning("rag_cache_version_error", error=str(e))
+        self._version += 1
+        return self._version
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        stats = {"embeddings": self.embeddings.stats(), "results": self.results.stats()}
+        if self.shared_embeddings is not None:
+            stats["embeddings_redis"] = self.shared_embeddings.stats()
+        if self.shared_results is not None:
+            stats["results_redis"] = self.shared_results.stats()
+        return stats
+
+
+_cache: QueryCache | None = None
+
+
+def get_query_cache() -> QueryCache:
+    global _cache
+    if _cache is None:
+        _cache = QueryCache.from_settings()
+    return _cache
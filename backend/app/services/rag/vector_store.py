@@ -0,0 +1,74 @@
+"""
+Async pgvector search over knowledge_chunks.
+
+Runs on the application's asyncpg engine, so a lookup never blocks the
+event loop. Nearest neighbours come from the HNSW index on the embedding
+column (cosine distance); ``ef_search`` trades recall for latency per
+query.
+"""
+
+from dataclasses import dataclass, field
+
+from sqlalchemy import Table, func, select
+
+from app.config import get_settings
+from app.core.database import async_session
+from app.models.knowledge import KnowledgeChunk
+
+
+@dataclass
+class Passage:
+    content: str
+    source: str
+    score: float  # higher is more relevant: cosine similarity, BM25 or fused rank score
+    metadata: dict = field(default_factory=dict)
+
+
+class PgVectorStore:
+    def __init__(self, table: Table | None = None):
+        self.table = table if table is not None else KnowledgeChunk.__table__
+
+    async def search(
+        self,
+        embedding: list[float],
+        top_k: int = 3,
+        filters: dict | None = None,
+        ef_search: int | None = None,
+        exact: bool = False,
+    ) -> list[Passage]:
+        """
+        Nearest chunks to a query embedding.
+
+        Args:
+            embedding: Query vector.
+            top_k: Number of passages to return.
+            filters: Metadata the chunks must contain (JSONB containment).
+                The HNSW scan considers ef_search candidates before
+                filtering, so very selective filters may need a larger
+                ef_search to fill top_k.
+            ef_search: HNSW candidate list size for this query; defaults
+                to the knowledge_hnsw_ef_search setting.
+            exact: Skip the index and scan every row (ground truth for
+                recall measurements).
+        """
+        columns = self.table.c
+        distance = columns.embedding.cosine_distance(embedding)
+        query = (
+            select(columns.content, columns.source, columns.metadata_json, distance.label("distance"))
+            .order_by(distance)
+            .limit(top_k)
+        )
+        if filters:
+            query = query.where(columns.metadata_json.contains(filters))
+
+        ef_search = ef_search or get_settings().knowledge_hnsw_ef_search
+        async with async_session() as db, db.begin():
+            # Transaction-local settings: pooled connections are not affected.
+            await db.execute(select(func.set_config("hnsw.ef_search", str(ef_search), True)))
+            if exact:
+                await db.execute(select(func.set_config("enable_indexscan", "off", True)))
+            rows = await db.execute(query)
+            return [
+                Passage(row.content, row.source, 1.0 - row.distance, row.metadata_json or {})
+                for row in rows
+            ]
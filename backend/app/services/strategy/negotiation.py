@@ -8,6 +8,34 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Rules shared with the vectorized portfolio planner (planner.py).
+# Strategy forced by the detected emotional state; "cooperative" moves to
+# "firm" after FIRM_AFTER_TURNS turns, anything else keeps the current one.
+EMOTION_STRATEGIES = {
+    "aggressive": "empathetic",
+    "anxious": "empathetic",
+    "evasive": "informative",
+    "defensive": "informative",
+}
+FIRM_AFTER_TURNS = 3
+# No offer before this turn.
+OFFER_MIN_TURNS = 2
+# (days past due strictly above, discount factor), checked in order.
+DISCOUNT_TIERS = ((365, 0.4), (180, 0.55), (90, 0.7))
+DEFAULT_DISCOUNT = 0.85
+RISK_MULTIPLIERS = {"high": 0.85, "low": 1.1}
+# (days past due strictly above, urgency level), checked in order.
+URGENCY_THRESHOLDS = ((300, "high"), (150, "medium"))
+DEFAULT_URGENCY = "low"
+TONES = {
+    "aggressive": "calm_professional",
+    "anxious": "warm_reassuring",
+    "cooperative": "friendly_professional",
+    "evasive": "patient_persistent",
+    "defensive": "transparent_respectful",
+}
+DEFAULT_TONE = "professional"
+
 
 @dataclass
 class NegotiationContext:
@@ -62,38 +90,24 @@ class NegotiationEngine:
         return action
 
     def _select_strategy(self, ctx: NegotiationContext) -> str:
-        if ctx.emotional_state == "aggressive":
-            return "empathetic"
-        if ctx.emotional_state == "anxious":
-            return "empathetic"
-        if ctx.emotional_state == "evasive":
-            return "informative"
-        if ctx.emotional_state == "defensive":
-            return "informative"
-        if ctx.emotional_state == "cooperative":
-            if ctx.turn_count > 3:
-                return "firm"
-            return ctx.current_strategy
+        if ctx.emotional_state in EMOTION_STRATEGIES:
+            return EMOTION_STRATEGIES[ctx.emotional_state]
+        if ctx.emotional_state == "cooperative" and ctx.turn_count > FIRM_AFTER_TURNS:
+            return "firm"
         return ctx.current_strategy
 
     def _calculate_offer(self, ctx: NegotiationContext) -> float | None:
-        if ctx.turn_count < 2:
+        if ctx.turn_count < OFFER_MIN_TURNS:
             return None  # too early to make an offer
 
-        discount_factor = 1.0
-        if ctx.days_past_due > 365:
-            discount_factor = 0.4
-        elif ctx.days_past_due > 180:
-            discount_factor = 0.55
-        elif ctx.days_past_due > 90:
-            discount_factor = 0.7
-        else:
-            discount_factor = 0.85
-
-        if ctx.risk_profile == "high":
-            discount_factor *= 0.85
-        elif ctx.risk_profile == "low":
-            discount_factor *= 1.1
+        discount_factor = DEFAULT_DISCOUNT
+        for days, factor in DISCOUNT_TIERS:
+            if ctx.days_past_due > days:
+                discount_factor = factor
+                break
+
+        if ctx.risk_profile in RISK_MULTIPLIERS:
+            discount_factor *= RISK_MULTIPLIERS[ctx.risk_profile]
 
         offer = max(ctx.negotiable_amount, ctx.original_amount * discount_factor)
         return round(offer, 2)
@@ -136,18 +150,10 @@ class NegotiationEngine:
         return points
 
     def _determine_tone(self, ctx: NegotiationContext) -> str:
-        tone_map = {
-            "aggressive": "calm_professional",
-            "anxious": "warm_reassuring",
-            "cooperative": "friendly_professional",
-            "evasive": "patient_persistent",
-            "defensive": "transparent_respectful",
-        }
-        return tone_map.get(ctx.emotional_state, "professional")
+        return TONES.get(ctx.emotional_state, DEFAULT_TONE)
 
     def _assess_urgency(self, ctx: NegotiationContext) -> str:
-        if ctx.days_past_due > 300:
-            return "high"
-        if ctx.days_past_due > 150:
-            return "medium"
-        return "low"
+        for days, level in URGENCY_THRESHOLDS:
+            if ctx.days_past_due > days:
+                return level
+        return DEFAULT_URGENCY
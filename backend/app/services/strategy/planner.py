@@ -0,0 +1,290 @@
+"""
+Portfolio-scale negotiation planner.
+
+Applies the NegotiationEngine rules (strategy by emotional profile,
+days-past-due discount tiers, risk multipliers, the negotiable-amount
+floor, urgency thresholds) to whole columns of debtors with NumPy instead
+of one NegotiationContext at a time. Categorical columns are fixed-width
+unicode arrays; the emotional state is encoded once so strategy and tone
+are table lookups, and the numeric rules are masked assignments.
+
+``plan_portfolio`` walks the debtor book in primary-key order (keyset
+pagination, one short transaction per chunk, the next chunk read while
+the current one is written) and upserts the plans into
+``negotiation_plans``.
+
+Usage (from backend/):
+    python -m app.services.strategy.planner [--chunk-size 20000]
+        [--strategy empathetic] [--turn-count 2] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import async_session, engine
+from app.models.debtor import Debtor
+from app.models.negotiation import NegotiationPlan
+from app.services.strategy.negotiation import (
+    DEFAULT_DISCOUNT,
+    DEFAULT_TONE,
+    DEFAULT_URGENCY,
+    DISCOUNT_TIERS,
+    EMOTION_STRATEGIES,
+    FIRM_AFTER_TURNS,
+    OFFER_MIN_TURNS,
+    RISK_MULTIPLIERS,
+    TONES,
+    URGENCY_THRESHOLDS,
+)
+
+logger = structlog.get_logger()
+
+# Planning happens before the call: the strategy is the one the agent opens
+# with, and the offer the one it would make at the first offer turn.
+DEFAULT_TURN_COUNT = OFFER_MIN_TURNS
+
+
+@dataclass
+class BatchPlan:
+    strategy: np.ndarray
+    offer_amount: np.ndarray  # NaN where no offer is made yet
+    tone: np.ndarray
+    urgency_level: np.ndarray
+
+
+@dataclass
+class PlanReport:
+    debtors: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.debtors / self.seconds if self.seconds else 0.0
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    """round(x, 2) element-wise, matching Python's correctly rounded result."""
+    rounded = np.round(values, 2)
+    # np.round scales by 100 first, which can land on the other side of a
+    # tie; the few values near one are rounded again by Python.
+    scaled = values * 100
+    near_tie = np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    if len(near_tie):
+        rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+    return rounded
+
+
+def plan_batch(
+    original_amount: np.ndarray,
+    negotiable_amount: np.ndarray,
+    days_past_due: np.ndarray,
+    risk_profile: np.ndarray,
+    emotional_state: np.ndarray,
+    current_strategy: np.ndarray | str = "empathetic",
+    turn_count: np.ndarray | int = DEFAULT_TURN_COUNT,
+) -> BatchPlan:
+    """
+    Vectorized NegotiationEngine.determine_action, without talking points.
+
+    Args:
+        original_amount: Float amounts, one per debtor.
+        negotiable_amount: Float amounts, one per debtor.
+        days_past_due: Integer days, one per debtor.
+        risk_profile: String array (low, medium, high).
+        emotional_state: String array; empty for unknown.
+        current_strategy: Strategy kept when the emotion does not force one,
+            per debtor or for all.
+        turn_count: Conversation turn the plan is for, per debtor or for all.
+
+    Returns:
+        The plan columns, row-aligned with the inputs.
+    """
+    original_amount = np.asarray(original_amount, dtype=np.float64)
+    negotiable_amount = np.asarray(negotiable_amount, dtype=np.float64)
+    days_past_due = np.asarray(days_past_due)
+    risk_profile = np.asarray(risk_profile, dtype=str)
+    emotional_state = np.asarray(emotional_state, dtype=str)
+    turn_count = np.asarray(turn_count)
+    n = len(original_amount)
+
+    # Encode the emotional state once; strategy and tone are table lookups.
+    states = list(dict.fromkeys([*EMOTION_STRATEGIES, *TONES, "cooperative"]))
+    state = np.full(n, len(states), dtype=np.int8)
+    for code, name in enumerate(states):
+        state[emotional_state == name] = code
+
+    forced = np.array([EMOTION_STRATEGIES.get(name, "") for name in states] + [""])[state]
+    kept = np.where(
+        (state == states.index("cooperative")) & (turn_count > FIRM_AFTER_TURNS),
+        "firm",
+        np.asarray(current_strategy, dtype=str),
+    )
+    strategy = np.where(forced != "", forced, kept)
+
+    discount = np.full(n, DEFAULT_DISCOUNT)
+    # Tiers are checked from the highest threshold down; assign in reverse
+    # so the first matching tier wins, as in the engine.
+    for days, factor in reversed(DISCOUNT_TIERS):
+        discount[days_past_due > days] = factor
+    for profile, multiplier in RISK_MULTIPLIERS.items():
+        mask = risk_profile == profile
+        discount[mask] = discount[mask] * multiplier
+
+    offer = _round_cents(np.maximum(negotiable_amount, original_amount * discount))
+    offer[np.broadcast_to(turn_count < OFFER_MIN_TURNS, (n,))] = np.nan
+
+    tone = np.array([TONES.get(name, DEFAULT_TONE) for name in states] + [DEFAULT_TONE])[state]
+
+    urgency = np.full(n, DEFAULT_URGENCY, dtype="U16")
+    for days, level in reversed(URGENCY_THRESHOLDS):
+        urgency[days_past_due > days] = level
+
+    return BatchPlan(strategy, offer, tone, urgency)
+
+
+async def _read_chunk(after: uuid.UUID | None, size: int) -> list[tuple]:
+    stmt = (
+        select(
+            Debtor.id,
+            Debtor.original_amount,
+            Debtor.negotiable_amount,
+            Debtor.days_past_due,
+            Debtor.risk_profile,
+            func.coalesce(Debtor.emotional_profile, ""),
+        )
+        .order_by(Debtor.id)
+        .limit(size)
+    )
+    if after is not None:
+        stmt = stmt.where(Debtor.id > after)
+    async with async_session() as db:
+        return (await db.execute(stmt)).all()
+
+
+async def _write_plans(ids: tuple[uuid.UUID, ...], plan: BatchPlan) -> None:
+    offers = [None if np.isnan(offer) else offer for offer in plan.offer_amount.tolist()]
+    records = [
+        {
+            "debtor_id": debtor_id,
+            "strategy": strategy,
+            "offer_amount": offer,
+            "tone": tone,
+            "urgency_level": urgency,
+        }
+        for debtor_id, strategy, offer, tone, urgency in zip(
+            ids,
+            plan.strategy.tolist(),
+            offers,
+            plan.tone.tolist(),
+            plan.urgency_level.tolist(),
+        )
+    ]
+    stmt = insert(NegotiationPlan)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[NegotiationPlan.debtor_id],
+        set_={
+            "strategy": stmt.excluded.strategy,
+            "offer_amount": stmt.excluded.offer_amount,
+            "tone": stmt.excluded.tone,
+            "urgency_level": stmt.excluded.urgency_level,
+            "planned_at": func.now(),
+        },
+    )
+    async with async_session() as db:
+        await db.execute(stmt, records)
+        await db.commit()
+
+
+async def plan_portfolio(
+    chunk_size: int = 20_000,
+    strategy: str = "empathetic",
+    turn_count: int = DEFAULT_TURN_COUNT,
+    dry_run: bool = False,
+) -> PlanReport:
+    """
+    Plan every debtor and upsert the results into negotiation_plans.
+
+    Args:
+        chunk_size: Debtors read, planned and written per transaction.
+        strategy: Strategy kept when the emotional profile does not force one.
+        turn_count: Conversation turn the plan is for.
+        dry_run: Plan without writing.
+
+    Returns:
+        Counts and throughput of the run.
+    """
+    report = PlanReport()
+    started = time.perf_counter()
+    rows = await _read_chunk(None, chunk_size)
+    while rows:
+        ids, original, negotiable, days, risk, emotion = zip(*rows)
+        # Keyset pagination: the next chunk is read while this one is written.
+        next_rows = (
+            asyncio.create_task(_read_chunk(ids[-1], chunk_size))
+            if len(rows) == chunk_size
+            else None
+        )
+        try:
+            plan = plan_batch(
+                np.asarray(original),
+                np.asarray(negotiable),
+                np.asarray(days),
+                np.asarray(risk),
+                np.asarray(emotion),
+                current_strategy=strategy,
+                turn_count=turn_count,
+            )
+            if not dry_run:
+                await _write_plans(ids, plan)
+        except BaseException:
+            if next_rows is not None:
+                next_rows.cancel()
+            raise
+        report.debtors += len(rows)
+        report.chunks += 1
+        rows = await next_rows if next_rows is not None else []
+
+    report.seconds = round(time.perf_counter() - started, 3)
+    logger.info(
+        "negotiation_portfolio_planned",
+        dry_run=dry_run,
+        rows_per_second=round(report.rows_per_second),
+        **asdict(report),
+    )
+    return report
+
+
+async def _main(chunk_size: int, strategy: str, turn_count: int, dry_run: bool) -> PlanReport:
+    try:
+        return await plan_portfolio(chunk_size, strategy, turn_count, dry_run)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Plan the opening negotiation for every debtor.")
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument(
+        "--strategy", default="empathetic",
+        help="Strategy kept when the emotional profile does not force one",
+    )
+    parser.add_argument("--turn-count", type=int, default=DEFAULT_TURN_COUNT)
+    parser.add_argument("--dry-run", action="store_true", help="Plan without writing")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args.chunk_size, args.strategy, args.turn_count, args.dry_run))
+    print(json.dumps(asdict(report), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Audio codecs for the conversation socket.
+
+Uplink audio can arrive as raw 16 kHz PCM, raw Opus packets, or Opus in a
+WebM stream (what browsers' MediaRecorder produces). Decoders work
+incrementally: every chunk received from the socket is turned into
+16 kHz mono 16-bit PCM right away, ready for the VAD, without buffering
+the whole recording.
+
+Downlink audio is only measured and cut: audio_duration() tells how long
+the agent audio sent so far plays, to track what the caller has heard, and
+aligned_length() where a streamed response can be split into frames a
+streaming player can append.
+"""
+
+import structlog
+
+logger = structlog.get_logger()
+
+INPUT_CODECS = ("pcm", "opus", "webm-opus")
+OUTPUT_CODECS = ("mp3", "opus", "pcm")
+
+# OpenAI TTS "pcm" output: 24 kHz, 16-bit, mono, little-endian.
+PCM_OUTPUT_SAMPLE_RATE = 24000
+
+_TARGET_RATE = 16000
+
+# MPEG Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5.
+_MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by MPEG version bits (3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5).
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_OPUS_GRANULE_RATE = 48000
+
+# EBML / Matroska element IDs
+_SEGMENT = 0x18538067
+_CLUSTER = 0x1F43B675
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_BLOCK_GROUP = 0xA0
+_SIMPLE_BLOCK = 0xA3
+_BLOCK = 0xA1
+_CODEC_PRIVATE = 0x63A2
+
+_MASTER_ELEMENTS = {_SEGMENT, _CLUSTER, _TRACKS, _TRACK_ENTRY, _BLOCK_GROUP}
+_PAYLOAD_ELEMENTS = {_SIMPLE_BLOCK, _BLOCK, _CODEC_PRIVATE}
+
+
+class CodecError(Exception):
+    pass
+
+
+def _read_vint(buf: bytearray, pos: int, keep_marker: bool) -> tuple[int, int] | None:
+    """Read an EBML variable-length integer. Returns (value, length) or None if incomplete."""
+    if pos >= len(buf):
+        return None
+    first = buf[pos]
+    if first == 0:
+        raise CodecError("invalid EBML variable-length integer")
+    length = 8 - first.bit_length() + 1
+    if pos + length > len(buf):
+        return None
+    value = first if keep_marker else first & (0xFF >> length)
+    for i in range(1, length):
+        value = (value << 8) | buf[pos + i]
+    return value, length
+
+
+class WebMOpusDemuxer:
+    """
+    Minimal incremental WebM demuxer for a single Opus audio track.
+
+    Descends into the container elements and returns the Opus packets
+    carried by (Simple)Blocks; everything else is skipped without being
+    buffered.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._skip = 0
+        self.codec_private: bytes | None = None
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._buf.extend(data)
+        packets = []
+        while True:
+            if self._skip:
+                n = min(self._skip, len(self._buf))
+                del self._buf[:n]
+                self._skip -= n
+                if self._skip:
+                    break
+
+            element_id = _read_vint(self._buf, 0, keep_marker=True)
+            if element_id is None:
+                break
+            size = _read_vint(self._buf, element_id[1], keep_marker=False)
+            if size is None:
+                break
+            header_len = element_id[1] + size[1]
+            unknown_size = size[0] == (1 << (7 * size[1])) - 1
+
+            if element_id[0] in _MASTER_ELEMENTS:
+                del self._buf[:header_len]
+                continue
+
+            if unknown_size:
+                raise CodecError(f"unknown-size element {element_id[0]:#x}")
+
+            if element_id[0] not in _PAYLOAD_ELEMENTS:
+                del self._buf[:header_len]
+                self._skip = size[0]
+                continue
+
+            end = header_len + size[0]
+            if len(self._buf) < end:
+                break
+            payload = bytes(self._buf[header_len:end])
+            del self._buf[:end]
+
+            if element_id[0] == _CODEC_PRIVATE:
+                self.codec_private = payload
+            else:
+                packet = self._block_payload(payload)
+                if packet:
+                    packets.append(packet)
+        return packets
+
+    @staticmethod
+    def _block_payload(block: bytes) -> bytes | None:
+        track = _read_vint(bytearray(block[:8]), 0, keep_marker=False)
+        if track is None:
+            return None
+        flags = block[track[1] + 2]
+        if flags & 0x06:
+            # Laced blocks are not produced by browser recorders.
+            logger.warning("webm_laced_block_skipped")
+            return None
+        return block[track[1] + 3 :]
+
+
+class PcmDecoder:
+    def decode(self, data: bytes) -> bytes:
+        return data
+
+
+class OpusDecoder:
+    """Decodes Opus packets (optionally demuxed from WebM) to 16 kHz mono PCM."""
+
+    def __init__(self, container: str | None = None):
+        try:
+            import av
+        except ImportError as e:
+            raise CodecError("Opus input requires the 'av' package") from e
+
+        self._av = av
+        self._demuxer = WebMOpusDemuxer() if container == "webm" else None
+        self._codec = None
+        self._resampler = av.AudioResampler(format="s16", layout="mono", rate=_TARGET_RATE)
+
+    def _context(self):
+        if self._codec is None:
+            codec = self._av.CodecContext.create("opus", "r")
+            codec.sample_rate = 48000
+            if self._demuxer is not None and self._demuxer.codec_private:
+                codec.extradata = self._demuxer.codec_private
+            self._codec = codec
+        return self._codec
+
+    def decode(self, data: bytes) -> bytes:
+        packets = self._demuxer.feed(data) if self._demuxer is not None else [data]
+        if not packets:
+            return b""
+
+        codec = self._context()
+        pcm = []
+        for packet in packets:
+            for frame in codec.decode(self._av.Packet(packet)):
+                for resampled in self._resampler.resample(frame):
+                    pcm.append(resampled.to_ndarray().tobytes())
+        return b"".join(pcm)
+
+
+def create_decoder(codec: str) -> PcmDecoder | OpusDecoder:
+    """
+    Build an incremental uplink decoder.
+
+    Args:
+        codec: One of INPUT_CODECS.
+
+    Raises:
+        CodecError: If the codec is unknown or its dependency is missing.
+    """
+    if codec == "pcm":
+        return PcmDecoder()
+    if codec == "opus":
+        return OpusDecoder()
+    if codec == "webm-opus":
+        return OpusDecoder(container="webm")
+    raise CodecError(f"unsupported input codec: {codec}")
+
+
+def _mp3_duration(audio: bytes) -> float:
+    pos = 0
+    if audio[:3] == b"ID3" and len(audio) >= 10:
+        pos = 10 + ((audio[6] & 0x7F) << 21 | (audio[7] & 0x7F) << 14
+                    | (audio[8] & 0x7F) << 7 | audio[9] & 0x7F)
+    seconds = 0.0
+    while pos + 4 <= len(audio):
+        if audio[pos] != 0xFF or audio[pos + 1] & 0xE0 != 0xE0:
+            pos += 1
+            continue
+        version = (audio[pos + 1] >> 3) & 0x03
+        layer = (audio[pos + 1] >> 1) & 0x03
+        bitrate_index = audio[pos + 2] >> 4
+        rate_index = (audio[pos + 2] >> 2) & 0x03
+        if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            pos += 1
+            continue
+        mpeg1 = version == 3
+        rate = _MP3_SAMPLE_RATES[version][rate_index]
+        samples = 1152 if mpeg1 else 576
+        length = samples // 8 * _MP3_BITRATES[mpeg1][bitrate_index] * 1000 // rate
+        length += (audio[pos + 2] >> 1) & 0x01
+        if pos + length > len(audio):
+            break  # the rest of the frame has not been sent yet
+        seconds += samples / rate
+        pos += length
+    return seconds
+
+
+def _ogg_pages(audio: bytes):
+    """Yield (granule position, end offset) of every complete Ogg page."""
+    pos = 0
+    while (pos := audio.find(b"OggS", pos)) != -1 and pos + 27 <= len(audio):
+        body = pos + 27 + audio[pos + 26]
+        if body > len(audio):
+            return
+        end = body + sum(audio[pos + 27 : body])
+        if end > len(audio):
+            return  # incomplete page
+        yield int.from_bytes(audio[pos + 6 : pos + 14], "little", signed=True), end
+        pos = end
+
+
+def _ogg_opus_duration(audio: bytes) -> float:
+    head = audio.find(b"OpusHead")
+    pre_skip = (
+        int.from_bytes(audio[head + 10 : head + 12], "little")
+        if head != -1 and head + 12 <= len(audio)
+        else 0
+    )
+    granule = max((granule for granule, _ in _ogg_pages(audio)), default=0)
+    return max(granule - pre_skip, 0) / _OPUS_GRANULE_RATE
+
+
+def audio_duration(audio: bytes, codec: str) -> float:
+    """
+    Playback duration in seconds of downlink audio, possibly cut mid-stream.
+
+    Only complete MP3 frames and Ogg pages are counted.
+
+    Args:
+        audio: Audio of one TTS response, from its first byte.
+        codec: One of OUTPUT_CODECS.
+    """
+    if codec == "pcm":
+        return len(audio) // 2 / PCM_OUTPUT_SAMPLE_RATE
+    if codec == "mp3":
+        return _mp3_duration(audio)
+    if codec == "opus":
+        return _ogg_opus_duration(audio)
+    raise CodecError(f"unsupported output codec: {codec}")
+
+
+def aligned_length(audio: bytes, codec: str) -> int:
+    """
+    Length of the longest prefix of streamed downlink audio made of whole
+    units: Ogg pages for opus, 16-bit samples for pcm.
+
+    Args:
+        audio: Audio of one TTS response, from its first byte or from the end
+            of the previous aligned prefix.
+        codec: "opus" or "pcm"; mp3 is sent whole and never cut.
+    """
+    if codec == "pcm":
+        return len(audio) - len(audio) % 2
+    if codec == "opus":
+        return max((end for _, end in _ogg_pages(audio)), default=0)
+    raise CodecError(f"unsupported streamed codec: {codec}")
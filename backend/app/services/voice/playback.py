@@ -0,0 +1,117 @@
+"""
+What the caller has heard of the agent's reply.
+
+Replies are synthesized and sent faster than real time, so when the
+caller talks over the agent most of the reply has usually been sent but
+not played yet. The tracker records, for every segment (sentence) of a
+reply, when its audio was sent and how long it plays, and estimates how
+far playback got:
+
+- from the client's playback reports, when it sends them, extrapolated
+  in real time since the last one;
+- otherwise from the send times, assuming a segment starts playing when
+  its audio arrives or when the previous one ends, whichever is later.
+
+A segment cut mid-way is kept up to the same fraction of its words.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+
+from app.services.voice.codecs import audio_duration
+
+
+@dataclass
+class _PlayedSegment:
+    text: str
+    sent_at: float
+    audio: bytearray = field(default_factory=bytearray)
+    # Set once all of the segment's audio has been sent.
+    duration: float | None = None
+
+
+def _prefix(text: str, fraction: float) -> str:
+    words = text.split()
+    return " ".join(words[: int(len(words) * fraction)])
+
+
+class PlaybackTracker:
+    """
+    Playback timeline of one reply.
+
+    Args:
+        reply_id: Identifies the reply in the client's playback reports.
+        codec: Output codec of the audio, one of OUTPUT_CODECS.
+    """
+
+    def __init__(self, reply_id: int, codec: str):
+        self.reply_id = reply_id
+        self.codec = codec
+        self.segments: list[_PlayedSegment] = []
+        self.stopped_at: float | None = None
+        self._report: tuple[int, float, float] | None = None
+
+    def start_segment(self, text: str) -> int:
+        """Register a segment whose audio is about to be sent; returns its index."""
+        self.end_segment()
+        self.segments.append(_PlayedSegment(text.strip(), time.monotonic()))
+        return len(self.segments) - 1
+
+    def add_audio(self, chunk: bytes) -> None:
+        self.segments[-1].audio.extend(chunk)
+
+    def end_segment(self) -> None:
+        if self.segments and self.segments[-1].duration is None:
+            segment = self.segments[-1]
+            segment.duration = audio_duration(bytes(segment.audio), self.codec)
+            segment.audio = bytearray()
+
+    def report(self, segment: int, position: float) -> None:
+        """The client is playing `segment`, `position` seconds in."""
+        if 0 <= segment < len(self.segments):
+            self._report = (segment, max(position, 0.0), time.monotonic())
+
+    def stop(self) -> None:
+        """The client was told to stop playback now."""
+        if self.stopped_at is None:
+            self.stopped_at = time.monotonic()
+
+    def _spans(self) -> list[tuple[float, float]]:
+        spans = []
+        end: float | None = None
+        for index, segment in enumerate(self.segments):
+            if self._report is not None and index <= self._report[0]:
+                reported, position, at = self._report
+                start = at - position if index == reported else -math.inf
+            else:
+                start = segment.sent_at if end is None else max(segment.sent_at, end)
+            duration = segment.duration
+            if duration is None:
+                duration = audio_duration(bytes(segment.audio), self.codec)
+            end = start + duration
+            spans.append((start, end))
+        return spans
+
+    def ends_at(self) -> float:
+        """Estimated monotonic time at which the audio sent so far has been played."""
+        spans = self._spans()
+        return spans[-1][1] if spans else time.monotonic()
+
+    def heard(self) -> tuple[str, bool]:
+        """
+        Text of the reply played until now, or until stop().
+
+        Returns:
+            The heard text and whether all the audio sent was played.
+        """
+        now = self.stopped_at if self.stopped_at is not None else time.monotonic()
+        parts = []
+        for segment, (start, end) in zip(self.segments, self._spans()):
+            if now >= end:
+                parts.append(segment.text)
+                continue
+            if now > start:
+                parts.append(_prefix(segment.text, (now - start) / (end - start)))
+            return " ".join(part for part in parts if part), False
+        return " ".join(parts), True
@@ -0,0 +1,71 @@
+"""
+Incremental sentence segmenter for streamed LLM output.
+
+Accumulates text deltas and emits complete sentences (or long clauses)
+as soon as they are closed, so each segment can be synthesized while
+the rest of the reply is still being generated.
+"""
+
+import re
+
+# Sentence terminator (optionally followed by closing quotes/brackets) + whitespace.
+_SENTENCE_END = re.compile(r"[.!?…]+[\"'”»)\]]*\s+")
+# Clause boundary: only used once the buffer is long enough to be worth a TTS call.
+_CLAUSE_END = re.compile(r"[,;:—]\s+")
+
+
+class SentenceSegmenter:
+    def __init__(self, min_clause_chars: int = 40, max_chars: int = 240):
+        self.min_clause_chars = min_clause_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> list[str]:
+        """
+        Add a text delta and return every segment completed by it.
+
+        Args:
+            delta: Next chunk of streamed text.
+
+        Returns:
+            Completed segments, in order. May be empty.
+        """
+        self._buffer += delta
+        segments = []
+        while True:
+            segment = self._next_segment()
+            if segment is None:
+                break
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> str | None:
+        """Return whatever text is left once the stream has ended."""
+        tail = self._buffer.strip()
+        self._buffer = ""
+        return tail or None
+
+    def _next_segment(self) -> str | None:
+        match = _SENTENCE_END.search(self._buffer)
+        if match:
+            return self._cut(match.end())
+
+        if len(self._buffer) >= self.min_clause_chars:
+            cut = None
+            for match in _CLAUSE_END.finditer(self._buffer):
+                if match.start() >= self.min_clause_chars:
+                    cut = match.end()
+                    break
+            if cut is not None:
+                return self._cut(cut)
+
+        if len(self._buffer) >= self.max_chars:
+            cut = self._buffer.rfind(" ", 0, self.max_chars)
+            return self._cut(cut + 1 if cut > 0 else self.max_chars)
+
+        return None
+
+    def _cut(self, index: int) -> str:
+        segment, self._buffer = self._buffer[:index], self._buffer[index:]
+        return segment.strip()
@@ -4,32 +4,29 @@ Speech-to-Text service using OpenAI Whisper API.
 Converts raw audio bytes to text transcription.
 """
 
-import io
-import wave
+import struct
 import structlog
-from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.core.clients import get_openai_client
 
 logger = structlog.get_logger()
 
 
-def _get_client() -> AsyncOpenAI:
-    settings = get_settings()
-    return AsyncOpenAI(api_key=settings.openai_api_key)
+def wav_header(data_size: int, sample_rate: int = 16000) -> bytes:
+    """44-byte RIFF/WAVE header for mono 16-bit PCM of ``data_size`` bytes."""
+    byte_rate = sample_rate * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sample_rate, byte_rate, 2, 16,
+        b"data", data_size,
+    )
 
 
-def _wrap_pcm_as_wav(audio_bytes: bytes, sample_rate: int = 16000) -> io.BytesIO:
+def _wrap_pcm_as_wav(audio_bytes: bytes, sample_rate: int = 16000) -> bytes:
     """Wrap raw 16-bit PCM bytes into a WAV container for the OpenAI API."""
-    buffer = io.BytesIO()
-    with wave.open(buffer, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)  # 16-bit
-        wf.setframerate(sample_rate)
-        wf.writeframes(audio_bytes)
-    buffer.seek(0)
-    buffer.name = "audio.wav"
-    return buffer
+    return b"".join((wav_header(len(audio_bytes), sample_rate), audio_bytes))
 
 
 async def transcribe_audio(audio_bytes: bytes) -> str | None:
@@ -37,7 +34,8 @@ async def transcribe_audio(audio_bytes: bytes) -> str | None:
     Transcribe audio bytes to text using OpenAI Whisper API.
 
     Args:
-        audio_bytes: Raw audio data (16kHz, mono, 16-bit PCM).
+        audio_bytes: Raw audio data (16kHz, mono, 16-bit PCM), or the same
+            already framed as WAV (as emitted by the VAD endpointer).
 
     Returns:
         Transcribed text or None if transcription fails.
@@ -46,13 +44,16 @@ async def transcribe_audio(audio_bytes: bytes) -> str | None:
         return None
 
     settings = get_settings()
-    client = _get_client()
+    client = get_openai_client()
 
     try:
-        wav_buffer = _wrap_pcm_as_wav(audio_bytes)
+        if audio_bytes[:4] == b"RIFF":
+            wav_bytes = audio_bytes
+        else:
+            wav_bytes = _wrap_pcm_as_wav(audio_bytes)
         response = await client.audio.transcriptions.create(
             model=settings.openai_stt_model,
-            file=wav_buffer,
+            file=("audio.wav", wav_bytes, "audio/wav"),
             language="es",
         )
         text = response.text.strip()
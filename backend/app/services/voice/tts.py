@@ -1,49 +1,175 @@
 """
 Text-to-Speech service using OpenAI TTS API.
 
-Converts text responses to audio (MP3) for playback to the user.
+Converts text responses to audio (MP3 by default, or streamable Opus/PCM)
+for playback to the user. Repeated utterances are served from the
+content-addressed TTS cache.
 """
 
+import asyncio
+from collections.abc import AsyncIterator
+
 import structlog
-from openai import AsyncOpenAI
 
 from app.config import get_settings
+from app.core.clients import get_openai_client
+from app.services.voice.codecs import aligned_length
+from app.services.voice.segmenter import SentenceSegmenter
+from app.services.voice.tts_cache import cache_key, get_tts_cache
 
 logger = structlog.get_logger()
 
+_STREAM_CHUNK_BYTES = 4096
+
+
+def _take_aligned(buffer: bytearray, audio_format: str) -> bytes | None:
+    """Remove and return the whole pages / samples at the start of `buffer`."""
+    length = aligned_length(buffer, audio_format)
+    if not length:
+        return None
+    chunk = bytes(buffer[:length])
+    del buffer[:length]
+    return chunk
+
 
-def _get_client() -> AsyncOpenAI:
+def _speech_cache_key(text: str, audio_format: str) -> str:
     settings = get_settings()
-    return AsyncOpenAI(api_key=settings.openai_api_key)
+    return cache_key(
+        settings.openai_tts_model, settings.openai_tts_voice, audio_format, text
+    )
 
 
-async def synthesize_speech(text: str) -> bytes | None:
+async def synthesize_speech(text: str, audio_format: str = "mp3") -> bytes | None:
     """
     Convert text to speech audio using OpenAI TTS API.
 
     Args:
         text: The text to synthesize.
+        audio_format: mp3, opus (Ogg) or pcm (24 kHz 16-bit mono).
 
     Returns:
-        Audio bytes (MP3 format) or None if synthesis fails.
+        Audio bytes in the requested format or None if synthesis fails.
     """
     if not text:
         return None
 
     settings = get_settings()
-    client = _get_client()
+    cache = get_tts_cache()
+    key = _speech_cache_key(text, audio_format)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    client = get_openai_client()
 
     try:
         response = await client.audio.speech.create(
             model=settings.openai_tts_model,
             voice=settings.openai_tts_voice,
             input=text,
-            response_format="mp3",
+            response_format=audio_format,
         )
         audio_bytes = response.content
         logger.info("tts_synthesized", text_length=len(text), audio_size=len(audio_bytes))
+        cache.put(key, audio_bytes)
         return audio_bytes
 
     except Exception as e:
         logger.error("tts_error", error=str(e))
         return None
+
+
+async def stream_speech(text: str, audio_format: str) -> AsyncIterator[bytes]:
+    """
+    Stream synthesized speech in chunks as the TTS API produces them.
+
+    Meant for the streamable formats (opus, pcm). Every chunk holds whole
+    Ogg pages (opus) or whole 16-bit samples (pcm), so a streaming player
+    can append it as it arrives; cache hits are replayed the same way.
+    Complete streams are written to the cache.
+
+    Yields:
+        Audio chunks in the requested format.
+    """
+    if not text:
+        return
+
+    settings = get_settings()
+    cache = get_tts_cache()
+    key = _speech_cache_key(text, audio_format)
+    cached = await cache.get(key)
+    buffer = bytearray()
+    if cached is not None:
+        for start in range(0, len(cached), _STREAM_CHUNK_BYTES):
+            buffer.extend(cached[start : start + _STREAM_CHUNK_BYTES])
+            if aligned := _take_aligned(buffer, audio_format):
+                yield aligned
+        if buffer:
+            yield bytes(buffer)
+        return
+
+    client = get_openai_client()
+    chunks: list[bytes] = []
+
+    try:
+        async with client.audio.speech.with_streaming_response.create(
+            model=settings.openai_tts_model,
+            voice=settings.openai_tts_voice,
+            input=text,
+            response_format=audio_format,
+        ) as response:
+            async for chunk in response.iter_bytes(_STREAM_CHUNK_BYTES):
+                chunks.append(chunk)
+                buffer.extend(chunk)
+                if aligned := _take_aligned(buffer, audio_format):
+                    yield aligned
+    except Exception as e:
+        logger.error("tts_stream_error", error=str(e))
+        return
+    if buffer:
+        yield bytes(buffer)
+
+    audio_bytes = b"".join(chunks)
+    logger.info("tts_streamed", text_length=len(text), audio_size=len(audio_bytes))
+    cache.put(key, audio_bytes)
+
+
+def speech_segments(text: str) -> list[str]:
+    """The sentence segments the streaming turn pipeline synthesizes for a text."""
+    settings = get_settings()
+    segmenter = SentenceSegmenter(
+        min_clause_chars=settings.tts_segment_min_chars,
+        max_chars=settings.tts_segment_max_chars,
+    )
+    segments = segmenter.feed(text)
+    tail = segmenter.flush()
+    if tail:
+        segments.append(tail)
+    return segments
+
+
+async def prewarm_speech_cache(
+    phrases: list[str], formats: list[str], concurrency: int = 4
+) -> None:
+    """
+    Synthesize hot phrases into the cache ahead of the first call.
+
+    Args:
+        phrases: Lines spoken verbatim; each is warmed whole and split into
+            the sentence segments the streaming turn pipeline requests.
+        formats: Output formats to warm, as negotiated by the clients.
+        concurrency: TTS requests in flight.
+    """
+    texts: set[str] = set()
+    for phrase in phrases:
+        texts.add(phrase)
+        texts.update(speech_segments(phrase))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def warm(text: str, audio_format: str) -> None:
+        async with semaphore:
+            await synthesize_speech(text, audio_format)
+
+    await asyncio.gather(*(warm(text, fmt) for text in texts for fmt in formats))
+    logger.info("tts_cache_prewarmed", phrases=len(texts), formats=formats)
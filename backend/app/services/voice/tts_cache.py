@@ -0,0 +1,155 @@
+"""
+Content-addressed cache for synthesized speech.
+
+Audio is keyed by a hash of (model, voice, format, normalized text) and
+stored in up to three tiers: a bounded in-process LRU, a shared Redis
+tier and an optional on-disk tier. Every tier evicts least-recently-used
+entries once it exceeds its byte budget and keeps hit/miss counters.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from app.config import get_settings
+from app.core.cache import CacheTier, MemoryTier, RedisTier
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def cache_key(model: str, voice: str, audio_format: str, text: str) -> str:
+    payload = "\x1f".join((model, voice, audio_format, normalize_text(text)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier(CacheTier):
+    """On-disk tier; file mtime doubles as the LRU timestamp."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__(max_bytes)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = sum(p.stat().st_size for p in self.directory.glob("*.audio"))
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.audio"
+
+    async def get(self, key: str) -> bytes | None:
+        audio = await asyncio.to_thread(self._read, self._path(key))
+        if audio is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return audio
+
+    async def put(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_bytes:
+            return
+        await asyncio.to_thread(self._write, self._path(key), audio)
+
+    @staticmethod
+    def _read(path: Path) -> bytes | None:
+        try:
+            audio = path.read_bytes()
+            os.utime(path)
+            return audio
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: Path, audio: bytes) -> None:
+        with self._lock:
+            self._write_locked(path, audio)
+
+    def _write_locked(self, path: Path, audio: bytes) -> None:
+        previous = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(audio)
+        os.replace(tmp, path)
+        self._bytes += len(audio) - previous
+        if self._bytes > self.max_bytes:
+            files = sorted(self.directory.glob("*.audio"), key=lambda p: p.stat().st_mtime)
+            for old in files:
+                if self._bytes <= self.max_bytes:
+                    break
+                if old == path:
+                    continue
+                size = old.stat().st_size
+                old.unlink(missing_ok=True)
+                self._bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {**super().stats(), "bytes": self._bytes}
+
+
+class TTSCache:
+    def __init__(
+        self,
+        memory: MemoryTier,
+        redis: RedisTier | None = None,
+        disk: DiskTier | None = None,
+    ):
+        self.memory = memory
+        self.redis = redis
+        self.disk = disk
+        self._background: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(cls) -> "TTSCache":
+        settings = get_settings()
+        return cls(
+            memory=MemoryTier(settings.tts_cache_memory_bytes),
+            redis=RedisTier(settings.tts_cache_redis_bytes, prefix="tts:")
+            if settings.tts_cache_redis_enabled
+            else None,
+            disk=DiskTier(settings.tts_cache_disk_dir, settings.tts_cache_disk_bytes)
+            if settings.tts_cache_disk_dir
+            else None,
+        )
+
+    async def get(self, key: str) -> bytes | None:
+        audio = self.memory.get(key)
+        if audio is not None:
+            return audio
+
+        for tier in (self.redis, self.disk):
+            if tier is None:
+                continue
+            audio = await tier.get(key)
+            if audio is not None:
+                self.memory.put(key, audio)
+                return audio
+        return None
+
+    def put(self, key: str, audio: bytes) -> None:
+        """Store in memory now; write the shared tiers in the background."""
+        self.memory.put(key, audio)
+        for tier in (self.redis, self.disk):
+            if tier is None:
+                continue
+            task = asyncio.create_task(tier.put(key, audio))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        stats = {"memory": self.memory.stats()}
+        if self.redis is not None:
+            stats["redis"] = self.redis.stats()
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
+
+
+_cache: TTSCache | None = None
+
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    if _cache is None:
+        _cache = TTSCache.from_settings()
+    return _cache
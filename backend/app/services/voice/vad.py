@@ -0,0 +1,178 @@
+"""
+Voice activity detection and utterance endpointing.
+
+Buffers incoming 16 kHz, mono, 16-bit PCM from the conversation socket,
+classifies fixed-size frames as speech or silence with a vectorized
+energy / zero-crossing-rate test, and emits one trimmed utterance when
+end-of-speech is detected.
+"""
+
+from collections import deque
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.voice.stt import wav_header
+
+_SAMPLE_WIDTH = 2  # 16-bit PCM
+
+
+class UtteranceEndpointer:
+    """
+    Stateful endpointer for a single audio stream.
+
+    Speech starts after ``min_speech_ms`` of consecutive voiced frames and
+    ends after ``hangover_ms`` of silence, or when the utterance reaches
+    ``max_utterance_ms``. Leading and trailing silence is trimmed down to
+    ``padding_ms`` so the STT model still gets a clean onset/offset.
+
+    With ``emit_wav`` the utterance is joined straight into a WAV container,
+    so it can be uploaded to STT without another full-buffer copy.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: int = 30,
+        energy_threshold: float = 500.0,
+        noise_multiplier: float = 3.0,
+        zcr_max: float = 0.35,
+        min_speech_ms: int = 120,
+        hangover_ms: int = 600,
+        max_utterance_ms: int = 15000,
+        padding_ms: int = 150,
+        emit_wav: bool = False,
+    ):
+        self.sample_rate = sample_rate
+        self.emit_wav = emit_wav
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * _SAMPLE_WIDTH
+        self.energy_threshold = energy_threshold
+        self.noise_multiplier = noise_multiplier
+        self.zcr_max = zcr_max
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.max_utterance_frames = max(1, max_utterance_ms // frame_ms)
+        self.padding_frames = padding_ms // frame_ms
+
+        self._pending = bytearray()
+        self._preroll: deque[bytes] = deque(maxlen=self.padding_frames)
+        self._onset: list[bytes] = []
+        self._utterance: list[bytes] = []
+        self._silence_run = 0
+        self._noise_floor = 0.0
+        self.in_speech = False
+
+    @classmethod
+    def from_settings(cls, emit_wav: bool = False) -> "UtteranceEndpointer":
+        settings = get_settings()
+        return cls(
+            frame_ms=settings.vad_frame_ms,
+            energy_threshold=settings.vad_energy_threshold,
+            noise_multiplier=settings.vad_noise_multiplier,
+            zcr_max=settings.vad_zcr_max,
+            min_speech_ms=settings.vad_min_speech_ms,
+            hangover_ms=settings.vad_hangover_ms,
+            max_utterance_ms=settings.vad_max_utterance_ms,
+            padding_ms=settings.vad_padding_ms,
+            emit_wav=emit_wav,
+        )
+
+    def feed(self, pcm: bytes) -> list[bytes]:
+        """
+        Add raw PCM and return every utterance completed by it.
+
+        Args:
+            pcm: Raw 16-bit little-endian mono PCM of any length.
+
+        Returns:
+            Completed utterances as PCM (or WAV) bytes, in order. May be empty.
+        """
+        self._pending.extend(pcm)
+        n_frames = len(self._pending) // self.frame_bytes
+        if n_frames == 0:
+            return []
+
+        block = bytes(self._pending[: n_frames * self.frame_bytes])
+        del self._pending[: n_frames * self.frame_bytes]
+
+        voiced = self._classify(block, n_frames)
+        utterances = []
+        for i, is_speech in enumerate(voiced):
+            frame = block[i * self.frame_bytes : (i + 1) * self.frame_bytes]
+            utterance = self._step(frame, bool(is_speech))
+            if utterance:
+                utterances.append(utterance)
+        return utterances
+
+    def flush(self) -> bytes | None:
+        """Emit the utterance in progress, if any (e.g. on disconnect)."""
+        utterance = self._finish() if self.in_speech else None
+        self._pending.clear()
+        self._onset.clear()
+        self._preroll.clear()
+        return utterance
+
+    def _classify(self, block: bytes, n_frames: int) -> np.ndarray:
+        samples = (
+            np.frombuffer(block, dtype="<i2")
+            .reshape(n_frames, self.frame_samples)
+            .astype(np.float32)
+        )
+        energy = np.sqrt(np.mean(samples * samples, axis=1))
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (
+            self.frame_samples - 1
+        )
+
+        threshold = max(self.energy_threshold, self._noise_floor * self.noise_multiplier)
+        # High-ZCR frames only count as speech when clearly above the threshold
+        # (fricatives); otherwise they are treated as broadband noise.
+        voiced = (energy > threshold) & ((zcr < self.zcr_max) | (energy > 2 * threshold))
+
+        quiet = energy[~voiced]
+        if quiet.size:
+            level = float(np.median(quiet))
+            self._noise_floor = (
+                level if self._noise_floor == 0.0 else 0.9 * self._noise_floor + 0.1 * level
+            )
+        return voiced
+
+    def _step(self, frame: bytes, is_speech: bool) -> bytes | None:
+        if not self.in_speech:
+            if not is_speech:
+                if self._onset:
+                    # Too short to be speech: fold it back into the pre-roll.
+                    self._preroll.extend(self._onset)
+                    self._onset.clear()
+                self._preroll.append(frame)
+                return None
+
+            self._onset.append(frame)
+            if len(self._onset) >= self.min_speech_frames:
+                self.in_speech = True
+                self._utterance = [*self._preroll, *self._onset]
+                self._preroll.clear()
+                self._onset.clear()
+                self._silence_run = 0
+            return None
+
+        self._utterance.append(frame)
+        self._silence_run = 0 if is_speech else self._silence_run + 1
+
+        if self._silence_run >= self.hangover_frames:
+            return self._finish()
+        if len(self._utterance) >= self.max_utterance_frames:
+            return self._finish()
+        return None
+
+    def _finish(self) -> bytes:
+        trailing = max(0, self._silence_run - self.padding_frames)
+        frames = self._utterance[: len(self._utterance) - trailing]
+        self._utterance = []
+        self._silence_run = 0
+        self.in_speech = False
+        if self.emit_wav:
+            size = len(frames) * self.frame_bytes
+            return b"".join([wav_header(size, self.sample_rate), *frames])
+        return b"".join(frames)
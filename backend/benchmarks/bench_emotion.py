@@ -0,0 +1,76 @@
+"""
+Emotion classifier throughput: legacy substring scan vs compiled matcher.
+
+Usage (from backend/):
+    python -m benchmarks.bench_emotion [--turns 2000] [--repeat 5]
+"""
+
+import argparse
+import random
+import time
+
+from app.services.emotional.classifier import EMOTION_KEYWORDS, classify_many
+
+FILLER = (
+    "well I mean the thing is that my hours got cut at work last month and "
+    "honestly I have been trying to keep up with rent and the car payment "
+    "so I was not expecting this call today but I hear what you are saying "
+    "hello the pressure is a real issue since the bank reported my account"
+).split()
+
+
+def legacy_classify(text: str) -> str:
+    """Pre-compilation implementation: one substring scan per keyword."""
+    text_lower = text.lower()
+    scores = {}
+    for emotion, keywords in EMOTION_KEYWORDS.items():
+        score = sum(1 for kw in keywords if kw in text_lower)
+        if score > 0:
+            scores[emotion] = score
+    if not scores:
+        return "cooperative"
+    return max(scores, key=scores.get)
+
+
+def make_transcripts(turns: int, words_per_turn: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    keywords = [kw for entries in EMOTION_KEYWORDS.values() for kw in entries]
+    transcripts = []
+    for _ in range(turns):
+        words = [rng.choice(FILLER) for _ in range(words_per_turn)]
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        transcripts.append(" ".join(words) + ".")
+    return transcripts
+
+
+def run(name: str, fn, texts: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(texts)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {name:<10} {len(texts) / best:>12,.0f} texts/s  ({best * 1e3:.1f} ms)")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for words_per_turn in (15, 200, 2000):
+        texts = make_transcripts(args.turns, words_per_turn)
+        legacy = [legacy_classify(t) for t in texts]
+        compiled = classify_many(texts)
+        changed = sum(a != b for a, b in zip(legacy, compiled))
+        print(f"{words_per_turn} words/turn, {args.turns} turns "
+              f"({changed} labels changed by word-boundary matching)")
+        before = run("legacy", lambda ts: [legacy_classify(t) for t in ts], texts, args.repeat)
+        after = run("compiled", classify_many, texts, args.repeat)
+        print(f"  speedup    {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
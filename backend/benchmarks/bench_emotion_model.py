@@ -0,0 +1,68 @@
+"""
+Emotion engines compared: keyword rules vs hashed n-gram model.
+
+Trains the model on 80% of the labeled data and reports accuracy and
+per-message latency of both engines on the remaining 20%.
+
+Usage (from backend/):
+    python -m benchmarks.bench_emotion_model [--jsonl labeled.jsonl]
+
+Without --jsonl the labeled user messages are read from the database.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+
+from app.services.emotional.classifier import classify_keywords
+from app.services.emotional.model import EmotionModel, train_model
+from app.services.emotional.train import load_jsonl, load_labeled_messages
+
+
+def evaluate(name: str, predict, texts: list[str], labels: list[str]) -> None:
+    latencies, correct = [], 0
+    for text, label in zip(texts, labels):
+        start = time.perf_counter()
+        predicted = predict(text)
+        latencies.append(time.perf_counter() - start)
+        correct += predicted == label
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"  {name:<9} accuracy {correct / len(texts):6.2%}   "
+        f"mean {statistics.fmean(latencies) * 1e6:7.1f} us   p99 {p99 * 1e6:7.1f} us"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jsonl", help="Labeled {text, label} records")
+    parser.add_argument("--n-features", type=int, default=2**16)
+    args = parser.parse_args()
+
+    texts, labels = load_jsonl(args.jsonl) if args.jsonl else asyncio.run(load_labeled_messages())
+    pairs = list(zip(texts, labels))
+    random.Random(3).shuffle(pairs)
+    split = int(len(pairs) * 0.8)
+    train, test = pairs[:split], pairs[split:]
+    if not test:
+        parser.error("not enough labeled messages")
+
+    start = time.perf_counter()
+    model = train_model([t for t, _ in train], [l for _, l in train], n_features=args.n_features)
+    print(f"trained on {len(train)} messages in {time.perf_counter() - start:.1f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        model.save(directory)
+        mapped = EmotionModel.load(directory)
+        test_texts, test_labels = [t for t, _ in test], [l for _, l in test]
+        print(f"{len(test)} held-out messages")
+        evaluate("keywords", classify_keywords, test_texts, test_labels)
+        evaluate("model", lambda text: mapped.predict(text)[0], test_texts, test_labels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Recall and latency of vector, BM25 and hybrid knowledge retrieval.
+
+Runs against the exported index (``python -m app.services.rag.ingest
+--export-index``). Queries come from a JSONL file of {"query", "source"}
+records, where source is the relevant knowledge file, or, by default, are
+sampled from the chunks themselves: a random span of words whose own
+chunk is the relevant one. Sampled spans favour lexical matching; use a
+real query set to tune the fusion thresholds.
+
+Query embeddings are computed up front in one batched call, so search
+latency excludes the remote embedding round trip that a lexical short
+circuit saves.
+
+Usage (from backend/):
+    python -m benchmarks.bench_hybrid [--queries queries.jsonl] [--top-k 3] [--no-vector]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from app.config import get_settings
+from app.services.rag.embeddings import embed_texts
+from app.services.rag.knowledge_base import _FUSION_CANDIDATES, KnowledgeBase, fuse_rankings
+from app.services.rag.mmap_store import MmapLexicalStore, MmapVectorStore
+
+
+def sample_queries(chunks: list[dict], n: int, words: int, seed: int = 11) -> list[dict]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        chunk = rng.choice(chunks)
+        tokens = chunk["content"].split()
+        start = rng.randrange(max(1, len(tokens) - words))
+        queries.append({
+            "query": " ".join(tokens[start:start + words]),
+            "source": chunk["source"],
+            "content": chunk["content"],
+        })
+    return queries
+
+
+def is_relevant(passage, query: dict) -> bool:
+    if "content" in query:
+        return passage.content == query["content"]
+    return passage.source == query["source"]
+
+
+def report(name: str, results: list[list], latencies: list[float], queries: list[dict]) -> None:
+    recall = statistics.fmean(
+        any(is_relevant(p, q) for p in passages) for passages, q in zip(results, queries)
+    )
+    latencies = sorted(latencies)
+    print(
+        f"  {name:<8} recall {recall:6.2%}   p50 {statistics.median(latencies) * 1e6:8.1f} us"
+        f"   p99 {latencies[int(len(latencies) * 0.99)] * 1e6:8.1f} us"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", help="JSONL of {query, source}")
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--words", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--no-vector", action="store_true", help="Skip embeddings; BM25 only")
+    args = parser.parse_args()
+
+    index_dir = get_settings().knowledge_index_dir
+    vectors = MmapVectorStore(index_dir)
+    lexical = MmapLexicalStore(index_dir)
+    lexical.search("warm up", 1)
+    kb = KnowledgeBase(store=vectors, lexical=lexical)
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [json.loads(line) for line in f if line.strip()]
+    else:
+        queries = sample_queries(lexical._chunks, args.samples, args.words)
+    print(f"{len(queries)} queries, top_k={args.top_k}")
+
+    k = args.top_k
+    results, latencies, shortcuts = {}, {}, 0
+    for name in ("lexical",) + (() if args.no_vector else ("vector", "hybrid")):
+        results[name], latencies[name] = [], []
+
+    embeddings = [] if args.no_vector else await embed_texts([q["query"] for q in queries])
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        passages, _ = lexical.search(query["query"], k)
+        latencies["lexical"].append(time.perf_counter() - start)
+        results["lexical"].append(passages)
+        if args.no_vector:
+            continue
+
+        start = time.perf_counter()
+        results["vector"].append(await vectors.search(embeddings[i], top_k=k))
+        latencies["vector"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        candidates, confident = kb._lexical_search(query["query"], k * _FUSION_CANDIDATES, None)
+        if confident:
+            shortcuts += 1
+            passages = candidates[:k]
+        else:
+            ranked = await vectors.search(embeddings[i], top_k=k * _FUSION_CANDIDATES)
+            passages = fuse_rankings([ranked, candidates], k) if candidates else ranked[:k]
+        latencies["hybrid"].append(time.perf_counter() - start)
+        results["hybrid"].append(passages)
+
+    for name in results:
+        report(name, results[name], latencies[name], queries)
+    if not args.no_vector:
+        print(f"  embedding calls skipped by the lexical fast path: {shortcuts / len(queries):.1%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
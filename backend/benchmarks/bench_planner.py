@@ -0,0 +1,93 @@
+"""
+Parity and throughput of the vectorized negotiation planner.
+
+Generates a synthetic debtor book (every emotional profile and risk
+profile, unknown values, days past due around each tier boundary, turn
+counts on both sides of the offer and "firm" thresholds), checks that
+plan_batch matches NegotiationEngine.determine_action row for row
+(strategy, offer to the cent, tone, urgency), and reports rows/sec of
+both. Exits non-zero on any mismatch.
+
+Usage (from backend/):
+    python -m benchmarks.bench_planner [--rows 1000000] [--parity-rows 200000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+import structlog
+
+from app.services.strategy.negotiation import NegotiationContext, NegotiationEngine
+from app.services.strategy.planner import plan_batch
+
+EMOTIONS = ["cooperative", "defensive", "aggressive", "evasive", "anxious", "", "unknown"]
+RISKS = ["low", "medium", "high", "unknown"]
+STRATEGIES = ["empathetic", "firm", "informative", "urgent"]
+BOUNDARIES = [89, 90, 91, 149, 150, 151, 179, 180, 181, 299, 300, 301, 364, 365, 366]
+
+
+def synthetic_book(rows: int, seed: int = 7) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    original = np.round(rng.uniform(50, 50_000, rows), 2)
+    days = rng.integers(0, 900, rows)
+    days[::5] = rng.choice(BOUNDARIES, len(days[::5]))
+    return {
+        "original_amount": original,
+        "negotiable_amount": np.round(original * rng.uniform(0.2, 0.9, rows), 2),
+        "days_past_due": days,
+        "risk_profile": rng.choice(RISKS, rows),
+        "emotional_state": rng.choice(EMOTIONS, rows),
+        "current_strategy": rng.choice(STRATEGIES, rows),
+        "turn_count": rng.integers(0, 6, rows),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--parity-rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    # The engine logs every decision; keep the benchmark about the rules.
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING))
+
+    book = synthetic_book(args.rows)
+    start = time.perf_counter()
+    plan = plan_batch(**book)
+    batch_seconds = time.perf_counter() - start
+    print(f"plan_batch   {args.rows:>9} rows  {args.rows / batch_seconds:>12,.0f} rows/s")
+
+    n = min(args.parity_rows, args.rows)
+    columns = {key: values[:n].tolist() for key, values in book.items()}
+    engine = NegotiationEngine()
+    start = time.perf_counter()
+    actions = [
+        engine.determine_action(NegotiationContext(**dict(zip(columns, row))))
+        for row in zip(*columns.values())
+    ]
+    scalar_seconds = time.perf_counter() - start
+    print(f"engine       {n:>9} rows  {n / scalar_seconds:>12,.0f} rows/s")
+    print(f"speedup      {(args.rows / batch_seconds) / (n / scalar_seconds):.0f}x")
+
+    offers = plan.offer_amount[:n].tolist()
+    mismatches = [
+        i
+        for i, action in enumerate(actions)
+        if action.strategy != plan.strategy[i]
+        or action.tone != plan.tone[i]
+        or action.urgency_level != plan.urgency_level[i]
+        or (action.offer_amount is None) != np.isnan(offers[i])
+        or (action.offer_amount is not None and action.offer_amount != offers[i])
+    ]
+    print(f"parity       {n - len(mismatches)}/{n} rows identical")
+    for i in mismatches[:10]:
+        print("  mismatch", {key: values[i] for key, values in columns.items()}, actions[i], offers[i])
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
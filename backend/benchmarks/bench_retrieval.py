@@ -0,0 +1,142 @@
+"""
+pgvector retrieval latency at scale.
+
+Loads N synthetic chunks into a scratch copy of knowledge_chunks (schema
+``rag_bench``), builds the HNSW index and measures, per ef_search value:
+query latency (p50/p99) under concurrency, recall@k against an exact
+scan, and the worst event-loop stall observed while queries run, which
+should stay near zero since the search is fully async.
+
+Usage (from backend/, needs a pgvector database):
+    APP_DEBUG=false python -m benchmarks.bench_retrieval --rows 10000 --rows 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from sqlalchemy import MetaData, text
+
+from app.core.database import engine
+from app.models.knowledge import EMBEDDING_DIMENSIONS, KnowledgeChunk
+from app.services.rag.vector_store import PgVectorStore
+
+SCHEMA = "rag_bench"
+LOAD_BATCH = 20_000
+
+
+async def load(table, rows: int) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}"))
+        await conn.run_sync(lambda sync_conn: table.drop(sync_conn, checkfirst=True))
+        await conn.run_sync(table.create)
+        await conn.execute(text(f"DROP INDEX {SCHEMA}.ix_knowledge_chunks_embedding_hnsw"))
+
+    start = time.perf_counter()
+    for offset in range(0, rows, LOAD_BATCH):
+        async with engine.begin() as conn:
+            await conn.execute(
+                text(
+                    f"""
+                    INSERT INTO {SCHEMA}.knowledge_chunks
+                        (id, source, chunk_index, content, content_hash, embedding, metadata_json)
+                    SELECT gen_random_uuid(), 'bench/' || (g % 100), g, 'chunk ' || g, md5(g::text),
+                           (SELECT array_agg(random() - 0.5) FROM generate_series(1, :dims)
+                            WHERE g > 0)::vector,
+                           jsonb_build_object('document', 'doc' || (g % 20))
+                    FROM generate_series(:first, :last) g
+                    """
+                ),
+                {"dims": EMBEDDING_DIMENSIONS, "first": offset + 1, "last": min(offset + LOAD_BATCH, rows)},
+            )
+    print(f"  loaded {rows:,} rows in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: next(
+                i for i in table.indexes if i.name == "ix_knowledge_chunks_embedding_hnsw"
+            ).create(sync_conn)
+        )
+        await conn.execute(text(f"ANALYZE {SCHEMA}.knowledge_chunks"))
+    print(f"  built HNSW index in {time.perf_counter() - start:.1f} s")
+
+
+async def loop_stall(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Largest delay of a periodic tick beyond its interval."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def measure(store: PgVectorStore, queries, top_k: int, ef_search: int, concurrency: int):
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(query):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await store.search(query, top_k=top_k, ef_search=ef_search)
+            latencies.append(time.perf_counter() - start)
+            return result
+
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_stall(stop))
+    results = await asyncio.gather(*(one(q) for q in queries))
+    stop.set()
+    stall = await ticker
+    latencies.sort()
+    return results, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], stall
+
+
+async def bench(rows: int, queries: int, top_k: int, ef_values: list[int], concurrency: int) -> None:
+    table = KnowledgeChunk.__table__.to_metadata(MetaData(), schema=SCHEMA)
+    store = PgVectorStore(table)
+    print(f"{rows:,} chunks, {EMBEDDING_DIMENSIONS} dims")
+    await load(table, rows)
+
+    rng = random.Random(5)
+    vectors = [[rng.random() - 0.5 for _ in range(EMBEDDING_DIMENSIONS)] for _ in range(queries)]
+    truth = [
+        {p.content for p in await store.search(v, top_k=top_k, exact=True)}
+        for v in vectors[: min(queries, 50)]
+    ]
+
+    for ef_search in ef_values:
+        results, p50, p99, stall = await measure(store, vectors, top_k, ef_search, concurrency)
+        recall = statistics.fmean(
+            len(expected & {p.content for p in got}) / top_k for expected, got in zip(truth, results)
+        )
+        print(
+            f"  ef_search={ef_search:<4} p50 {p50 * 1e3:6.1f} ms  p99 {p99 * 1e3:6.1f} ms  "
+            f"recall@{top_k} {recall:.3f}  max loop stall {stall * 1e3:.1f} ms"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, action="append", help="Corpus sizes (repeatable)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--ef-search", type=int, action="append")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--keep", action="store_true", help="Keep the rag_bench schema afterwards")
+    args = parser.parse_args()
+
+    try:
+        for rows in args.rows or [10_000, 1_000_000]:
+            await bench(rows, args.queries, args.top_k, args.ef_search or [20, 40, 100, 200], args.concurrency)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
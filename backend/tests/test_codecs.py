@@ -0,0 +1,48 @@
+import struct
+
+import pytest
+
+from app.services.voice.codecs import CodecError, aligned_length, audio_duration
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames.
+_MP3_FRAME = b"\xff\xfb\x90\x00" + bytes(413)
+
+
+def _ogg_page(granule: int, body: bytes) -> bytes:
+    header = b"OggS" + bytes(2) + struct.pack("<qII", granule, 1, 0) + bytes(4)
+    return header + bytes([1, len(body)]) + body
+
+
+def _ogg_opus(pre_skip: int, granules: list[int]) -> bytes:
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<H", pre_skip) + bytes(9)
+    return _ogg_page(0, head) + b"".join(_ogg_page(g, bytes(10)) for g in granules)
+
+
+def test_pcm_duration():
+    assert audio_duration(bytes(48000), "pcm") == 1.0
+
+
+def test_mp3_duration_counts_complete_frames():
+    audio = b"ID3\x03\x00\x00\x00\x00\x00\x02xx" + _MP3_FRAME * 2 + _MP3_FRAME[:100]
+    assert audio_duration(audio, "mp3") == pytest.approx(2 * 1152 / 44100)
+
+
+def test_ogg_opus_duration_uses_last_complete_page():
+    audio = _ogg_opus(312, [48312, 96312])
+    assert audio_duration(audio, "opus") == pytest.approx(2.0)
+    assert audio_duration(audio[:-5], "opus") == pytest.approx(1.0)
+
+
+def test_unknown_codec():
+    with pytest.raises(CodecError):
+        audio_duration(b"", "wav")
+
+
+def test_aligned_length_keeps_whole_samples_and_pages():
+    audio = _ogg_opus(312, [960, 1920])
+    last_page = len(_ogg_page(1920, bytes(10)))
+
+    assert aligned_length(bytes(7), "pcm") == 6
+    assert aligned_length(audio, "opus") == len(audio)
+    assert aligned_length(audio[:-1], "opus") == len(audio) - last_page
+    assert aligned_length(audio[:20], "opus") == 0
@@ -0,0 +1,89 @@
+import pytest
+
+from app.services.personaplex.history import (
+    _FACT_PATTERN,
+    _MESSAGE_OVERHEAD_TOKENS,
+    ConversationHistory,
+    _Entry,
+    count_tokens,
+)
+
+
+@pytest.mark.parametrize(
+    "sentence",
+    [
+        "We can offer a 40% discount today.",
+        "descuento del 25%.",
+        "That is 12.5 % off the balance.",
+        "Your balance is $1,250.00 right now.",
+        "Podemos dejarlo en 800 pesos.",
+        "We can accept 300 dollars.",
+        "Twenty percent is 20 percent.",
+        "El pago queda para el 15/07.",
+        "You have 30 days to pay.",
+        "Lo dividimos en 6 cuotas.",
+    ],
+)
+def test_fact_pattern_matches_negotiation_facts(sentence):
+    assert _FACT_PATTERN.search(sentence)
+
+
+@pytest.mark.parametrize(
+    "sentence",
+    [
+        "I understand how you feel.",
+        "Call me back tomorrow.",
+        "Version 2 of the copperplate form.",
+        "Use code 50%off at checkout.",
+    ],
+)
+def test_fact_pattern_ignores_small_talk(sentence):
+    assert not _FACT_PATTERN.search(sentence)
+
+
+def test_pin_facts_keeps_only_factual_sentences_once():
+    history = ConversationHistory(keep_turns=1)
+    entry = _Entry("assistant", "I hear you. We can offer a 40% discount today. Thanks!", 20)
+
+    history._pin_facts(entry)
+    history._pin_facts(entry)
+
+    assert history.facts == ["assistant: We can offer a 40% discount today."]
+
+
+def test_pin_facts_drops_the_oldest_over_the_token_cap():
+    history = ConversationHistory(keep_turns=1, max_fact_tokens=40)
+
+    for amount in range(100, 120):
+        history._pin_facts(_Entry("user", f"I can pay ${amount} a month.", 10))
+
+    assert sum(count_tokens(fact) for fact in history.facts) <= 40
+    assert history.facts[-1] == "user: I can pay $119 a month."
+    assert "user: I can pay $100 a month." not in history.facts
+
+
+def test_restated_fact_becomes_the_newest():
+    history = ConversationHistory(keep_turns=1)
+    history._pin_facts(_Entry("user", "I can pay $100.", 10))
+    history._pin_facts(_Entry("user", "You have 30 days to pay.", 10))
+    history._pin_facts(_Entry("user", "I can pay $100.", 10))
+
+    assert history.facts == ["user: You have 30 days to pay.", "user: I can pay $100."]
+
+
+@pytest.mark.parametrize("max_tokens", [0, 15, 40, 80, 200])
+def test_as_messages_fits_the_budget_header_included(max_tokens):
+    history = ConversationHistory(keep_turns=1, max_fact_tokens=1000)
+    history.summary = "The caller owes $1,250 and asked for a discount."
+    for amount in range(100, 130):
+        history._pin_facts(_Entry("user", f"I can pay ${amount} a month.", 10))
+    history.add("user", "Can we do it in 6 cuotas?")
+    history.add("assistant", "Yes, six installments of $210 work for us.")
+
+    messages = history.as_messages(max_tokens=max_tokens)
+
+    sent = sum(count_tokens(m["content"]) + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+    assert sent <= max_tokens
+    if messages and messages[0]["role"] == "system" and "- user:" in messages[0]["content"]:
+        # Trimmed facts go oldest first.
+        assert "$129" in messages[0]["content"]
@@ -0,0 +1,74 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from app.services.strategy.negotiation import (
+    EMOTION_STRATEGIES,
+    RISK_MULTIPLIERS,
+    TONES,
+    NegotiationContext,
+    NegotiationEngine,
+)
+from app.services.strategy.planner import plan_batch
+
+# Known values plus ones the rules do not know; "" is a NULL emotional
+# profile as the planner reads it.
+EMOTIONS = [*dict.fromkeys([*EMOTION_STRATEGIES, *TONES, "cooperative"]), "", "unknown"]
+RISKS = [*RISK_MULTIPLIERS, "medium", "unknown"]
+STRATEGIES = ["empathetic", "firm", "informative", "urgent"]
+TIER_DAYS = [0, 89, 90, 91, 149, 150, 151, 179, 180, 181, 299, 300, 301, 364, 365, 366]
+
+
+def _edge_rows() -> list[tuple]:
+    # Every emotion, risk profile and tier boundary, for zero, partly zero
+    # and regular balances, on both sides of the offer and "firm" turns.
+    balances = [(0.0, 0.0), (1200.0, 0.0), (0.0, 300.0), (1234.56, 617.28)]
+    return [
+        (original, negotiable, days, risk, emotion, strategy, turn)
+        for (original, negotiable), days, risk, emotion, strategy, turn in itertools.product(
+            balances, TIER_DAYS, RISKS, EMOTIONS, STRATEGIES[:2], [0, 2, 4]
+        )
+    ]
+
+
+def _random_rows(rows: int, seed: int = 11) -> list[tuple]:
+    rng = np.random.default_rng(seed)
+    original = np.round(rng.uniform(0, 50_000, rows), 2)
+    negotiable = np.round(original * rng.uniform(0, 1, rows), 2)
+    return list(
+        zip(
+            original.tolist(),
+            negotiable.tolist(),
+            rng.integers(0, 900, rows).tolist(),
+            rng.choice(RISKS, rows).tolist(),
+            rng.choice(EMOTIONS, rows).tolist(),
+            rng.choice(STRATEGIES, rows).tolist(),
+            rng.integers(0, 6, rows).tolist(),
+        )
+    )
+
+
+@pytest.mark.parametrize("rows", [_edge_rows(), _random_rows(5_000)], ids=["edges", "seeded"])
+def test_plan_batch_matches_the_engine(rows):
+    columns = [np.array(column) for column in zip(*rows)]
+    plan = plan_batch(*columns)
+
+    engine = NegotiationEngine()
+    offers = plan.offer_amount.tolist()
+    for i, row in enumerate(rows):
+        action = engine.determine_action(NegotiationContext(*row))
+        planned = (
+            plan.strategy[i],
+            None if math.isnan(offers[i]) else offers[i],
+            plan.tone[i],
+            plan.urgency_level[i],
+        )
+        assert planned == (
+            action.strategy,
+            action.offer_amount,
+            action.tone,
+            action.urgency_level,
+        ), row
+
@@ -0,0 +1,68 @@
+import pytest
+
+from app.services.voice import playback as playback_module
+from app.services.voice.playback import PlaybackTracker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(playback_module.time, "monotonic", clock)
+    return clock
+
+
+def _send(tracker: PlaybackTracker, text: str, seconds: float) -> None:
+    tracker.start_segment(text)
+    tracker.add_audio(bytes(int(seconds * 48000)))  # 24 kHz 16-bit PCM
+    tracker.end_segment()
+
+
+def test_heard_follows_real_time_from_send(clock):
+    tracker = PlaybackTracker(0, "pcm")
+    _send(tracker, "One two three four.", 2.0)
+    _send(tracker, "Five six.", 1.0)  # sent at once, queued behind the first
+
+    clock.now += 1.0
+    assert tracker.heard() == ("One two", False)
+    clock.now += 1.5
+    assert tracker.heard() == ("One two three four. Five", False)
+    assert tracker.ends_at() == pytest.approx(103.0)
+    clock.now = 103.0
+    assert tracker.heard() == ("One two three four. Five six.", True)
+
+
+def test_stop_freezes_playback(clock):
+    tracker = PlaybackTracker(0, "pcm")
+    _send(tracker, "One two three four.", 2.0)
+    clock.now += 1.0
+    tracker.stop()
+    clock.now += 5.0
+    assert tracker.heard() == ("One two", False)
+
+
+def test_client_report_overrides_the_estimate(clock):
+    tracker = PlaybackTracker(0, "pcm")
+    _send(tracker, "One two three four.", 2.0)
+    _send(tracker, "Five six.", 1.0)
+    clock.now += 2.5
+    # The client started late: still half-way through the first segment.
+    tracker.report(0, 1.0)
+    assert tracker.heard() == ("One two", False)
+    clock.now += 1.5
+    assert tracker.heard() == ("One two three four. Five", False)
+
+
+def test_report_for_unknown_segment_is_ignored(clock):
+    tracker = PlaybackTracker(0, "pcm")
+    _send(tracker, "One two.", 1.0)
+    tracker.report(3, 0.0)
+    clock.now += 1.0
+    assert tracker.heard() == ("One two.", True)
@@ -0,0 +1,45 @@
+import asyncio
+from contextlib import aclosing
+
+from app.services.conversation.session_store import MemorySessionStore
+
+
+async def _hold(store: MemorySessionStore, connection_id: str, saved: list[str]) -> None:
+    """Serve a session until taken over, then save and release it."""
+    async with aclosing(store.events("s")) as events:
+        async for event in events:
+            if event["type"] == "session_takeover" and event["connection_id"] != connection_id:
+                break
+    await store.save("s", {"holder": connection_id})
+    saved.append(connection_id)
+    await store.release("s", connection_id)
+
+
+def test_take_over_waits_for_the_previous_holder_to_save():
+    async def scenario():
+        store = MemorySessionStore(ttl=60)
+        saved: list[str] = []
+        assert await store.take_over("s", "old", timeout=1.0)
+        holder = asyncio.create_task(_hold(store, "old", saved))
+        await asyncio.sleep(0)
+
+        assert await store.take_over("s", "new", timeout=1.0)
+        assert saved == ["old"]
+        assert await store.load("s") == {"holder": "old"}
+        await holder
+
+        # The old holder's release does not clear the new claim.
+        assert await store.claim("s", "newer") == "new"
+
+    asyncio.run(scenario())
+
+
+def test_take_over_gives_up_on_a_dead_holder():
+    async def scenario():
+        store = MemorySessionStore(ttl=60)
+        await store.claim("s", "dead")
+        assert not await store.take_over("s", "new", timeout=0.05)
+        assert await store.claim("s", "newer") == "new"
+        assert store.stats()["subscribed_sessions"] == 0
+
+    asyncio.run(scenario())
@@ -10,10 +10,47 @@ export function useConversationSocket(conversationId: string) {
   const [emotionalState, setEmotionalState] = useState("unknown");
   const [isConnected, setIsConnected] = useState(false);
   const wsRef = useRef<WebSocket | null>(null);
+  const audioQueueRef = useRef<Blob[]>([]);
+  const isPlayingRef = useRef(false);
+  const currentAudioRef = useRef<HTMLAudioElement | null>(null);
+
+  // Agent replies arrive as several audio chunks (one per sentence);
+  // play them back to back in arrival order.
+  const playNext = useCallback(() => {
+    const next = audioQueueRef.current.shift();
+    if (!next) {
+      isPlayingRef.current = false;
+      return;
+    }
+    isPlayingRef.current = true;
+    const audioUrl = URL.createObjectURL(next);
+    const audio = new Audio(audioUrl);
+    currentAudioRef.current = audio;
+    audio.onended = () => {
+      URL.revokeObjectURL(audioUrl);
+      playNext();
+    };
+    audio.play().catch((err) => {
+      console.error(err);
+      URL.revokeObjectURL(audioUrl);
+      playNext();
+    });
+  }, []);
+
+  // The caller talked over the agent: drop whatever is still queued.
+  const stopPlayback = useCallback(() => {
+    audioQueueRef.current = [];
+    currentAudioRef.current?.pause();
+    currentAudioRef.current = null;
+    isPlayingRef.current = false;
+  }, []);
 
   useEffect(() => {
+    // MediaRecorder produces Opus in WebM; the server decodes it incrementally.
+    // Output stays mp3: each binary message is a whole file that plays as a
+    // Blob. The streamed opus / pcm outputs need a streaming player.
     const ws = new WebSocket(
-      `${WS_URL}/api/v1/ws/conversation/${conversationId}`
+      `${WS_URL}/api/v1/ws/conversation/${conversationId}?input=webm-opus&output=mp3`
     );
     wsRef.current = ws;
 
@@ -47,12 +84,17 @@ export function useConversationSocket(conversationId: string) {
         if (data.type === "emotion") {
           setEmotionalState(data.emotion);
         }
+
+        if (data.type === "barge_in") {
+          stopPlayback();
+        }
       }
-      // Binary data = audio response from agent (play it)
+      // Binary data = one mp3 segment of the agent response (queue it)
       if (event.data instanceof Blob) {
-        const audioUrl = URL.createObjectURL(event.data);
-        const audio = new Audio(audioUrl);
-        audio.play().catch(console.error);
+        audioQueueRef.current.push(event.data);
+        if (!isPlayingRef.current) {
+          playNext();
+        }
       }
     };
 
@@ -67,13 +109,15 @@ export function useConversationSocket(conversationId: string) {
     return () => {
       ws.close();
     };
-  }, [conversationId]);
+  }, [conversationId, playNext, stopPlayback]);
 
   const sendAudio = useCallback((blob: Blob) => {
     const ws = wsRef.current;
     if (ws && ws.readyState === WebSocket.OPEN) {
       blob.arrayBuffer().then((buffer) => {
         ws.send(buffer);
+        // One blob per recording: the caller has stopped talking.
+        ws.send(JSON.stringify({ type: "end_of_utterance" }));
       });
     }
   }, []);